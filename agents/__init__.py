@@ -0,0 +1,5 @@
+# agents/ is the import root: modules here import each other by bare name
+# (`import dedup`, `from model_router import get_router`), and code outside it
+# (core/, scripts/) puts this directory on sys.path and does the same. Never
+# import them as `agents.<module>` — that loads a second copy with its own
+# router, scheduler and caches.
@@ -1,13 +1,11 @@
+import asyncio
 import os
 import json
 import re
-from bs4 import BeautifulSoup, Comment
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
-
-load_dotenv()
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from structured_output import query_structured, is_valid
+from model_router import get_router, DEFAULT_TASK
+import replay
+import debug_artifacts
 
 # Helper: Strip tags and reduce HTML to core elements
 def clean_html(html):
@@ -51,18 +49,31 @@ def clean_html(html):
 
     return cleaned_html
 
-# Core LLM wrapper
-async def query_gpt(prompt):
-    try:
-        response = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"GPT Error: {e}")
-        return None
+# Core LLM wrapper: `task` picks the model tier, `route` names the call site in telemetry
+async def query_gpt(prompt, task=DEFAULT_TASK, route=None, validate=None):
+    if replay.is_replaying():
+        hit, cached = replay.lookup(prompt)
+        if not hit:
+            print("⚠️ No recorded GPT response for this prompt.")
+        return cached
+
+    content = await get_router().complete(prompt, task=task, route=route, validate=validate)
+    replay.record(prompt, content)
+    return content
+
+def ask_for(task, route=None, schema=None):
+    """
+    A prompt -> text callable for query_structured that escalates tiers on unparseable
+    answers. The router does all the retrying, so query_structured won't re-ask it.
+    """
+    async def ask(prompt):
+        return await query_gpt(prompt, task=task, route=route, validate=lambda text: is_valid(text, schema))
+    ask.escalates = True
+    return ask
+
+def _selector_answer_ok(text):
+    answer = text.strip().strip('"').strip("'")
+    return answer.lower() == "null" or answer.startswith((".", "#")) or "[" in answer
 
 # --- Public Methods ---
 
@@ -85,7 +96,7 @@ async def get_selector(html, target_description):
     Output format: Just the CSS selector string. No quotes, no backticks, no markdown.
     """
 
-    raw = await query_gpt(prompt)
+    raw = await query_gpt(prompt, task="selector", route="get_selector", validate=_selector_answer_ok)
 
     if raw is None:
         print("⚠️ GPT returned None for selector.")
@@ -104,6 +115,59 @@ async def get_selector(html, target_description):
     return selector
 
 
+async def get_selector_in_delta(delta, target_description):
+    """get_selector over only what an interaction changed (see dom_delta.PageDelta)."""
+    prompt = f"""
+    You are a Playwright automation expert. The user just interacted with a web page. These are the page fragments that were added or became visible as a result, each preceded by its position in the page:
+
+    {delta.html()}
+
+    The rest of the page is unchanged: {delta.summary()}
+
+    Target element: "{target_description}"
+
+    Requirements:
+    - Return the most specific and complete **CSS selector** string that locates the element in the live page.
+    - Prefer `id`, `name`, or `type` attributes if available.
+    - If the element is not in these fragments, return "null" (just that string, nothing else).
+    - Do **not** return any explanation, markdown, or extra text.
+
+    Output format: Just the CSS selector string. No quotes, no backticks, no markdown.
+    """
+
+    raw = await query_gpt(prompt, task="selector", route="get_selector_delta", validate=_selector_answer_ok)
+    if raw is None:
+        return None
+    selector = raw.strip().strip('"').strip("'")
+    if selector.lower() == "null" or not (selector.startswith((".", "#")) or "[" in selector):
+        return None
+    return selector
+
+
+def _ref_answer_ok(text):
+    answer = text.strip().strip('"').strip("'").strip("`")
+    return answer.lower() == "null" or re.fullmatch(r"\[?e\d+\]?", answer) is not None
+
+async def get_selector_in_outline(outline, target_description):
+    """get_selector over a page_outline.PageOutline: the model picks a node ref, we map it to its selector."""
+    prompt = f"""
+    You are a Playwright automation expert. Below is an outline of a web page: one line per element, with its role, accessible name, a reference in brackets like [e12], and stable attributes.
+
+    {outline.text}
+
+    Target element: "{target_description}"
+
+    Requirements:
+    - Return the reference of the element that best matches the target, e.g. e12.
+    - For a repeated item (such as a product card), prefer the reference of its "repeated" line, which selects all of them.
+    - If no element matches, return "null" (just that string, nothing else).
+    - Do **not** return any explanation, markdown, or extra text.
+    """
+
+    raw = await query_gpt(prompt, task="selector", route="get_selector_outline", validate=_ref_answer_ok)
+    return outline.selector_for(raw)
+
+
 async def analyze_site(html):
     html_snippet = clean_html(html)[:7000]
     prompt_template = f"""
@@ -132,30 +196,19 @@ async def analyze_site(html):
     ⚠️ Do NOT include any HTML selectors, CSS, explanations, markdown, or extra commentary.
     Return a valid JSON object only.
     """
-    attempt = 0
-    while attempt < 5:
-        print("🔎 Final prompt sent to GPT:")
-        print(prompt_template)
-
-        raw_response = await query_gpt(prompt_template)
-
-        if raw_response is None:
-            print("⚠️ GPT returned None")
-            continue
-
-        if raw_response.strip() == "{response}":
-            print("⚠️ GPT returned placeholder '{response}' — something's broken in prompt formatting or LLM logic.")
-            continue
-
-        try:
-            result = json.loads(raw_response)
-            return result
-        except Exception as e:
-            print(f"❌ Failed to parse JSON (attempt {attempt+1}): {e}\nRaw response: {raw_response}")
-            attempt += 1
-
-    print("🛑 analyze_site failed after 5 retries.")
-    return {}
+    print(f"🔎 Asking GPT to analyze the site ({len(prompt_template)} char prompt).")
+    debug_artifacts.dump("analyze_site_prompt", prompt_template, level="trace")
+
+    result = await query_structured(
+        ask_for("classification", "analyze_site", {"has_login": bool, "site_type": str}),
+        prompt_template,
+        schema={"has_login": bool, "site_type": str},
+        max_retries=2,
+    )
+    if result is None:
+        print("🛑 analyze_site failed after 3 attempts.")
+        return {}
+    return result
 
 async def get_affiliate_fields(html_snippet: str):
     html_snippet = clean_html(html_snippet)[:5000]  # Token-safe trim
@@ -194,13 +247,55 @@ async def get_affiliate_fields(html_snippet: str):
     HTML:
     {html_snippet}
     """
-    response = await query_gpt(prompt)
-    try:
-        return json.loads(response)
-    except Exception as e:
-        print(f"⚠️ Failed to parse field list JSON: {e}\nRaw response: {response}")
+    fields = await query_structured(ask_for("structured", "affiliate_fields", [str]), prompt, schema=[str], max_retries=1)
+    if fields is None:
+        print("⚠️ Failed to parse field list JSON.")
         return []
-    
+    return fields
+
+_ITEM_NOISE = re.compile(r"<(script|style|svg|noscript)\b.*?</\1>", re.S | re.I)
+
+async def get_listing_fields(item_html: str):
+    """Fields one item of a generic listing (blog, directory, tool list) shows, worth reading off every item."""
+    prompt = f"""
+    Below is the HTML of one item from a listing page (a blog index, directory, product or tool list, search results). The same markup repeats for every item.
+
+    Return a JSON array of the fields this item actually shows that are worth extracting from every item — for example title, link, summary, date, author, category, price, rating, image. Only fields present in this HTML, at most 8.
+
+    Return only a valid JSON array of field names. No markdown. No explanation.
+
+    HTML:
+    {clean_html(item_html)[:5000]}
+    """
+    fields = await query_structured(ask_for("structured", "listing_fields", [str]), prompt, schema=[str], max_retries=1)
+    if fields is None:
+        print("⚠️ Failed to parse field list JSON.")
+        return []
+    return fields
+
+async def get_item_selectors(item_html: str, fields) -> dict:
+    """{field: selector relative to the item element, or None} for every field, in one call."""
+    # Classes and attributes stay in: relative selectors are built from them
+    snippet = _ITEM_NOISE.sub("", item_html)[:6000]
+    prompt = f"""
+    Below is the HTML of ONE item from a list; the same markup repeats for every item on the page.
+
+    {snippet}
+
+    For each field below, give a CSS selector that finds it inside this item. It will be run as item.querySelector(selector) on every item, so:
+    - use tag names, classes and attributes that every item shares;
+    - no ids, no :nth-child / :nth-of-type positions, nothing that only matches this particular item;
+    - don't include the item element itself in the selector;
+    - use null for a field this item doesn't have.
+
+    Fields: {json.dumps(list(fields))}
+
+    Return only a JSON object mapping each field name to its selector. No markdown. No explanation.
+    """
+    answer = await query_structured(ask_for("selector", "item_selectors", dict), prompt, schema=dict, max_retries=1)
+    answer = answer or {}
+    return {field: (answer.get(field) or None) if isinstance(answer.get(field), str) else None for field in fields}
+
 async def get_selectors_from_strategy(html: str, site_type: str) -> dict:
     html_snippet = clean_html(html)[:7000]
 
@@ -220,7 +315,7 @@ async def get_selectors_from_strategy(html: str, site_type: str) -> dict:
 
     Respond as raw plain text.
     """
-    strategy = await query_gpt(strategy_prompt)
+    strategy = await query_gpt(strategy_prompt, task="creative", route="scraping_strategy")
     if not strategy:
         print("🛑 Failed to generate strategy.")
         return {}
@@ -244,21 +339,20 @@ async def get_selectors_from_strategy(html: str, site_type: str) -> dict:
 
     Respond with only a valid JSON array, no extra text.
     """
-    raw_targets = await query_gpt(target_prompt)
-    try:
-        target_fields = json.loads(raw_targets)
-    except Exception as e:
-        print(f"⚠️ Failed to parse selector target list: {e}\nRaw: {raw_targets}")
+    target_fields = await query_structured(ask_for("structured", "selector_targets", [str]), target_prompt, schema=[str], max_retries=1)
+    if target_fields is None:
+        print("⚠️ Failed to parse selector target list.")
         return {}
 
     # Step 3 – resolve selectors via get_selector
-    selectors = {}
-    for target in target_fields:
-        print(f"🎯 Locating selector for: {target}")
-        selector = await get_selector(html, target.replace("_", " "))
-        selectors[target] = selector
+    return await resolve_selectors(html, target_fields)
 
-    return selectors
+async def resolve_selectors(html, targets):
+    """Resolve every target's selector with concurrent get_selector calls ({target: selector or None})."""
+    for target in targets:
+        print(f"🎯 Locating selector for: {target}")
+    selectors = await asyncio.gather(*(get_selector(html, target.replace("_", " ")) for target in targets))
+    return dict(zip(targets, selectors))
 
 async def html_looks_valid(html: str) -> bool:
     cleaned = clean_html(html)[:7000]  # Token-safe trim
@@ -275,9 +369,8 @@ async def html_looks_valid(html: str) -> bool:
     {{"valid": true}} or {{"valid": false}}
     """
 
-    response = await query_gpt(prompt)
-    try:
-        return json.loads(response).get("valid", False)
-    except:
+    result = await query_structured(ask_for("classification", "html_looks_valid", {"valid": bool}), prompt, schema={"valid": bool}, max_retries=1)
+    if result is None:
         return False
+    return result["valid"]
 
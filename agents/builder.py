@@ -1,11 +1,17 @@
 import os
+import sys
 import json
-from dotenv import load_dotenv
-from core.hustle_agent import HustleAgent
 
-load_dotenv()
+# core/ sits next to agents/; make it importable when run as agents/builder.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.hustle_agent import HustleAgent  # noqa: E402
+from structured_output import repair_json, StructuredOutputError  # noqa: E402
+import dedup  # noqa: E402
+import niche_templates  # noqa: E402
+from offer import Offer  # noqa: E402
+
 OUTPUT_DIR = "memory/built_content"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 class BuilderTask:
     def __init__(self, agent: HustleAgent):
@@ -17,32 +23,66 @@ class BuilderTask:
         with open(input_path, "r", encoding="utf-8") as f:
             for line in f:
                 try:
-                    offers.append(json.loads(line))
+                    offers.append(Offer.from_dict(self._unwrap_enrichment(json.loads(line))))
                 except:
                     continue
         print(f"[✅] Loaded {len(offers)} offers.")
         return offers
 
+    @staticmethod
+    def _unwrap_enrichment(offer):
+        # Older runs stored the model's answer as a raw (often ```json-fenced) string
+        if offer.get("type") == "text" and isinstance(offer.get("value"), str):
+            try:
+                enrichment = repair_json(offer["value"])
+            except StructuredOutputError:
+                return offer
+            if isinstance(enrichment, dict):
+                for key, value in enrichment.items():
+                    offer.setdefault(key.strip().lower().replace(" ", "_"), value)
+        return offer
+
     def generate_assets(self, offer):
-        print(f"[🧠] Generating content for: {offer['name']}")
-        return self.agent.create_marketing_bundle(offer)
+        print(f"[🧠] Generating content for: {offer.label}")
+        # CTA and hashtags come from the niche's cached template when enrichment built one
+        niche = niche_templates.assigned_niche(offer) if niche_templates.ENABLED else None
+        template = niche_templates.load(niche) if niche else None
+        defaults = niche_templates.bundle_defaults(template) if template else None
+        return self.agent.create_marketing_bundle(offer, defaults=defaults)
 
     def save_assets(self, offer, assets):
-        filename = f"{offer['name'][:50].replace(' ', '_').replace('/', '_')}.json"
+        filename = f"{offer.label[:50].replace(' ', '_').replace('/', '_')}.json"
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
         filepath = os.path.join(OUTPUT_DIR, filename)
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(assets, f, indent=2, ensure_ascii=False)
         print(f"[💾] Saved content to: {filepath}")
 
-    def run(self):
-        offers = self.load_enriched_offers()
-        for offer in offers:
+    def run(self, top_k=None):
+        from ranker import rank_offers
+
+        offers = rank_offers(self.load_enriched_offers(), top_k=top_k)
+        clusters = dedup.cluster_offers(offers) if dedup.ENABLED else [[i] for i in range(len(offers))]
+        if dedup.ENABLED:
+            dedup.report(clusters, "builder")
+        for cluster in clusters:
+            offer = offers[cluster[0]]
             try:
                 assets = self.generate_assets(offer)
                 self.save_assets(offer, assets)
             except Exception as e:
-                print(f"[❌] Failed to build content for {offer.get('name')}: {e}")
+                print(f"[❌] Failed to build content for {offer.label}: {e}")
                 continue
+            # Near-duplicates reuse the bundle, with what differs noted alongside
+            for index in cluster[1:]:
+                member = offers[index]
+                delta = dedup.offer_delta(offer, member)
+                if not delta:
+                    continue  # exact duplicate listing, the saved bundle already covers it
+                shared = dict(assets) if isinstance(assets, dict) else {"bundle": assets}
+                shared["shared_from"] = offer.label
+                shared["delta"] = delta
+                self.save_assets(member, shared)
 
 if __name__ == "__main__":
     agent = HustleAgent()
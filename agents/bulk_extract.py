@@ -0,0 +1,65 @@
+import re
+
+# Selector-map extraction for generic list pages (blogs, directories, SaaS
+# listings). Given the repeating item selector and a field -> selector map
+# (relative to an item), one page.evaluate returns every field of every item,
+# instead of a query_selector plus inner_text round trip per field.
+
+ROW_EXTRACT_JS = """
+([itemSelector, fields]) => {
+    const items = itemSelector ? Array.from(document.querySelectorAll(itemSelector)) : [document.body];
+    const find = (item, sel) => {
+        try {
+            return item.matches(sel) ? item : item.querySelector(sel);
+        } catch (e) {
+            return null;  // invalid selector from the model
+        }
+    };
+    const read = (el, kind) => {
+        if (kind === 'href') return el.href || el.getAttribute('href') || (el.querySelector('a[href]') || {}).href || null;
+        if (kind === 'src') return el.currentSrc || el.src || (el.querySelector('img') || {}).src || null;
+        return (el.innerText || el.textContent || el.value || '').replace(/\\s+/g, ' ').trim() || null;
+    };
+    return items.map((item) => {
+        const row = {};
+        for (const [name, sel, kind] of fields) {
+            const el = find(item, sel);
+            if (!el) continue;
+            const value = read(el, kind);
+            if (value) row[name] = value;
+        }
+        return row;
+    });
+}
+"""
+
+_LINK_FIELD = re.compile(r"\b(link|url|href)\b")
+_IMAGE_FIELD = re.compile(r"\b(image|img|thumbnail|logo|photo|picture)\b")
+
+
+def field_key(field):
+    return field.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def value_kind(field):
+    """What to read off a field's element: its link, its image source, or its text."""
+    name = field.lower().replace("_", " ")
+    if _LINK_FIELD.search(name):
+        return "href"
+    if _IMAGE_FIELD.search(name):
+        return "src"
+    return "text"
+
+
+async def extract_rows(page, item_selector, field_selectors, min_fields=1):
+    """
+    Extract all fields of all items matching `item_selector` in one in-page pass.
+    `field_selectors` maps field name -> selector relative to the item (None entries
+    are skipped). With no item selector the whole page is treated as one item.
+    Rows with fewer than `min_fields` values are dropped.
+    """
+    fields = [[field_key(field), sel, value_kind(field)] for field, sel in field_selectors.items() if sel]
+    if not fields:
+        return []
+    rows = await page.evaluate(ROW_EXTRACT_JS, [item_selector, fields])
+    return [row for row in rows if len(row) >= min_fields]
@@ -0,0 +1,309 @@
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+# Deterministic label/value extraction for marketplace cards. A Digistore card's
+# innerText looks like:
+#
+#   EMFDEFENSE™ Negative Ions Sticker
+#   Deliverable
+#   $53.39
+#   Net earnings/sale*
+#   ...
+#   Price
+#   $111.14
+#   Commission
+#   30.00%
+#   ...
+#
+# so we can read it straight into typed fields without asking GPT. The model is
+# only consulted for labels we have never seen (and each label at most once).
+
+LABEL_MAP_PATH = Path("memory/label_map.json")
+
+# label (normalized) -> (field name, value type)
+KNOWN_LABELS = {
+    "price": ("price", "money"),
+    "commission": ("commission", "percent"),
+    "earnings/cart visitor": ("earnings_per_cart_visitor", "money"),
+    "earnings per cart visitor": ("earnings_per_cart_visitor", "money"),
+    "net earnings/sale": ("net_earnings_per_sale", "money"),
+    "net earnings per sale": ("net_earnings_per_sale", "money"),
+    "vendor": ("vendor", "vendor"),
+    "online since": ("online_since", "date"),
+    "payment methods": ("payment_methods", "text"),
+    "cart conversion": ("cart_conversion", "percent"),
+    "cancellation rate": ("cancellation_rate", "percent"),
+    "refund rate": ("refund_rate", "percent"),
+    "gravity": ("gravity", "number"),
+    "avg $/conversion": ("average_earnings_per_conversion", "money"),
+    "initial $/conversion": ("initial_earnings_per_conversion", "money"),
+}
+
+# Labels whose value is printed *above* the label instead of below it
+VALUE_FIRST_LABELS = {"net earnings/sale", "net earnings per sale"}
+
+# Lines that are UI chrome, never a title/description/value
+BOILERPLATE = {
+    "promote now",
+    "sales pageaffiliate support page",
+    "sales page",
+    "affiliate support page",
+    "product information",
+    "get more affiliate information on our affiliate site",
+}
+
+_MONEY_RE = re.compile(r"^(?P<pre>[$€£]|usd|eur|gbp)?\s*(?P<num>-?\d[\d,]*(?:\.\d+)?)\s*(?P<post>[$€£]|usd|eur|gbp)?$", re.I)
+_PERCENT_RE = re.compile(r"^(-?\d+(?:[.,]\d+)?)\s*%$")
+_NUMBER_RE = re.compile(r"^-?\d+(?:\.\d+)?$")
+_DATE_FORMATS = ("%m/%d/%Y", "%d.%m.%Y", "%Y-%m-%d", "%b %d, %Y", "%d %b %Y")
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP"}
+
+
+def normalize_label(label):
+    return re.sub(r"\s+", " ", label.replace("*", "").replace("\xa0", " ")).strip().rstrip(":").lower()
+
+
+def parse_money(text):
+    """'$111.14' -> (111.14, 'USD'); returns None when the text isn't an amount."""
+    match = _MONEY_RE.match(text.strip().replace("\xa0", " "))
+    if not match or not (match.group("pre") or match.group("post")):
+        return None
+    symbol = (match.group("pre") or match.group("post")).upper()
+    return float(match.group("num").replace(",", "")), _CURRENCY_SYMBOLS.get(symbol, symbol)
+
+
+def parse_percent(text):
+    """'30.00%' -> 30.0"""
+    match = _PERCENT_RE.match(text.strip())
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def parse_date(text):
+    """'06/28/2022' -> '2022-06-28' (ISO), None if it isn't a date we know."""
+    text = text.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_number(text):
+    text = text.strip().replace(",", "")
+    return float(text) if _NUMBER_RE.match(text) else None
+
+
+def sniff_value_type(text):
+    """Guess the type of a bare value line; None if it doesn't look like a value."""
+    if len(text) > 24 or not any(ch.isdigit() for ch in text):
+        return None
+    if parse_money(text) is not None:
+        return "money"
+    if parse_percent(text) is not None:
+        return "percent"
+    if parse_date(text) is not None:
+        return "date"
+    return None
+
+
+def coerce(value, value_type):
+    """Turn a raw value string into its typed form (falls back to the raw string)."""
+    value = value.strip()
+    if value_type == "money":
+        parsed = parse_money(value)
+        return parsed[0] if parsed else value
+    if value_type == "percent":
+        parsed = parse_percent(value)
+        return parsed if parsed is not None else value
+    if value_type == "date":
+        return parse_date(value) or value
+    if value_type == "number":
+        parsed = parse_number(value)
+        return parsed if parsed is not None else value
+    return value
+
+
+def _load_label_map():
+    labels = dict(KNOWN_LABELS)
+    if LABEL_MAP_PATH.exists():
+        try:
+            with open(LABEL_MAP_PATH, "r", encoding="utf-8") as f:
+                for label, (field, value_type) in json.load(f).items():
+                    labels.setdefault(label, (field, value_type))
+        except (json.JSONDecodeError, ValueError, TypeError):
+            print(f"⚠️ Ignoring unreadable label map: {LABEL_MAP_PATH}")
+    return labels
+
+
+_labels = None
+
+
+def known_labels():
+    global _labels
+    if _labels is None:
+        _labels = _load_label_map()
+    return _labels
+
+
+def parse_card_text(text, labels=None):
+    """
+    Parse one card's innerText into typed fields.
+    Returns (record, unknown) where `unknown` maps unrecognized labels to their raw values.
+    """
+    labels = labels or known_labels()
+    lines = [line.strip() for line in text.replace("\xa0", " ").split("\n")]
+    lines = [line for line in lines if line]
+
+    record = {}
+    unknown = {}
+    consumed = set()
+
+    # Pass 1: known labels (including value-above-label ones) claim their values first
+    for i, line in enumerate(lines):
+        key = normalize_label(line)
+        if key in labels and i not in consumed:
+            field, value_type = labels[key]
+            j = i - 1 if key in VALUE_FIRST_LABELS else i + 1
+            if 0 <= j < len(lines) and j not in consumed:
+                record.setdefault(field, coerce(lines[j], value_type))
+                consumed.update((i, j))
+
+    # Pass 2: "<something>\n<typed value>" pairs we don't know yet
+    for i, line in enumerate(lines[:-1]):
+        key = normalize_label(line)
+        if (
+            i not in consumed
+            and i + 1 not in consumed
+            and key not in BOILERPLATE
+            and len(line) <= 40
+            and sniff_value_type(line) is None
+            and sniff_value_type(lines[i + 1]) is not None
+        ):
+            unknown[key] = lines[i + 1]
+            consumed.update((i, i + 1))
+
+    free_text = [
+        (i, line) for i, line in enumerate(lines)
+        if i not in consumed and normalize_label(line) not in BOILERPLATE
+    ]
+    if free_text:
+        record.setdefault("title", free_text[0][1])
+        # Category badge sits right under the title ("Deliverable", "Supplements - health")
+        if len(free_text) > 1 and free_text[1][0] == free_text[0][0] + 1 and len(free_text[1][1]) <= 40:
+            record.setdefault("category", free_text[1][1])
+            body = free_text[2:]
+        else:
+            body = free_text[1:]
+        description = "\n".join(line for _, line in body)
+        if description:
+            record.setdefault("description", description)
+
+    return record, unknown
+
+
+# One round trip per page: every card's text and links in a single evaluate
+CARD_EXTRACT_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map((card) => {
+    const links = {};
+    for (const a of card.querySelectorAll('a[href]')) {
+        const label = (a.innerText || a.getAttribute('aria-label') || '').trim().toLowerCase();
+        if (label && !(label in links)) links[label] = a.href;
+    }
+    const heading = card.querySelector('h1, h2, h3, h4, [class*="title"]');
+    return {
+        text: card.innerText || '',
+        title: heading ? heading.innerText.trim() : null,
+        links,
+    };
+})
+"""
+
+
+def build_record(raw, labels=None):
+    """Turn one CARD_EXTRACT_JS row into (record, unknown)."""
+    record, unknown = parse_card_text(raw.get("text", ""), labels)
+    if raw.get("title"):
+        record["title"] = raw["title"]
+    links = raw.get("links") or {}
+    if "sales page" in links:
+        record["sales_page_url"] = links["sales page"]
+    if "affiliate support page" in links:
+        record["affiliate_support_url"] = links["affiliate support page"]
+    return record, unknown
+
+
+async def resolve_unknown_labels(unknown_labels, ask):
+    """
+    Ask the model (once per never-seen label) which field each unknown label maps to,
+    and remember the answer in memory/label_map.json for future runs.
+    """
+    from structured_output import query_structured
+
+    labels = known_labels()
+    pending = sorted(label for label in unknown_labels if label not in labels)
+    if not pending:
+        return {}
+
+    examples = "\n".join(f"- {label!r}: example value {unknown_labels[label]!r}" for label in pending)
+    prompt = f"""
+    You are mapping labels from affiliate marketplace product cards to snake_case field names.
+
+    For each label below, return a JSON object mapping the label to an object with:
+    - "field": a short snake_case field name (e.g. "refund_rate", "gravity")
+    - "type": one of "money", "percent", "date", "number", "text"
+
+    Labels:
+    {examples}
+
+    Return only the JSON object.
+    """
+    answer = await query_structured(ask, prompt, schema={label: {"field": str, "type": str} for label in pending}, max_retries=1)
+    if not answer:
+        return {}
+
+    learned = {label: (answer[label]["field"], answer[label]["type"]) for label in pending}
+    labels.update(learned)
+
+    stored = {}
+    if LABEL_MAP_PATH.exists():
+        try:
+            with open(LABEL_MAP_PATH, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except json.JSONDecodeError:
+            stored = {}
+    stored.update({label: list(mapping) for label, mapping in learned.items()})
+    LABEL_MAP_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LABEL_MAP_PATH, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2, ensure_ascii=False)
+    print(f"🏷️ Learned {len(learned)} new card label(s): {', '.join(pending)}")
+    return learned
+
+
+async def extract_cards(page, card_selector, ask=None):
+    """
+    Extract every card on the current page in one in-page pass.
+    If `ask` (an async prompt -> text callable) is given, unknown labels are
+    resolved through it and the affected cards are re-parsed.
+    """
+    rows = await page.evaluate(CARD_EXTRACT_JS, card_selector)
+    parsed = [build_record(row) for row in rows]
+
+    unknown = {}
+    for _, card_unknown in parsed:
+        unknown.update(card_unknown)
+
+    if unknown and ask is not None:
+        learned = await resolve_unknown_labels(unknown, ask)
+        if learned:
+            parsed = [build_record(row) for row in rows]
+
+    records = []
+    for record, card_unknown in parsed:
+        # Anything still unrecognized is kept raw rather than dropped
+        for label, value in card_unknown.items():
+            record.setdefault(label.replace(" ", "_").replace("/", "_per_"), value)
+        records.append(record)
+    return records
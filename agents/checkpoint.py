@@ -0,0 +1,177 @@
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Crash-safe progress for a researcher run, so a `--resume` run picks up where a
+# crash or launch_cycle's timeout left off instead of redoing the cookie dialog,
+# site analysis, login, strategy and every page already scraped.
+#
+# One JSON file per target host, replaced atomically (write temp, fsync, rename):
+# site analysis, site info and selectors once scraping starts, then the current
+# catalog page and how many cards of each page were written, plus the page of
+# each record in file order (run-length encoded: parallel tabs interleave pages
+# in the offers file). Saves are throttled
+# to one per SAVE_INTERVAL seconds (plus one per finished page); the offers file
+# is fsynced first, so the checkpoint never counts records that aren't on disk.
+# On resume the offers file is cut back to the checkpointed count, which drops
+# anything written after the last save instead of duplicating it.
+#
+# The browser session (cookies, localStorage) is saved alongside as Playwright
+# storage state — it holds login cookies; memory/checkpoints/ is git-ignored.
+
+CHECKPOINT_DIR = Path("memory/checkpoints")
+SAVE_INTERVAL = float(os.getenv("HUSTLE_CHECKPOINT_INTERVAL", "1.0"))
+
+RESTORE_STORAGE_JS = """
+(origins) => {
+    const saved = origins.find((o) => o.origin === location.origin);
+    if (!saved) return;
+    for (const { name, value } of saved.localStorage || []) {
+        if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+    }
+}
+"""
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Checkpoint:
+    def __init__(self, target_url, folder=CHECKPOINT_DIR):
+        host = (urlparse(target_url).hostname or "site").replace("www.", "")
+        self.path = Path(folder) / f"{host}.json"
+        self.state_path = Path(folder) / f"{host}.state.json"
+        self.data = {"target_url": target_url, "stage": None, "pages": {}, "offers_written": 0}
+        self.sink = None
+        self._last_save = 0.0
+
+    @classmethod
+    def load(cls, target_url, folder=CHECKPOINT_DIR):
+        """The saved checkpoint for this target, or None if there isn't a usable one."""
+        checkpoint = cls(target_url, folder)
+        try:
+            with open(checkpoint.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("target_url") != target_url or data.get("stage") not in ("scraping", "scraped"):
+            return None
+        checkpoint.data = data
+        return checkpoint
+
+    # — Stages —
+
+    @property
+    def stage(self):
+        return self.data["stage"]
+
+    def __getitem__(self, key):
+        return self.data.get(key)
+
+    async def start_scraping(self, context, site_analysis, site_info, selectors, catalog_url):
+        """Everything needed to skip straight to the catalog next time, plus the session."""
+        self.data.update(
+            stage="scraping", site_analysis=site_analysis, site_info=site_info, selectors=selectors,
+            catalog_url=catalog_url, page_url=catalog_url, page_number=1, pages={}, order=[], offers_written=0,
+        )
+        await self.save_session(context)
+        self.save()
+
+    def finish_scraping(self):
+        self.data["stage"] = "scraped"
+        self.save()
+
+    def clear(self):
+        for path in (self.path, self.state_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    # — Session —
+
+    async def save_session(self, context):
+        _write_atomic(self.state_path, await context.storage_state())
+
+    async def restore_session(self, context):
+        """Put the saved cookies and localStorage back into an existing context."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if state.get("cookies"):
+            await context.add_cookies(state["cookies"])
+        if state.get("origins"):
+            await context.add_init_script(f"({RESTORE_STORAGE_JS})({json.dumps(state['origins'])})")
+        return True
+
+    # — Progress —
+
+    def cards_done(self, page_number):
+        return self.data["pages"].get(str(page_number), 0)
+
+    def card_written(self, page_number):
+        pages = self.data["pages"]
+        pages[str(page_number)] = pages.get(str(page_number), 0) + 1
+        order = self.data.setdefault("order", [])
+        if order and order[-1][0] == page_number:
+            order[-1][1] += 1
+        else:
+            order.append([page_number, 1])
+        self.data["offers_written"] += 1
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+
+    def rewind(self, kept):
+        """
+        The offers file held fewer records than counted: recount each page from the
+        first `kept` records' pages and unmark pages that lost records.
+        """
+        # Checkpoints from before "order" was kept: assume page order
+        order = self.data.get("order") or [[int(n), c] for n, c in sorted(self.data["pages"].items(), key=lambda kv: int(kv[0]))]
+        remaining = kept
+        pages = {}
+        kept_order = []
+        for page_number, count in order:
+            count = min(count, remaining)
+            if not count:
+                break
+            remaining -= count
+            pages[str(page_number)] = pages.get(str(page_number), 0) + count
+            kept_order.append([page_number, count])
+        self.data["finished"] = [
+            n for n in self.data.get("finished", []) if pages.get(str(n), 0) == self.data["pages"].get(str(n))
+        ]
+        self.data.update(pages=pages, order=kept_order, offers_written=kept)
+        self.save()
+
+    def page_reached(self, page_number, page_url):
+        """Serial pagination moved on: this is where a resume restarts."""
+        self.data.update(page_number=page_number, page_url=page_url)
+        self.save()
+
+    def page_finished(self, page_number):
+        self.data.setdefault("finished", [])
+        if page_number not in self.data["finished"]:
+            self.data["finished"].append(page_number)
+        self.save()
+
+    def is_finished(self, page_number):
+        return page_number in self.data.get("finished", [])
+
+    def save(self):
+        if self.sink is not None:
+            self.sink.sync()
+        self.data["updated_at"] = time.time()
+        _write_atomic(self.path, self.data)
+        self._last_save = time.monotonic()
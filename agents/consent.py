@@ -0,0 +1,164 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Consent banners handled before the page renders instead of dismissed after.
+# For each known CMP (consent_registry.json, shared with browser/utils.js) we
+# pre-set its "accepted" cookies on the context, block its script outright
+# where the site works without it, and inject consent_init.js, which hides the
+# banner and clicks "accept all" the moment it is inserted.
+#
+# After each load, settle() switches the injected hide rule off for a moment: a
+# banner that is still visible without it means consent didn't take (cookies
+# ignored, accept button not found). The rule then stays off so the old
+# dismissal can see and click the banner.
+#
+# Each navigation that would have shown a banner is reported with an estimate
+# of the time and GPT calls the old flow spent on it (dismiss_cookie_popup_if_present's
+# clicks and waits, plus html_looks_valid rejecting the overlaid page once).
+#
+#   HUSTLE_CONSENT=0 python agents/researcher.py   # back to the old dismissal
+
+ENABLED = os.getenv("HUSTLE_CONSENT", "1") != "0"
+REGISTRY_PATH = Path(__file__).with_name("consent_registry.json")
+INIT_SCRIPT_PATH = Path(__file__).with_name("consent_init.js")
+
+# Estimated cost of one banner under the old flow (the sum of its fixed waits, not
+# a measurement): accept click + 1s, button loop + 1s, hide check ~0.5s, and one
+# html_looks_valid rejection with its 1.5s retry wait
+EST_SECONDS_PER_BANNER = 4.0
+EST_LLM_CALLS_PER_BANNER = 1
+
+STATE_JS = "() => window.__hustleConsent || null"
+# True if a registered banner shows with our hide rule off; the rule is then left off
+BANNER_SHOWN_JS = """
+(selectors) => {
+    const rule = document.getElementById('__hustle-consent-hide');
+    if (rule && rule.sheet) rule.sheet.disabled = true;
+    const shown = selectors.some((sel) => {
+        const el = document.querySelector(sel);
+        if (!el) return false;
+        const css = getComputedStyle(el);
+        return css.display !== 'none' && css.visibility !== 'hidden' && !!(el.offsetWidth || el.offsetHeight);
+    });
+    if (!shown && rule && rule.sheet) rule.sheet.disabled = false;
+    return shown;
+}
+"""
+
+_registry = None
+
+
+def load_registry():
+    global _registry
+    if _registry is None:
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            _registry = json.load(f)["cmps"]
+    return _registry
+
+
+def init_script(cmps=None):
+    source = INIT_SCRIPT_PATH.read_text(encoding="utf-8").strip()
+    return f"({source})({json.dumps(cmps or load_registry())});"
+
+
+def _cookie_domain(url):
+    host = urlparse(url).hostname or ""
+    labels = host.split(".")
+    return "." + ".".join(labels[-2:]) if len(labels) >= 2 else host
+
+
+def consent_cookies(url, cmps=None):
+    """Cookies that make the registered CMPs treat `url`'s site as already accepted."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    domain = _cookie_domain(url)
+    cookies = []
+    for cmp in cmps or load_registry():
+        for cookie in cmp["cookies"]:
+            cookies.append({
+                "name": cookie["name"],
+                "value": cookie["value"].replace("{now}", now),
+                "domain": domain,
+                "path": "/",
+            })
+    return cookies
+
+
+def block_pattern(cmps=None):
+    hosts = [host for cmp in (cmps or load_registry()) if cmp["block"] for host in cmp["scripts"]]
+    if not hosts:
+        return None
+    return re.compile("|".join(re.escape(host) for host in hosts))
+
+
+class ConsentGuard:
+    def __init__(self, cmps=None):
+        self.cmps = cmps or load_registry()
+        self.pattern = block_pattern(self.cmps)
+        self.blocked = {}       # page -> CMP script requests aborted since its last navigation
+        self.navigations = []   # one report entry per handled main-frame load
+        self._cookie_domains = set()
+
+    async def install(self, context, url=None):
+        """Arm a context: init script, CMP script blocking, and cookies for `url`'s site."""
+        await context.add_init_script(script=init_script(self.cmps))
+        if self.pattern is not None:
+            await context.route(self.pattern, self._block)
+        if url:
+            await self.add_cookies(context, url)
+        return self
+
+    async def add_cookies(self, context, url):
+        domain = _cookie_domain(url)
+        if domain in self._cookie_domains:
+            return
+        self._cookie_domains.add(domain)
+        cookies = consent_cookies(url, self.cmps)
+        if cookies:
+            await context.add_cookies(cookies)
+
+    async def _block(self, route):
+        try:
+            page = route.request.frame.page
+            self.blocked[page] = self.blocked.get(page, 0) + 1
+        except Exception:
+            pass
+        await route.abort()
+
+    async def settle(self, page):
+        """
+        Call after a navigation has loaded. Records what was suppressed and returns
+        False if a registered banner would still show without our hide rule
+        (consent didn't take; the rule is lifted and the caller falls back to clicking).
+        """
+        state = await page.evaluate(STATE_JS) or {}
+        blocked = self.blocked.pop(page, 0)
+        containers = [sel for cmp in self.cmps for sel in cmp["containers"]]
+        still_visible = await page.evaluate(BANNER_SHOWN_JS, containers)
+
+        present = state.get("present", [])
+        if blocked or present:
+            entry = {
+                "url": page.url,
+                "cmps": present,
+                "clicked": state.get("clicked", []),
+                "blocked_requests": blocked,
+                "suppressed": not still_visible,
+            }
+            self.navigations.append(entry)
+            label = ", ".join(present) or "CMP script"
+            if still_visible:
+                print(f"🍪 {label} banner still showing on {page.url} — consent didn't take, falling back to dismissal.")
+            else:
+                print(f"🍪 {label} suppressed before render ({blocked} script(s) blocked, "
+                      f"clicked: {', '.join(entry['clicked']) or 'none'}).")
+        return not still_visible
+
+    def report(self):
+        suppressed = sum(1 for entry in self.navigations if entry["suppressed"])
+        print(f"🍪 Consent: {suppressed}/{len(self.navigations)} banner navigation(s) handled up front — "
+              f"est. ~{suppressed * EST_SECONDS_PER_BANNER:.0f}s and ~{suppressed * EST_LLM_CALLS_PER_BANNER} "
+              f"LLM call(s) saved (at {EST_SECONDS_PER_BANNER:.0f}s per banner under the old flow, not measured).")
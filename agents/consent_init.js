@@ -0,0 +1,52 @@
+// Runs before any page script (Playwright add_init_script / Puppeteer
+// evaluateOnNewDocument) as `(<this function>)(registry.cmps)`.
+// Hides known consent banners as soon as they are inserted and clicks their
+// "accept all" button, recording what it did in window.__hustleConsent.
+(cmps) => {
+  if (window.__hustleConsent) return;
+  const state = window.__hustleConsent = { present: [], clicked: [], hidden: [] };
+  const note = (list, name) => { if (!list.includes(name)) list.push(name); };
+
+  // The hide rule carries an id so ConsentGuard.settle() can switch it off to see
+  // whether a banner would still be showing without it
+  const style = document.createElement('style');
+  style.id = '__hustle-consent-hide';
+  style.textContent = cmps.flatMap((c) => c.containers).join(',') + '{display:none !important;visibility:hidden !important}'
+    + ' html,body{overflow:auto !important}';
+
+  const scan = () => {
+    for (const cmp of cmps) {
+      const scriptSeen = cmp.scripts.some((host) => document.querySelector(`script[src*="${host}"]`));
+      const container = cmp.containers.map((sel) => document.querySelector(sel)).find(Boolean);
+      if (!scriptSeen && !container) continue;
+      note(state.present, cmp.name);
+      if (container) note(state.hidden, cmp.name);
+      if (state.clicked.includes(cmp.name)) continue;
+      for (const sel of cmp.accept) {
+        const button = document.querySelector(sel);
+        if (button) {
+          button.click();
+          note(state.clicked, cmp.name);
+          break;
+        }
+      }
+    }
+  };
+
+  // Banners are injected late; rescan on DOM changes, batched, for the first 15s
+  let queued = false;
+  const queue = () => {
+    if (queued) return;
+    queued = true;
+    setTimeout(() => { queued = false; scan(); }, 50);
+  };
+  const start = () => {
+    (document.head || document.documentElement).appendChild(style);
+    scan();
+    const observer = new MutationObserver(queue);
+    observer.observe(document.documentElement, { childList: true, subtree: true });
+    setTimeout(() => observer.disconnect(), 15000);
+  };
+  if (document.documentElement) start();
+  else document.addEventListener('readystatechange', start, { once: true });
+}
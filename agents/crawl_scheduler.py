@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import replay
+import settings
+from researcher import run_research, REQUIRED_ENV
+
+# Runs the researcher flow for several marketplaces at once on a single Chromium
+# process. Every target gets its own browser context (cookies, login, storage),
+# while a per-domain limiter caps how many targets hit the same site at once and
+# how fast requests go out to it. Idle workers pick up whichever queued target
+# has spare domain capacity, so total wall time tracks the slowest site.
+#
+#   python agents/crawl_scheduler.py https://www.digistore24.com/ https://www.clickbank.com/
+#   python agents/crawl_scheduler.py --resume ...   # continue interrupted targets from their checkpoints
+
+DEFAULT_TARGETS = [
+    "https://www.digistore24.com/",
+]
+
+MAX_WORKERS = int(os.getenv("HUSTLE_CRAWL_WORKERS", "4"))
+PER_DOMAIN_CONCURRENCY = int(os.getenv("HUSTLE_DOMAIN_CONCURRENCY", "1"))
+PER_DOMAIN_RPS = float(os.getenv("HUSTLE_DOMAIN_RPS", "4"))
+
+# Only these request types count against the rate limit; images/fonts/css pass freely
+THROTTLED_RESOURCE_TYPES = {"document", "xhr", "fetch"}
+
+
+def domain_of(url):
+    host = urlparse(url).hostname or ""
+    parts = host.split(".")
+    # digistore24.com and www.digistore24.com share one budget
+    return ".".join(parts[-2:]) if len(parts) >= 2 else host
+
+
+class DomainLimiter:
+    """Per-domain request spacing (requests/sec) shared by every context in the crawl."""
+
+    def __init__(self, rps=PER_DOMAIN_RPS):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next_slot = {}
+        self._locks = {}
+
+    async def wait(self, domain):
+        if not self.interval:
+            return
+        lock = self._locks.setdefault(domain, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def install(self, context):
+        async def throttle(route):
+            request = route.request
+            if request.resource_type in THROTTLED_RESOURCE_TYPES:
+                await self.wait(domain_of(request.url))
+            await route.fallback()
+
+        await context.route("**/*", throttle)
+
+
+class CrawlScheduler:
+    def __init__(self, targets, max_workers=MAX_WORKERS, per_domain_concurrency=PER_DOMAIN_CONCURRENCY, limiter=None,
+                 resume=False):
+        self.pending = deque(targets)
+        self.resume = resume
+        self.max_workers = max(1, min(max_workers, len(targets) or 1))
+        self.per_domain_concurrency = per_domain_concurrency
+        self.limiter = limiter or DomainLimiter()
+        self.active = {}
+        self.results = {}
+        self.timings = {}
+        self._changed = asyncio.Condition()
+
+    def _take_next(self):
+        """Pop the first queued target whose domain has spare capacity."""
+        for _ in range(len(self.pending)):
+            url = self.pending.popleft()
+            domain = domain_of(url)
+            if self.active.get(domain, 0) < self.per_domain_concurrency:
+                self.active[domain] = self.active.get(domain, 0) + 1
+                return url
+            self.pending.append(url)
+        return None
+
+    async def _worker(self, browser, worker_id):
+        while True:
+            async with self._changed:
+                url = self._take_next()
+                while url is None and self.pending:
+                    await self._changed.wait()
+                    url = self._take_next()
+            if url is None:
+                return
+
+            started = time.perf_counter()
+            print(f"🧵 Worker {worker_id} → {url}")
+            context = await browser.new_context(**replay.context_options())
+            try:
+                await replay.attach(context)
+                await self.limiter.install(context)
+                self.results[url] = await run_research(context, url, resume=self.resume) or []
+            except Exception as e:
+                print(f"❌ Crawl of {url} failed: {e}")
+                self.results[url] = []
+            finally:
+                await context.close()
+                self.timings[url] = time.perf_counter() - started
+                async with self._changed:
+                    self.active[domain_of(url)] -= 1
+                    self._changed.notify_all()
+
+    async def run(self, browser):
+        started = time.perf_counter()
+        await asyncio.gather(*(self._worker(browser, i + 1) for i in range(self.max_workers)))
+        total = time.perf_counter() - started
+
+        print("📊 Crawl summary:")
+        for url, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            print(f"   {seconds:6.1f}s  {len(self.results.get(url, []))} offers  {url}")
+        if self.timings:
+            print(f"   wall {total:.1f}s vs {sum(self.timings.values()):.1f}s sequential, slowest site {max(self.timings.values()):.1f}s")
+        return self.results
+
+
+async def crawl(targets=None, **kwargs):
+    from playwright.async_api import async_playwright
+
+    settings.require(*REQUIRED_ENV)
+    targets = targets or DEFAULT_TARGETS
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=replay.is_replaying())
+        try:
+            return await CrawlScheduler(targets, **kwargs).run(browser)
+        finally:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(crawl([a for a in args if a != "--resume"] or None, resume="--resume" in args))
@@ -0,0 +1,178 @@
+import atexit
+import gzip
+import json
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from pathlib import Path
+
+# Debug artifacts (candidate dumps, failure screenshots, full prompts) go through
+# one background writer thread instead of being written inline on the click /
+# LLM path. Callers hand over an already-built object; encoding, compression and
+# disk I/O happen on the thread. If the queue is full the artifact is dropped
+# and counted, never waited for.
+#
+# Each process writes to its own run directory, output/debug/<time>-<pid>/, so
+# concurrent runs no longer overwrite each other's files. Artifacts are numbered
+# in order and listed in the run's index.jsonl (time, level, name, file, size,
+# meta). JSON is written without indentation and gzipped above 4 KB.
+#
+#   HUSTLE_DEBUG          off | error (default) | info | trace
+#   HUSTLE_DEBUG_SAMPLE   share of info/trace artifacts kept (errors always are), default 1.0
+#   HUSTLE_DEBUG_MAX_MB   per-run size cap; the oldest artifacts are rotated out past it
+#   HUSTLE_DEBUG_KEEP_RUNS  run directories kept, oldest pruned at start-up
+
+LEVELS = {"off": 0, "error": 1, "info": 2, "trace": 3}
+LEVEL = LEVELS.get(os.getenv("HUSTLE_DEBUG", "error").lower(), LEVELS["error"])
+SAMPLE = float(os.getenv("HUSTLE_DEBUG_SAMPLE", "1.0"))
+MAX_RUN_BYTES = int(float(os.getenv("HUSTLE_DEBUG_MAX_MB", "100")) * 1024 * 1024)
+KEEP_RUNS = int(os.getenv("HUSTLE_DEBUG_KEEP_RUNS", "20"))
+DEBUG_DIR = Path(os.getenv("HUSTLE_DEBUG_DIR", "output/debug"))
+QUEUE_SIZE = 256
+COMPRESS_ABOVE = 4096
+
+
+def wants(level):
+    """Whether an artifact at `level` would be kept at all; check before building an expensive one."""
+    return LEVELS[level] <= LEVEL
+
+
+class ArtifactWriter:
+    def __init__(self, root=DEBUG_DIR, max_run_bytes=MAX_RUN_BYTES, keep_runs=KEEP_RUNS, sample=SAMPLE):
+        self.root = Path(root)
+        self.run_dir = self.root / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.max_run_bytes = max_run_bytes
+        self.keep_runs = keep_runs
+        self.sample = sample
+        self.written = 0
+        self.bytes = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.rotated = 0
+        self._files = []  # (path, size) in write order, for rotation
+        self._seq = 0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # — Hot path: decide, enqueue, return —
+
+    def put(self, name, data, level="trace", ext=None, meta=None):
+        """Queue one artifact (dict/list → JSON, str → text, bytes → `ext`). Returns whether it was queued."""
+        if not wants(level):
+            return False
+        if level != "error" and self.sample < 1.0 and random.random() >= self.sample:
+            self.sampled_out += 1
+            return False
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debug-artifacts", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((seq, time.time(), level, name, data, ext, meta))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    async def screenshot(self, page, name, level="error", meta=None):
+        """Capture a compact JPEG of `page` (the capture itself needs the page) and queue it."""
+        if not wants(level):
+            return False
+        try:
+            data = await page.screenshot(type="jpeg", quality=60, full_page=True)
+        except Exception as e:
+            print(f"⚠️ Debug screenshot '{name}' failed: {e}")
+            return False
+        return self.put(name, data, level=level, ext="jpg", meta=meta)
+
+    def flush(self, timeout=5.0):
+        """Wait (up to `timeout`) for queued artifacts to reach disk."""
+        deadline = time.monotonic() + timeout
+        while self._thread is not None and self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # — Writer thread —
+
+    def _run(self):
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._prune_runs()
+        index = open(self.run_dir / "index.jsonl", "a", encoding="utf-8")
+        while True:
+            item = self._queue.get()
+            try:
+                entry = self._write(*item)
+                index.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                for removed in self._rotate():
+                    index.write(json.dumps({"rotated_out": removed}) + "\n")
+                index.flush()
+            except Exception as e:
+                print(f"⚠️ Debug artifact '{item[3]}' not written: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, seq, created, level, name, data, ext, meta):
+        if isinstance(data, (bytes, bytearray)):
+            payload, ext = bytes(data), ext or "bin"
+        elif isinstance(data, str):
+            payload, ext = data.encode("utf-8"), ext or "txt"
+        else:
+            payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+            ext = ext or "json"
+        if ext in ("json", "txt") and len(payload) > COMPRESS_ABOVE:
+            payload, ext = gzip.compress(payload, compresslevel=5), ext + ".gz"
+        path = self.run_dir / f"{seq:05d}-{name}.{ext}"
+        path.write_bytes(payload)
+        self._files.append((path, len(payload)))
+        self.written += 1
+        self.bytes += len(payload)
+        return {"seq": seq, "time": round(created, 3), "level": level, "name": name,
+                "file": path.name, "bytes": len(payload), "meta": meta}
+
+    def _rotate(self):
+        removed = []
+        while self.bytes > self.max_run_bytes and len(self._files) > 1:
+            path, size = self._files.pop(0)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self.bytes -= size
+            self.rotated += 1
+            removed.append(path.name)
+        return removed
+
+    def _prune_runs(self):
+        runs = sorted(p for p in self.root.iterdir() if p.is_dir() and p != self.run_dir)
+        for old in runs[: max(0, len(runs) - (self.keep_runs - 1))]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def report(self):
+        if self.written or self.dropped or self.sampled_out:
+            print(f"🪲 Debug artifacts: {self.written} written ({self.bytes / 1024:.0f} KB) to {self.run_dir}, "
+                  f"{self.sampled_out} sampled out, {self.dropped} dropped, {self.rotated} rotated out.")
+
+
+_writer = None
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = ArtifactWriter()
+        atexit.register(_writer.flush)
+    return _writer
+
+
+def dump(name, data, level="trace", meta=None):
+    """Queue a JSON or text artifact. Don't mutate `data` afterwards — it's encoded on the writer thread."""
+    return get_writer().put(name, data, level=level, meta=meta)
+
+
+async def screenshot(page, name, level="error", meta=None):
+    return await get_writer().screenshot(page, name, level=level, meta=meta)
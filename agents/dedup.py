@@ -0,0 +1,148 @@
+import os
+import re
+import zlib
+from urllib.parse import urlparse
+
+# Near-duplicate offer clustering (MinHash + LSH), run before enrichment and
+# the builder so each product family gets one GPT content kit instead of one
+# per bundle, vendor or rebrand. Every offer is shingled (title character
+# n-grams, description word n-grams, sales URL host and path), signed with
+# NUM_PERM min-hashes, and bucketed by LSH bands; only offers sharing a bucket
+# are compared, so clustering stays roughly linear in the catalog size.
+#
+#   HUSTLE_DEDUP=0 disables it; HUSTLE_DEDUP_THRESHOLD sets the Jaccard cut-off.
+
+ENABLED = os.getenv("HUSTLE_DEDUP", "1") != "0"
+SIMILARITY_THRESHOLD = float(os.getenv("HUSTLE_DEDUP_THRESHOLD", "0.6"))
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: candidates from ~0.4 Jaccard, verified against the threshold
+TITLE_NGRAM = 5
+DESCRIPTION_NGRAM = 3
+_PRIME = (1 << 61) - 1
+_SEED = 42
+
+# Fields compared for the per-member delta shared alongside the representative's kit
+DELTA_FIELDS = [
+    "title", "name", "vendor", "price", "commission", "earnings_per_cart_visitor", "net_earnings_per_sale",
+    "cart_conversion", "cancellation_rate", "promotion_link", "sales_page_url", "url", "category",
+]
+
+_TITLE_NOISE = re.compile(r"\|.*$|\bearn \d+% commission promoting\b|\b(v\.?\s?\d+|#\d+)\b")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _title(offer):
+    return offer.get("title") or offer.get("name") or ""
+
+
+def shingles(offer):
+    """The set of shingles one offer is compared on."""
+    found = set()
+    title = _NON_WORD.sub(" ", _TITLE_NOISE.sub(" ", _title(offer).lower())).strip()
+    padded = f" {title} "
+    for i in range(max(1, len(padded) - TITLE_NGRAM + 1)):
+        found.add("t:" + padded[i:i + TITLE_NGRAM])
+
+    description = str(offer.get("description") or "")
+    if description.strip().upper() not in ("", "N/A"):
+        words = _NON_WORD.sub(" ", description.lower()).split()
+        for i in range(max(1, len(words) - DESCRIPTION_NGRAM + 1)):
+            found.add("d:" + " ".join(words[i:i + DESCRIPTION_NGRAM]))
+
+    url = offer.get("sales_page_url") or offer.get("url") or ""
+    if url:
+        parts = urlparse(url)
+        found.add("u:" + (parts.hostname or "").replace("www.", ""))
+        found.update("u:" + segment.lower() for segment in parts.path.split("/") if segment)
+    return found
+
+
+def _permutations():
+    import numpy as np
+
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+def signatures(offers):
+    """(len(offers), NUM_PERM) MinHash signature matrix."""
+    import numpy as np
+
+    a, b = _permutations()
+    # 32-bit shingle hashes keep a*x+b inside uint64 before the modulo
+    a = a >> np.uint64(32)
+    matrix = np.full((len(offers), NUM_PERM), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for row, offer in enumerate(offers):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(offer)), dtype=np.uint64)
+        if hashes.size:
+            matrix[row] = ((hashes[:, None] * a[None, :] + b[None, :]) % np.uint64(_PRIME)).min(axis=0)
+    return matrix
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_offers(offers, threshold=SIMILARITY_THRESHOLD):
+    """
+    Group near-duplicate offers. Returns lists of indices into `offers`, each
+    ordered with its representative first (highest score, then most fields,
+    then input order), clusters in the order of their representatives.
+    """
+    if not offers:
+        return []
+    sig = signatures(offers)
+    rows = NUM_PERM // BANDS
+    parent = list(range(len(offers)))
+
+    for band in range(BANDS):
+        buckets = {}
+        for i, key in enumerate(map(bytes, sig[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            for other in members[1:]:
+                first, second = _find(parent, members[0]), _find(parent, other)
+                if first == second:
+                    continue
+                # Verify the LSH candidate on the full signature before merging
+                if (sig[members[0]] == sig[other]).mean() >= threshold:
+                    parent[second] = first
+
+    groups = {}
+    for i in range(len(offers)):
+        groups.setdefault(_find(parent, i), []).append(i)
+
+    def rank_key(i):
+        offer = offers[i]
+        return (-float(offer.get("score") or 0), -sum(1 for v in offer.values() if v not in (None, "")), i)
+
+    clusters = [sorted(members, key=rank_key) for members in groups.values()]
+    clusters.sort(key=lambda members: members[0])
+    return clusters
+
+
+def offer_delta(representative, member):
+    """Fields where `member` differs from the offer whose content it reuses."""
+    return {
+        field: member.get(field)
+        for field in DELTA_FIELDS
+        if member.get(field) not in (None, "") and member.get(field) != representative.get(field)
+    }
+
+
+def report(clusters, label="enrichment"):
+    """Print cluster stats; returns the number of LLM calls avoided (one per non-representative)."""
+    total = sum(len(c) for c in clusters)
+    shared = [c for c in clusters if len(c) > 1]
+    avoided = total - len(clusters)
+    largest = max((len(c) for c in clusters), default=0)
+    print(
+        f"🧬 Dedup ({label}): {total} offers → {len(clusters)} clusters, {len(shared)} with near-duplicates "
+        f"(largest {largest}); {avoided} LLM call(s) avoided."
+    )
+    return avoided
@@ -0,0 +1,194 @@
+# Incremental page snapshots for lookups that follow an in-page interaction
+# (login link → modal, iframe or inline form). Before the click, arm() notes
+# which elements are visible and installs a MutationObserver that records added
+# subtrees and elements whose class/style/hidden/aria-hidden/open changed.
+# collect() afterwards keeps the added subtrees plus elements that went from
+# hidden to visible — the changed element itself, or, when an already visible
+# one changed (body.modal-open), whatever it revealed below it — and returns
+# just those subtrees, serialized in-page without scripts, styles, SVG
+# or inline handlers, plus a one-paragraph summary of the unchanged rest — so
+# the prompt is the modal itself, not 7000 chars of page in which the modal
+# was the part that got cut off.
+#
+# A full navigation drops the observer; collect() then returns None and the
+# caller falls back to the whole page.
+
+MAX_FRAGMENT_CHARS = 4000
+MAX_DELTA_CHARS = 7000
+# Past this share of the page the "delta" is really a new page
+MAX_CHANGED_SHARE = 0.6
+
+ARM_JS = """
+() => {
+    if (window.__hustleDelta) window.__hustleDelta.observer.disconnect();
+    const shown = (el) => el.checkVisibility
+        ? el.checkVisibility({ visibilityProperty: true })
+        : el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+    const state = { added: new Set(), touched: new Set(), wasVisible: new WeakSet(), text: 0 };
+    for (const el of document.querySelectorAll('*')) if (shown(el)) state.wasVisible.add(el);
+    state.observer = new MutationObserver((records) => {
+        for (const r of records) {
+            if (r.type === 'childList') {
+                for (const node of r.addedNodes) {
+                    if (node.nodeType === 1) state.added.add(node);
+                    else if (node.nodeType === 3 && r.target.nodeType === 1) state.text++;
+                }
+            } else if (r.type === 'attributes' && r.target.nodeType === 1) {
+                state.touched.add(r.target);
+            } else if (r.type === 'characterData') {
+                state.text++;
+            }
+        }
+    });
+    state.observer.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true,
+        attributes: true, attributeFilter: ['class', 'style', 'hidden', 'aria-hidden', 'aria-expanded', 'open'],
+    });
+    window.__hustleDelta = state;
+    return true;
+}
+"""
+
+COLLECT_JS = """
+([maxFragment]) => {
+    const state = window.__hustleDelta;
+    if (!state) return null;
+    state.observer.disconnect();
+    delete window.__hustleDelta;
+
+    const visible = (el) => {
+        const r = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        return r.width > 1 && r.height > 1 && style.visibility !== 'hidden' && style.display !== 'none';
+    };
+    // Attribute changes only count where something went from hidden to visible
+    const revealed = new Set();
+    for (const el of state.touched) {
+        if (!el.isConnected) continue;
+        if (!state.wasVisible.has(el)) {
+            revealed.add(el);
+            continue;
+        }
+        for (const inner of el.querySelectorAll('*')) {
+            if (!state.wasVisible.has(inner)) revealed.add(inner);
+        }
+    }
+    const pageRoots = [document.documentElement, document.body];
+    const changed = [...state.added, ...revealed].filter((el) =>
+        el.isConnected && !pageRoots.includes(el) && !['SCRIPT', 'STYLE', 'LINK', 'META', 'NOSCRIPT'].includes(el.tagName) && visible(el));
+    // Keep only the outermost changed elements
+    const set = new Set(changed);
+    const roots = changed.filter((el) => {
+        for (let p = el.parentElement; p; p = p.parentElement) if (set.has(p)) return false;
+        return true;
+    });
+    roots.sort((a, b) => (a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1));
+
+    const KEEP = /^(id|class|name|type|role|href|src|title|alt|value|placeholder|for|action|method|aria-label|aria-modal|data-testid)$/;
+    const serialize = (el) => {
+        const clone = el.cloneNode(true);
+        clone.querySelectorAll('script, style, svg, noscript, link, meta').forEach((n) => n.remove());
+        for (const node of [clone, ...clone.querySelectorAll('*')]) {
+            for (const attr of [...node.attributes]) {
+                if (!KEEP.test(attr.name) || attr.value.startsWith('data:')) node.removeAttribute(attr.name);
+            }
+        }
+        const html = clone.outerHTML.replace(/\\s{2,}/g, ' ');
+        return html.length > maxFragment ? html.slice(0, maxFragment) + ' …' : html;
+    };
+    const path = (el) => {
+        const parts = [];
+        for (let p = el; p && p !== document.body && parts.length < 4; p = p.parentElement) {
+            parts.unshift(p.tagName.toLowerCase() + (p.id ? '#' + p.id : ''));
+        }
+        return parts.join(' > ');
+    };
+
+    const pageChars = document.body ? document.body.innerText.length : 0;
+    const changedChars = roots.reduce((n, el) => n + (el.innerText || '').length, 0);
+    const headings = [...document.querySelectorAll('h1, h2, h3')].filter(visible)
+        .map((h) => h.innerText.trim()).filter(Boolean).slice(0, 6);
+    return {
+        url: location.href,
+        title: document.title,
+        headings,
+        counts: {
+            forms: document.forms.length,
+            inputs: document.querySelectorAll('input, select, textarea').length,
+            links: document.links.length,
+            buttons: document.querySelectorAll('button, [role=button]').length,
+            iframes: document.querySelectorAll('iframe').length,
+        },
+        fragments: roots.map((el) => ({ path: path(el), html: serialize(el) })),
+        text_mutations: state.text,
+        changed_share: pageChars ? changedChars / pageChars : 1,
+    };
+}
+"""
+
+
+class PageDelta:
+    """What an interaction changed: the changed subtrees and a summary of the rest."""
+
+    def __init__(self, data):
+        self.url = data["url"]
+        self.title = data["title"]
+        self.headings = data["headings"]
+        self.counts = data["counts"]
+        self.fragments = data["fragments"]
+        self.changed_share = data["changed_share"]
+
+    @property
+    def usable(self):
+        return bool(self.fragments) and self.changed_share <= MAX_CHANGED_SHARE
+
+    def summary(self):
+        counts = ", ".join(f"{n} {kind}" for kind, n in self.counts.items() if n)
+        headings = "; ".join(self.headings) or "none"
+        return f'Page "{self.title}" at {self.url} (headings: {headings}; {counts}).'
+
+    def html(self, limit=MAX_DELTA_CHARS):
+        """Changed subtrees, each labelled with where it sits in the page, up to `limit` chars."""
+        parts = []
+        used = 0
+        for fragment in self.fragments:
+            part = f"<!-- in {fragment['path']} -->\n{fragment['html']}"
+            if used + len(part) > limit and parts:
+                break
+            parts.append(part[:limit])
+            used += len(part)
+        return "\n".join(parts)
+
+
+class DomDelta:
+    def __init__(self):
+        self.snapshots = 0
+        self.fallbacks = 0
+        self.delta_chars = 0
+
+    async def arm(self, page):
+        """Start recording mutations on `page`; call right before the interaction."""
+        try:
+            await page.evaluate(ARM_JS)
+        except Exception as e:
+            print(f"⚠️ Could not arm DOM observer: {e}")
+
+    async def collect(self, page):
+        """The recorded PageDelta, or None if the page navigated or the change is too broad."""
+        try:
+            data = await page.evaluate(COLLECT_JS, [MAX_FRAGMENT_CHARS])
+        except Exception:
+            data = None
+        delta = PageDelta(data) if data else None
+        if delta is None or not delta.usable:
+            self.fallbacks += 1
+            return None
+        self.snapshots += 1
+        self.delta_chars += len(delta.html())
+        print(f"🔬 Interaction changed {len(delta.fragments)} subtree(s); prompting with {len(delta.html())} chars instead of the page.")
+        return delta
+
+    def report(self):
+        if self.snapshots or self.fallbacks:
+            avg = self.delta_chars / self.snapshots if self.snapshots else 0
+            print(f"🔬 DOM deltas: {self.snapshots} incremental snapshot(s) (avg {avg:.0f} chars), {self.fallbacks} full-page fallback(s).")
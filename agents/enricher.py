@@ -1,20 +1,172 @@
 import os
+import re
 import json
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
+import shutil
+import time
+from collections import Counter
 from pathlib import Path
+import dedup
+import niche_templates
+from ai_locator import ask_for
+from offer import Offer
+from model_router import get_router
+import replay
 
-load_dotenv()
+OUTPUT_DIR = Path("output")
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The six files the prompt asks for, in the order the model writes them
+SECTION_FILES = [
+    "product_summary.txt",
+    "hooks.txt",
+    "scripts.txt",
+    "hashtag_sets.txt",
+    "angle_breakdown.txt",
+    "cta_templates.txt",
+]
+_SECTION_TITLES = {name[:-4].replace("_", " "): name for name in SECTION_FILES}
+_HEADER_NOISE = re.compile(r"^[\s#*`>\-–—\d.)]*|[\s#*`:\-–—]*$")
+
+
+def match_section_header(line):
+    """Return the section file a header line introduces, or None for body text."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80:
+        return None
+    lowered = stripped.lower()
+    for name in SECTION_FILES:
+        if name in lowered:
+            return name
+    title = _HEADER_NOISE.sub("", lowered).strip()
+    return _SECTION_TITLES.get(title)
+
+
+class ContentKitWriter:
+    """
+    Incrementally splits a streamed content kit into its section files.
+    Only the section currently being written is held in memory; each one is
+    flushed to disk as soon as the next header (or the end of the stream) arrives.
+    """
+
+    def __init__(self, folder, on_event=None):
+        self.folder = Path(folder)
+        self.on_event = on_event or _print_event
+        self.written = {}
+        self._pending = ""
+        self._section = None
+        self._lines = []
+        self._preamble = []
+
+    def feed(self, chunk):
+        self._pending += chunk
+        *complete, self._pending = self._pending.split("\n")
+        for line in complete:
+            self._handle_line(line)
+
+    def close(self):
+        """Stream finished normally: flush the trailing partial line and last section."""
+        if self._pending:
+            self._handle_line(self._pending)
+            self._pending = ""
+        self._finish_section()
+        if not self.written and self._preamble:
+            # Model ignored the section headers — keep everything as one kit like before
+            self._section = "content_kit.txt"
+            self._lines = self._preamble
+            self._finish_section()
+        self.on_event({"event": "done", "sections": list(self.written)})
+        return self.written
+
+    def abort(self, error):
+        """Stream dropped: keep completed sections, discard the half-written one."""
+        if self._section:
+            self.on_event({"event": "section_dropped", "section": self._section, "error": str(error)})
+        self._section = None
+        self._lines = []
+        self.on_event({"event": "aborted", "sections": list(self.written), "error": str(error)})
+        return self.written
+
+    def _handle_line(self, line):
+        header = match_section_header(line)
+        if header and header not in self.written and header != self._section:
+            self._finish_section()
+            self._section = header
+            self._lines = []
+            self._preamble = []
+            self.on_event({"event": "section_started", "section": header})
+        elif self._section:
+            self._lines.append(line)
+        elif not self.written:
+            self._preamble.append(line)
+
+    def _finish_section(self):
+        if not self._section:
+            return
+        text = "\n".join(self._lines).strip()
+        path = self.folder / self._section
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        os.replace(tmp_path, path)
+        self.written[self._section] = str(path)
+        self.on_event({"event": "section_completed", "section": self._section, "path": str(path), "chars": len(text)})
+        self._section = None
+        self._lines = []
+
+
+def _print_event(event):
+    kind = event["event"]
+    if kind == "section_completed":
+        print(f"  📄 {event['section']} ready ({event['chars']} chars)")
+    elif kind == "section_dropped":
+        print(f"  ⚠️ Connection dropped while writing {event['section']}: {event['error']}")
+    elif kind == "aborted":
+        print(f"  ⚠️ Kept {len(event['sections'])} completed section(s) after stream error.")
 
-OUTPUT_DIR = Path("output")
-OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Helper: Query GPT for enrichment
-async def enrich_offer(offer):
-    # Format the dynamic offer data into a readable block
-    formatted_fields = "\n".join([f"{k.replace('_', ' ').title()}: {v}" for k, v in offer.items() if v.strip()])
+# Helper: Stream one kit prompt into `folder`, each finished section written to disk as it completes
+async def _stream_kit(prompt, folder, route, on_event=None, on_usage=None):
+    writer = ContentKitWriter(folder, on_event=on_event)
+
+    if replay.is_replaying():
+        recorded = replay.lookup(prompt)[1]
+        if recorded is None:
+            return None
+        writer.feed(recorded)
+        return writer.close()
+
+    # Full text is only kept around when we're recording a fixture cassette
+    recording = [] if replay.record_dir() else None
+    try:
+        async for delta in get_router().stream(prompt, task="creative", route=route, temperature=0.4, on_usage=on_usage):
+            writer.feed(delta)
+            if recording is not None:
+                recording.append(delta)
+    except Exception as e:
+        print(f"OpenAI Error: {e}")
+        written = writer.abort(e)
+        return written or None
+
+    written = writer.close()
+    if recording is not None:
+        replay.record(prompt, "".join(recording).strip())
+    return written
+
+
+# Helper: Query GPT for enrichment; with a niche template only the offer-specific part is generated
+async def enrich_offer(offer, folder, on_event=None, template=None, stats=None):
+    # Format the dynamic offer data into a readable block (numbers come back with their units)
+    offer = Offer.from_dict(offer)
+    formatted_fields = offer.prompt_fields()
+    usage = []  # the stream's reported token usage, for the template stats
+    if template is not None:
+        started = time.perf_counter()
+        written = await _stream_kit(_offer_prompt(formatted_fields, template), folder, "content_kit_offer", on_event,
+                                    on_usage=usage.append)
+        if written:
+            niche_templates.merge(template, folder, written, product=offer.label)
+            if stats is not None:
+                stats.offer_done(template, usage[0] if usage else None, time.perf_counter() - started)
+        return written
 
     prompt = f"""
     You are an expert in content creation and digital marketing. The following item is a product or service scraped from a public marketplace or website.
@@ -36,46 +188,164 @@ async def enrich_offer(offer):
     - `angle_breakdown.txt` – detailed content angles that can be reused across videos
     - `cta_templates.txt` – best performing CTA variations for this product category
 
-    Only generate clean and ready-to-save content. Do not output JSON, markdown, or explanations. Each section should be clearly labeled with a header and followed by the content.
+    Only generate clean and ready-to-save content. Do not output JSON, markdown, or explanations. Each section should be clearly labeled with a header line containing just its file name (e.g. `hooks.txt`) and followed by the content.
 
     Here is the raw product data:
 
     {formatted_fields}
     """
 
-    try:
-        response = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"OpenAI Error: {e}")
-        return None
+    started = time.perf_counter()
+    written = await _stream_kit(prompt, folder, "content_kit", on_event, on_usage=usage.append)
+    if written and stats is not None:
+        stats.offer_done(None, usage[0] if usage else None, time.perf_counter() - started)
+    return written
+
+
+def _template_prompt(niche, examples):
+    products = "\n".join(f"- {offer.label}: {str(offer.description or '')[:200]}" for offer in examples)
+    return f"""
+    You are an expert in content creation and digital marketing. You are preparing shared material for promoting affiliate products in the "{niche}" niche on TikTok and Instagram.
+
+    Example products from this niche:
+    {products}
+
+    Based on what currently works for this niche (hooks, content angles, CTA structures, hashtags) and what should be avoided, write these files. They must apply to any product in the niche, so don't name a specific product:
+
+    - `angle_breakdown.txt` – detailed content angles that can be reused across videos, and what to avoid in this niche
+    - `hashtag_sets.txt` – 2 hashtag clusters (broad, niche)
+    - `cta_templates.txt` – best performing CTA variations for this niche, with [PRODUCT] where the product name goes
+
+    Only generate clean and ready-to-save content. Do not output JSON, markdown, or explanations. Each section should be clearly labeled with a header line containing just its file name (e.g. `hashtag_sets.txt`) and followed by the content.
+    """
+
+
+def _offer_prompt(formatted_fields, template):
+    return f"""
+    You are an expert in content creation and digital marketing. The following item is a product or service scraped from a public marketplace or website, in the "{template.niche}" niche.
+
+    These content angles already work for the niche:
+
+    {template.context()}
+
+    Using those angles where they fit, generate the parts of the content kit that are specific to this product:
+
+    - `product_summary.txt` – clear overview, audience fit, competitive edge
+    - `hooks.txt` – 10 viral TikTok/Instagram hook examples
+    - `scripts.txt` – 5 short-form video scripts optimized for Reels/Shorts
+    - `angle_breakdown.txt` – only 2-3 angles unique to this product (the niche angles are already covered)
+    - `hashtag_sets.txt` – only one branded hashtag cluster for this product
+    - `cta_templates.txt` – only 3 CTAs that use this product's name or offer
+
+    Only generate clean and ready-to-save content. Do not output JSON, markdown, or explanations. Each section should be clearly labeled with a header line containing just its file name (e.g. `hooks.txt`) and followed by the content.
+
+    Here is the raw product data:
+
+    {formatted_fields}
+    """
+
+
+async def niche_template(niche, examples, on_event=None, on_usage=None):
+    """Generate and cache the shared sections for `niche`; None if the stream didn't produce all of them."""
+    print(f"🧩 Building niche template: {niche}")
+    written = await _stream_kit(_template_prompt(niche, examples), niche_templates.folder_for(niche), "niche_template",
+                                on_event, on_usage=on_usage)
+    return niche_templates.save(niche, written or {})
+
+
+def _offer_folder(offer):
+    safe_title = offer.label.strip().replace("/", "-").replace("\\", "-")[:50]
+    folder = OUTPUT_DIR / safe_title
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def share_content_kit(written, representative, member, folder):
+    """Give a near-duplicate the representative's kit plus a small delta file, no GPT call."""
+    copied = {}
+    for section, path in (written or {}).items():
+        target = folder / Path(path).name
+        if Path(path).resolve() != target.resolve():  # same title, same folder
+            shutil.copyfile(path, target)
+        copied[section] = str(target)
+    delta = {"shared_from": representative.label, "differences": dedup.offer_delta(representative, member)}
+    with open(folder / "offer_delta.json", "w", encoding="utf-8") as f:
+        json.dump(delta, f, indent=2, ensure_ascii=False)
+    return copied
+
+
+async def _plan_niches(offers, clusters):
+    """(representative index -> niche for offers that get a shared template, niche -> cached template or None)."""
+    representatives = [offers[cluster[0]] for cluster in clusters]
+    niches = await niche_templates.detect_niches(
+        representatives, ask=ask_for("classification", "niche_detect", {"niches": [str]})
+    )
+    # Recorded per offer (classifier answers included) so the builder picks the same template
+    niche_templates.remember_niches(
+        [offers[index] for cluster in clusters for index in cluster],
+        [niche for cluster, niche in zip(clusters, niches) for _ in cluster],
+    )
+    counts = Counter(niche for niche in niches if niche)
+    cached = {niche: niche_templates.load(niche) for niche in counts}
+    return {
+        cluster[0]: niche for cluster, niche in zip(clusters, niches)
+        if niche and (counts[niche] >= niche_templates.MIN_OFFERS or cached[niche] is not None)
+    }, cached
 
 
 # Main enrichment entrypoint
-def enrich_offers(offers):
+async def enrich_offers(offers, on_event=None):
+    offers = [Offer.from_dict(offer) for offer in offers]
     enriched = []
-    for offer in offers:
-        safe_title = offer['title'].strip().replace("/", "-").replace("\\", "-")[:50]
-        folder = OUTPUT_DIR / safe_title
-        folder.mkdir(exist_ok=True)
-
-        print(f"✨ Enriching: {offer['title']}")
-        import asyncio
-        enriched_data = asyncio.run(enrich_offer(offer))
-
-        if enriched_data:
-            # Save entire content kit as one file, then split if needed
-            full_output_path = folder / "content_kit.txt"
-            with open(full_output_path, "w", encoding="utf-8") as f:
-                f.write(enriched_data)
-            print(f"✅ Saved content kit for '{offer['title']}'")
+    clusters = dedup.cluster_offers(offers) if dedup.ENABLED else [[i] for i in range(len(offers))]
+    if dedup.ENABLED:
+        dedup.report(clusters, "enrichment")
+
+    stats = niche_templates.TemplateStats()
+    plan, templates = await _plan_niches(offers, clusters) if niche_templates.ENABLED else ({}, {})
+
+    for cluster in clusters:
+        offer = offers[cluster[0]]
+        folder = _offer_folder(offer)
+
+        template = None
+        niche = plan.get(cluster[0])
+        if niche is not None:
+            if templates[niche] is None and niche not in stats.generated:
+                # Built on the niche's first offer; a failed build leaves the niche on full kits
+                examples = [offers[i] for i, n in plan.items() if n == niche][:3]
+                usage = []
+                templates[niche] = await niche_template(niche, examples, on_event=on_event, on_usage=usage.append)
+                stats.template_built(niche, templates[niche], usage[0] if usage else None)
+            elif templates[niche] is not None and niche not in stats.generated:
+                stats.reused.add(niche)
+            template = templates[niche]
+
+        print(f"✨ Enriching: {offer.label}" + (f" (niche: {niche})" if template is not None else ""))
+        written = await enrich_offer(offer, folder, on_event=on_event, template=template, stats=stats)
+
+        if written:
+            print(f"✅ Saved {len(written)}/{len(SECTION_FILES)} content kit files for '{offer.label}'")
         else:
-            print(f"❌ Skipped '{offer['title']}' due to enrichment failure.")
+            print(f"❌ Skipped '{offer.label}' due to enrichment failure.")
+
+        enriched.append({"title": offer.label, "folder": str(folder), "files": sorted(written or {}), "niche": niche})
 
-        enriched.append({"title": offer['title'], "folder": str(folder)})
+        for index in cluster[1:]:
+            member = offers[index]
+            member_folder = _offer_folder(member)
+            if member_folder == folder:
+                continue  # exact duplicate listing, already in the representative's folder
+            shared = share_content_kit(written, offer, member, member_folder) if written else {}
+            if not shared:
+                print(f"❌ Skipped near-duplicate '{member.label}': no content kit from '{offer.label}' to reuse.")
+                enriched.append({"title": member.label, "folder": str(member_folder), "files": [], "niche": niche})
+                continue
+            print(f"♻️ Reused content kit of '{offer.label}' for near-duplicate '{member.label}'")
+            enriched.append({
+                "title": member.label, "folder": str(member_folder), "files": sorted(shared),
+                "shared_from": offer.label, "niche": niche,
+            })
 
+    stats.report()
     return enriched
@@ -1,9 +1,13 @@
+import os
 import sys
-import openai
+from openai import OpenAI
+from model_router import model_for
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 error_input = sys.argv[1]
+# Optional: callers asking for several candidate patches vary the temperature
+temperature = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
 
 prompt = f"""
 You're an expert Python and Playwright developer working inside a self-improving AI system called HustleAI.
@@ -24,10 +28,10 @@ ERROR:
 {error_input}
 """
 
-response = openai.ChatCompletion.create(
-    model="gpt-4",
+response = client.chat.completions.create(
+    model=model_for("code"),
     messages=[{"role": "user", "content": prompt}],
-    temperature=0.3
+    temperature=temperature
 )
 
 fixed_code = response.choices[0].message.content.strip()
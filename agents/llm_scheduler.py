@@ -0,0 +1,177 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+
+# One queue in front of every model call in the process. Interactive calls
+# (selector/locator lookups, vision clicks — a live page is waiting on them) are
+# always dispatched before bulk generation (content kits, bundles), and both
+# share requests-per-minute and tokens-per-minute budgets over a sliding
+# 60s window. While interactive calls are queued or were granted in the last
+# INTERACTIVE_GRACE_S, bulk work may only use the budget up to BULK_SHARE, so a
+# burst of enrichment can't starve the scraper into 429s. When no interactive
+# work is around, bulk can use the whole budget.
+#
+#   HUSTLE_LLM_RPM / HUSTLE_LLM_TPM set the budgets (your API tier's limits).
+
+RPM = int(os.getenv("HUSTLE_LLM_RPM", "500"))
+TPM = int(os.getenv("HUSTLE_LLM_TPM", "150000"))
+BULK_SHARE = float(os.getenv("HUSTLE_LLM_BULK_SHARE", "0.8"))
+WINDOW_S = 60.0
+INTERACTIVE_GRACE_S = 10.0  # interactive lookups come in bursts; keep headroom between them
+
+PRIORITIES = {"interactive": 0, "bulk": 1}
+TASK_PRIORITIES = {
+    "classification": "interactive",
+    "selector": "interactive",
+    "structured": "interactive",
+    "vision": "interactive",
+    "creative": "bulk",
+    "code": "bulk",
+}
+# Expected completion size per task, added to the prompt estimate until real usage is known
+COMPLETION_TOKENS = {"classification": 30, "selector": 60, "structured": 400, "vision": 100, "creative": 2500, "code": 3000}
+IMAGE_TOKENS = 1105  # a high-detail 1024px screenshot
+
+
+def priority_for(task):
+    return TASK_PRIORITIES.get(task, "bulk")
+
+
+def estimate_tokens(prompt, task=None, images=0):
+    return len(prompt) // 4 + images * IMAGE_TOKENS + COMPLETION_TOKENS.get(task, 500)
+
+
+class Grant:
+    """
+    One admitted call's footprint in the window; settle() swaps the estimate for
+    real usage, release() drops it for a call that failed before using any tokens.
+    """
+
+    def __init__(self, scheduler, tokens):
+        self.scheduler = scheduler
+        self.entry = [time.monotonic(), tokens, True]  # started, tokens, still in the window
+
+    def settle(self, usage):
+        total = getattr(usage, "total_tokens", None) or (
+            (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+        )
+        if total:
+            self.set_tokens(total)
+
+    def release(self):
+        self.set_tokens(0)  # still counts as a request
+
+    def set_tokens(self, tokens):
+        # Once the entry has aged out of the window its tokens are no longer in _tokens_used
+        if self.entry[2]:
+            self.scheduler._tokens_used += tokens - self.entry[1]
+        self.entry[1] = tokens
+
+
+class LLMScheduler:
+    def __init__(self, rpm=RPM, tpm=TPM, bulk_share=BULK_SHARE, window_s=WINDOW_S, prioritize=True):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.bulk_share = bulk_share
+        self.window_s = window_s
+        self.prioritize = prioritize  # False: plain FIFO, for comparison
+        self._window = deque()   # [started, tokens, live] per admitted call
+        self._tokens_used = 0
+        self._queue = []         # (priority rank, seq, waiter)
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._last_interactive = None
+        self._wake = None
+        self.waits = {name: [] for name in PRIORITIES}
+
+    def _prune(self, now):
+        while self._window and now - self._window[0][0] >= self.window_s:
+            entry = self._window.popleft()
+            entry[2] = False
+            self._tokens_used -= entry[1]
+
+    def _interactive_active(self, now):
+        if any(item[2]["priority"] == "interactive" for item in self._queue):
+            return True
+        return self._last_interactive is not None and now - self._last_interactive < INTERACTIVE_GRACE_S
+
+    def _fits(self, priority, tokens, now):
+        share = self.bulk_share if priority == "bulk" and self._interactive_active(now) else 1.0
+        if len(self._window) + 1 > self.rpm * share:
+            return False
+        # A single oversized request is let through on an otherwise empty window
+        return self._tokens_used + tokens <= self.tpm * share or not self._window
+
+    def _retry_in(self, now):
+        if self._paused_until > now:
+            return self._paused_until - now
+        return max(0.05, self.window_s - (now - self._window[0][0])) if self._window else 0.05
+
+    async def acquire(self, priority, tokens):
+        """Wait for a slot; returns a Grant. Interactive waiters always go first."""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        waiter = {"priority": priority, "tokens": tokens}
+        heapq.heappush(self._queue, (PRIORITIES[priority] if self.prioritize else 0, next(self._seq), waiter))
+        queued = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                head = self._queue[0][2]
+                if head is waiter and now >= self._paused_until and self._fits(priority, tokens, now):
+                    heapq.heappop(self._queue)
+                    grant = Grant(self, tokens)
+                    self._window.append(grant.entry)
+                    self._tokens_used += tokens
+                    self.waits[priority].append(now - queued)
+                    if priority == "interactive":
+                        self._last_interactive = now
+                    self._wake.set()  # let the next in line re-check
+                    return grant
+                self._wake.clear()
+                timeout = self._retry_in(now) if head is waiter else None
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._queue = [item for item in self._queue if item[2] is not waiter]
+            heapq.heapify(self._queue)
+            self._wake.set()
+            raise
+
+    def backoff(self, seconds):
+        """Hold every class after a 429 (Retry-After)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        print(f"⏸️ Rate limited — pausing model calls for {seconds:.1f}s")
+
+    def report(self):
+        parts = []
+        for name, waits in self.waits.items():
+            if not waits:
+                continue
+            ordered = sorted(waits)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            parts.append(f"{name}: {len(waits)} calls, avg wait {sum(waits) / len(waits):.2f}s, p95 {p95:.2f}s, max {ordered[-1]:.2f}s")
+        if parts:
+            print("🚦 LLM queue — " + "; ".join(parts))
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler):
+    global _scheduler
+    _scheduler = scheduler
+    return scheduler
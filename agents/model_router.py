@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Task-aware model routing. Each call site names its task type; the task picks
+# a starting tier, and a response that fails the caller's validation is retried
+# one tier up (small → medium → large). Latency, tokens and fallbacks are
+# recorded per route (call site) and printed/saved at the end of a run. Every
+# call first takes a slot from the shared llm_scheduler (interactive before bulk,
+# RPM/TPM budgets); a 429 pauses the scheduler and retries the same model.
+#
+#   HUSTLE_MODEL_SMALL / HUSTLE_MODEL_MEDIUM / HUSTLE_MODEL_LARGE override the models.
+
+TIERS = ["small", "medium", "large"]
+TIER_MODELS = {
+    "small": os.getenv("HUSTLE_MODEL_SMALL", "gpt-4o-mini"),
+    "medium": os.getenv("HUSTLE_MODEL_MEDIUM", "gpt-4o"),
+    "large": os.getenv("HUSTLE_MODEL_LARGE", "gpt-4"),
+}
+TASK_TIERS = {
+    "classification": "small",  # yes/no and short-label answers
+    "selector": "small",        # CSS selector lookups
+    "structured": "medium",     # JSON lists/objects pulled from page content
+    "creative": "large",        # long-form content kits, scraping strategies
+    "code": "large",            # self-repair patches
+}
+DEFAULT_TASK = "creative"
+RATE_LIMIT_RETRIES = 3
+TELEMETRY_PATH = Path("logs/llm_routes.json")
+
+
+def _retry_after(error, attempt):
+    """Seconds to pause after a 429: the server's Retry-After, else exponential."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return 2.0 ** attempt
+
+
+def _rate_limited(error):
+    return getattr(error, "status_code", None) == 429
+
+
+def model_for(task=DEFAULT_TASK, escalation=0):
+    tier = TIERS.index(TASK_TIERS.get(task, TASK_TIERS[DEFAULT_TASK]))
+    return TIER_MODELS[TIERS[min(tier + escalation, len(TIERS) - 1)]]
+
+
+class RouteStats:
+    def __init__(self, task):
+        self.task = task
+        self.requests = 0
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.models = {}
+
+    def add(self, model, latency, usage=None, error=False):
+        self.calls += 1
+        self.latency += latency
+        self.errors += int(error)
+        self.models[model] = self.models.get(model, 0) + 1
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def as_dict(self):
+        return {
+            "task": self.task,
+            "requests": self.requests,
+            "calls": self.calls,
+            "errors": self.errors,
+            "fallbacks": self.fallbacks,
+            "fallback_rate": round(self.fallbacks / self.requests, 3) if self.requests else 0.0,
+            "avg_latency_s": round(self.latency / self.calls, 3) if self.calls else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "models": dict(self.models),
+        }
+
+
+class ModelRouter:
+    def __init__(self, client=None, tier_models=None, task_tiers=None, scheduler=None):
+        self._client = client
+        self._scheduler = scheduler
+        self.tier_models = dict(tier_models or TIER_MODELS)
+        self.task_tiers = dict(task_tiers or TASK_TIERS)
+        self.routes = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            import settings  # bare sibling import; core/ only uses model_for
+
+            self._client = settings.async_openai()
+        return self._client
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            import llm_scheduler
+
+            self._scheduler = llm_scheduler.get_scheduler()
+        return self._scheduler
+
+    async def _create(self, stats, model, prompt, task, **kwargs):
+        """One scheduled API call; 429s back off and retry the same model."""
+        from llm_scheduler import estimate_tokens, priority_for
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            grant = await self.scheduler.acquire(priority_for(task), estimate_tokens(prompt, task))
+            started = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs,
+                )
+                return grant, response, started
+            except Exception as e:
+                grant.release()
+                if not _rate_limited(e) or attempt == RATE_LIMIT_RETRIES:
+                    stats.add(model, time.perf_counter() - started, error=True)
+                    raise
+                self.scheduler.backoff(_retry_after(e, attempt))
+
+    def models_for(self, task):
+        """Models to try for a task, starting tier first, then each larger one."""
+        start = TIERS.index(self.task_tiers.get(task, self.task_tiers[DEFAULT_TASK]))
+        return [self.tier_models[tier] for tier in TIERS[start:]]
+
+    def _route(self, route, task):
+        key = route or task
+        if key not in self.routes:
+            self.routes[key] = RouteStats(task)
+        return self.routes[key]
+
+    async def complete(self, prompt, task=DEFAULT_TASK, route=None, validate=None, temperature=0.2):
+        """
+        Return the first response that passes `validate(text)` (any response if no
+        validator), escalating a tier per failure. If even the largest model's answer
+        fails validation it is returned anyway, for the caller's own handling.
+        Returns None only if every model errored.
+        """
+        stats = self._route(route, task)
+        stats.requests += 1
+        models = self.models_for(task)
+        content = None
+        for position, model in enumerate(models):
+            try:
+                grant, response, started = await self._create(stats, model, prompt, task, temperature=temperature)
+            except Exception as e:
+                print(f"GPT Error ({model}): {e}")
+                continue
+            grant.settle(getattr(response, "usage", None))
+            stats.add(model, time.perf_counter() - started, getattr(response, "usage", None))
+            content = (response.choices[0].message.content or "").strip()
+            if validate is None or validate(content):
+                return content
+            if position < len(models) - 1:
+                stats.fallbacks += 1
+                print(f"↗️ {route or task}: {model} answer failed validation, retrying on {models[position + 1]}")
+        return content
+
+    async def stream(self, prompt, task=DEFAULT_TASK, route=None, temperature=0.4, on_usage=None):
+        """
+        Yield text deltas from the task's model (no fallback mid-stream). The final
+        chunk carries the token usage (stream_options.include_usage); it settles the
+        scheduler grant and is handed to `on_usage(usage)`.
+        """
+        stats = self._route(route, task)
+        stats.requests += 1
+        model = self.models_for(task)[0]
+        grant, stream, started = await self._create(stats, model, prompt, task, temperature=temperature, stream=True,
+                                                    stream_options={"include_usage": True})
+        usage = None
+        streamed = 0
+        failed = False
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    streamed += len(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Also runs when the consumer stops early or the generator is closed
+            if usage is not None:
+                grant.settle(usage)
+                if on_usage is not None:
+                    on_usage(usage)
+            else:
+                # No usage chunk (failed or abandoned): count what was sent and streamed so far
+                grant.set_tokens((len(prompt) + streamed) // 4)
+            stats.add(model, time.perf_counter() - started, usage, error=failed)
+            close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+            if close is not None:
+                await close()
+
+    def stats(self):
+        return {route: stats.as_dict() for route, stats in self.routes.items()}
+
+    def report(self):
+        if not self.routes:
+            return
+        print("📈 LLM routes:")
+        for route, stats in sorted(self.stats().items(), key=lambda item: -item[1]["calls"]):
+            models = ", ".join(f"{m}×{n}" for m, n in stats["models"].items())
+            print(f"   {route:22} {stats['task']:14} {stats['requests']:4} requests / {stats['calls']} calls  avg {stats['avg_latency_s']:.2f}s  "
+                  f"fallback {100 * stats['fallback_rate']:.0f}%  tokens {stats['prompt_tokens']}/{stats['completion_tokens']}  [{models}]")
+
+    def save(self, path=TELEMETRY_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"tiers": self.tier_models, "routes": self.stats()}, f, indent=2)
+
+
+_router = None
+
+
+def get_router():
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
+
+
+def set_router(router):
+    """Swap the shared router (e.g. for one backed by StubClient)."""
+    global _router
+    _router = router
+    return router
+
+
+class StubClient:
+    """
+    Offline stand-in for AsyncOpenAI's chat.completions with per-model latency.
+    `responder(model, prompt)` returns the reply text.
+    """
+
+    def __init__(self, responder, latencies=None, default_latency=0.1):
+        self.responder = responder
+        self.latencies = latencies or {}
+        self.default_latency = default_latency
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        self.calls.append(model)
+        await asyncio.sleep(self.latencies.get(model, self.default_latency))
+        text = self.responder(model, prompt)
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(text) // 4)
+        if not stream:
+            message = SimpleNamespace(content=text)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+        async def chunks():
+            for i in range(0, len(text), 40):
+                delta = SimpleNamespace(content=text[i:i + 40])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+            yield SimpleNamespace(choices=[], usage=usage)
+
+        return chunks()
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import re
+
+from card_extractor import coerce
+
+# Opt-in capture of the marketplace's own JSON API traffic. The SPA fetches its
+# offer list over XHR before rendering the cards, so listening to responses
+# gives us structured records (often including the promo link) without
+# scraping markup or clicking "Promote now" per card. Cards that can't be
+# matched to a captured record fall back to the DOM/click path.
+#
+#   HUSTLE_NETWORK_CAPTURE=1 python agents/researcher.py
+
+ENABLED = os.getenv("HUSTLE_NETWORK_CAPTURE") == "1"
+
+# Response URLs worth parsing (regexes, matched with re.search)
+API_PATTERNS = [
+    r"/api/.*(marketplace|offers?|products?)",
+    r"marketplace.*\.json",
+    r"/(offers|products)(\?|$)",
+]
+
+# API key (lowercased) -> (our field, value type)
+FIELD_ALIASES = {
+    "id": ("product_id", "text"),
+    "product_id": ("product_id", "text"),
+    "productid": ("product_id", "text"),
+    "name": ("title", "text"),
+    "title": ("title", "text"),
+    "product_name": ("title", "text"),
+    "productname": ("title", "text"),
+    "category": ("category", "text"),
+    "description": ("description", "text"),
+    "price": ("price", "money"),
+    "commission": ("commission", "percent"),
+    "commission_rate": ("commission", "percent"),
+    "commission_percent": ("commission", "percent"),
+    "epc": ("earnings_per_cart_visitor", "money"),
+    "earnings_per_cart_visitor": ("earnings_per_cart_visitor", "money"),
+    "earnings_per_visitor": ("earnings_per_cart_visitor", "money"),
+    "net_earnings": ("net_earnings_per_sale", "money"),
+    "net_earnings_per_sale": ("net_earnings_per_sale", "money"),
+    "vendor": ("vendor", "vendor"),
+    "vendor_name": ("vendor", "vendor"),
+    "vendorname": ("vendor", "vendor"),
+    "online_since": ("online_since", "date"),
+    "created_at": ("online_since", "date"),
+    "cart_conversion": ("cart_conversion", "percent"),
+    "conversion_rate": ("cart_conversion", "percent"),
+    "cancellation_rate": ("cancellation_rate", "percent"),
+    "cancel_rate": ("cancellation_rate", "percent"),
+    "promolink": ("promotion_link", "text"),
+    "promo_link": ("promotion_link", "text"),
+    "promotion_link": ("promotion_link", "text"),
+    "affiliate_link": ("promotion_link", "text"),
+    "salespage_url": ("sales_page_url", "text"),
+    "sales_page_url": ("sales_page_url", "text"),
+}
+
+_OFFER_KEYS = {"name", "title", "product_name", "productname"}
+
+
+def normalize_title(title):
+    return re.sub(r"[^a-z0-9]+", " ", str(title).lower()).strip()
+
+
+def map_record(raw):
+    """Map one API object onto our offer field names (typed). Unknown keys are dropped."""
+    record = {}
+    for key, value in raw.items():
+        alias = FIELD_ALIASES.get(key.lower())
+        if not alias or value in (None, ""):
+            continue
+        field, value_type = alias
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            record.setdefault(field, float(value) if value_type != "text" else str(value))
+        elif isinstance(value, str):
+            record.setdefault(field, coerce(value, value_type))
+    return record
+
+
+def _looks_like_offer(item):
+    return isinstance(item, dict) and any(key.lower() in _OFFER_KEYS for key in item)
+
+
+_ARRAY_OF_OBJECTS = re.compile(r"\[\s*\{")
+
+
+def iter_offer_objects(text):
+    """
+    Yield offer-like objects from a JSON body one at a time. The first array of
+    offer objects (top-level or nested under e.g. "data") is decoded item by item
+    with raw_decode, so a large listing response is never materialized as one tree.
+    """
+    decoder = json.JSONDecoder()
+    length = len(text)
+    search_from = 0
+    while True:
+        match = _ARRAY_OF_OBJECTS.search(text, search_from)
+        if not match:
+            break
+        index = match.start() + 1
+        found = 0
+        while index < length:
+            while index < length and text[index] in " \t\r\n,":
+                index += 1
+            if index >= length or text[index] == "]":
+                break
+            try:
+                item, index = decoder.raw_decode(text, index)
+            except json.JSONDecodeError:
+                break
+            if _looks_like_offer(item):
+                found += 1
+                yield item
+        if found:
+            return
+        # That array held something else (tags, images...) — look for the next one
+        search_from = match.start() + 1
+
+    if search_from == 0:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return
+        if _looks_like_offer(value):
+            yield value
+
+
+class ResponseCapture:
+    def __init__(self, patterns=None):
+        self.patterns = [re.compile(p, re.I) for p in (patterns or API_PATTERNS)]
+        self.by_title = {}
+        self.by_id = {}
+        self.responses = 0
+        self.matched = 0
+        self._claimed = set()
+        self._tasks = set()
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+        return self
+
+    def _on_response(self, response):
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if not any(p.search(response.url) for p in self.patterns):
+            return
+        task = asyncio.ensure_future(self._consume(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _consume(self, response):
+        try:
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            text = await response.text()
+        except Exception as e:
+            print(f"⚠️ Could not read captured response {response.url}: {e}")
+            return
+        self.responses += 1
+        for raw in iter_offer_objects(text):
+            self.add(map_record(raw))
+
+    def add(self, record):
+        if record.get("title"):
+            self.by_title[normalize_title(record["title"])] = record
+        if record.get("product_id"):
+            self.by_id[str(record["product_id"])] = record
+
+    async def settle(self, timeout=5.0):
+        """Wait for in-flight response bodies to be parsed."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    def __len__(self):
+        return len(self.by_title) or len(self.by_id)
+
+    def match(self, card):
+        """Find the captured API record for a DOM card (by product id, then title)."""
+        record = None
+        if card.get("product_id") and str(card["product_id"]) in self.by_id:
+            record = self.by_id[str(card["product_id"])]
+        elif card.get("title"):
+            record = self.by_title.get(normalize_title(card["title"]))
+        if record is not None:
+            self.matched += 1
+            self._claimed.add(id(record))
+        return record
+
+    def unclaimed(self):
+        """Captured records no DOM card was matched to (yet)."""
+        records = list(self.by_title.values()) + [r for r in self.by_id.values() if not r.get("title")]
+        return [r for r in records if id(r) not in self._claimed]
+
+    def claim_all(self):
+        for record in self.unclaimed():
+            self._claimed.add(id(record))
@@ -0,0 +1,281 @@
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+# Two-level content kits. Offers in the same niche (supplements, EMF devices,
+# brain-wave audio, ...) share most of their angle breakdown, hashtag clusters
+# and CTA templates. Those three sections are generated once per niche into
+# memory/niche_templates/<niche>/ and reused until they are TEMPLATE_TTL old.
+# The per-offer call then writes only the product summary, hooks and scripts,
+# plus short offer-specific additions to the shared sections. The additions are
+# appended to the niche text in the offer's folder.
+#
+# A niche comes from keywords in the title, description and category, then the
+# marketplace's category badge. Offers neither resolves go to one batched
+# classification call. A template is only built for a niche with at least
+# MIN_OFFERS offers in the run (or a fresh cached template). Other offers get
+# the full kit as before. The niche each offer ended up with is recorded in
+# memory/niche_templates/assignments.json, so the builder uses the same
+# template for it, including niches only the classifier could tell.
+#
+#   HUSTLE_NICHE_TEMPLATES=0 turns this off; HUSTLE_NICHE_TEMPLATE_TTL (seconds) sets the refresh age.
+
+ENABLED = os.getenv("HUSTLE_NICHE_TEMPLATES", "1") != "0"
+TEMPLATE_TTL = float(os.getenv("HUSTLE_NICHE_TEMPLATE_TTL", str(7 * 24 * 3600)))
+MIN_OFFERS = int(os.getenv("HUSTLE_NICHE_MIN_OFFERS", "2"))
+TEMPLATE_DIR = Path("memory/niche_templates")
+ASSIGNMENTS_PATH = TEMPLATE_DIR / "assignments.json"
+
+# Sections generated at niche level; the rest of SECTION_FILES stays per offer
+TEMPLATE_SECTIONS = ["angle_breakdown.txt", "hashtag_sets.txt", "cta_templates.txt"]
+CONTEXT_CHARS = 1500  # niche angles shown to the per-offer prompt, so hooks and scripts stay on strategy
+CLASSIFY_BATCH = 40
+
+# niche -> keywords; the niche with the most hits wins, ties go to the earlier one
+NICHE_KEYWORDS = {
+    "weight loss": ("weight loss", "keto", "fat burn", "slim", "diet", "appetite"),
+    "supplements": ("supplement", "capsule", "gummies", "probiotic", "vitamin", "formula", "nutrition"),
+    "emf protection": ("emf", "5g", "radiation", "shielding"),
+    "brainwave audio": ("brainwave", "binaural", "frequency", "frequencies", "hz", "subliminal", "manifest"),
+    "fitness": ("workout", "fitness", "muscle", "yoga", "exercise", "training program"),
+    "trading & investing": ("forex", "trading", "crypto", "stock market", "investing", "bitcoin"),
+    "make money online": ("affiliate", "passive income", "side hustle", "make money", "ecommerce", "dropshipping"),
+    "relationships": ("dating", "relationship", "marriage", "attraction", "ex back"),
+    "pets": ("dog", "puppy", "cat", "pet"),
+    "survival": ("survival", "prepper", "off-grid", "off grid", "self-sufficient"),
+    "music": ("guitar", "piano", "singing", "music lessons"),
+}
+_KEYWORD_PATTERNS = {
+    niche: re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b", re.I)
+    for niche, keywords in NICHE_KEYWORDS.items()
+}
+_LIST_MARKER = re.compile(r"^[\s\-*•\d.)]+")
+_assignments = None
+_NOT_A_NICHE = {"", "unknown", "other", "none", "n/a", "general", "deliverable", "digital", "physical"}
+
+
+def _tokens(text):
+    return len(text) // 4
+
+
+def _slug(niche):
+    return re.sub(r"[^a-z0-9]+", "-", niche.lower()).strip("-")[:60]
+
+
+def niche_of(offer):
+    """The offer's niche from its own text and category, or None if that doesn't tell."""
+    text = " ".join(str(offer.get(field) or "") for field in ("title", "description", "category"))
+    hits = {niche: len(pattern.findall(text)) for niche, pattern in _KEYWORD_PATTERNS.items()}
+    best = max(hits, key=hits.get)
+    if hits[best]:
+        return best
+    category = str(offer.get("category") or "").split(" - ")[0].strip().lower()
+    return category if category not in _NOT_A_NICHE else None
+
+
+async def detect_niches(offers, ask=None):
+    """Niche per offer (None = no niche). Offers the text doesn't settle go to `ask` in batches."""
+    niches = [niche_of(offer) for offer in offers]
+    pending = [i for i, niche in enumerate(niches) if niche is None]
+    if not pending or ask is None:
+        return niches
+
+    from structured_output import query_structured
+
+    known = ", ".join(NICHE_KEYWORDS)
+    for start in range(0, len(pending), CLASSIFY_BATCH):
+        batch = pending[start:start + CLASSIFY_BATCH]
+        listing = "\n".join(
+            f"{n}. {offers[i].get('title') or ''} — {str(offers[i].get('description') or '')[:160]}"
+            for n, i in enumerate(batch, 1)
+        )
+        prompt = f"""
+        Classify each affiliate product below into its marketing niche.
+        Prefer one of: {known}. Otherwise use a 1-3 word lowercase niche name, or "unknown".
+
+        {listing}
+
+        Return a JSON object {{"niches": [...]}} with exactly {len(batch)} strings, in the same order.
+        """
+        result = await query_structured(ask, prompt, schema={"niches": [str]}, max_retries=1)
+        answers = (result or {}).get("niches") or []
+        if len(answers) != len(batch):
+            continue
+        for i, answer in zip(batch, answers):
+            answer = answer.strip().lower()
+            niches[i] = answer if answer not in _NOT_A_NICHE else None
+    return niches
+
+
+def _offer_key(offer):
+    return str(offer.get("product_id") or offer.get("title") or offer.get("name") or "").strip().lower()
+
+
+def _load_assignments():
+    global _assignments
+    if _assignments is None:
+        try:
+            with open(ASSIGNMENTS_PATH, "r", encoding="utf-8") as f:
+                _assignments = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _assignments = {}
+    return _assignments
+
+
+def remember_niches(offers, niches):
+    """Record each offer's niche as enrichment decided it (None entries are skipped)."""
+    assignments = _load_assignments()
+    for offer, niche in zip(offers, niches):
+        key = _offer_key(offer)
+        if key and niche:
+            assignments[key] = niche
+    ASSIGNMENTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = ASSIGNMENTS_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(assignments, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, ASSIGNMENTS_PATH)
+
+
+def assigned_niche(offer):
+    """The niche enrichment gave this offer, else what its own text says (None if neither)."""
+    return offer.get("niche") or _load_assignments().get(_offer_key(offer)) or niche_of(offer)
+
+
+class NicheTemplate:
+    def __init__(self, niche, folder, sections, created):
+        self.niche = niche
+        self.folder = Path(folder)
+        self.sections = sections
+        self.created = created
+
+    @property
+    def fresh(self):
+        return time.time() - self.created < TEMPLATE_TTL and all(self.sections.get(name) for name in TEMPLATE_SECTIONS)
+
+    @property
+    def tokens(self):
+        return sum(_tokens(text) for text in self.sections.values())
+
+    def context(self):
+        """Excerpt of the niche's angles for the per-offer prompt."""
+        angles = self.sections.get("angle_breakdown.txt", "")
+        return angles[:CONTEXT_CHARS] + (" …" if len(angles) > CONTEXT_CHARS else "")
+
+
+def folder_for(niche):
+    folder = TEMPLATE_DIR / _slug(niche)
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def load(niche):
+    """The cached template for `niche`, or None if there is none or it has expired."""
+    folder = TEMPLATE_DIR / _slug(niche)
+    try:
+        with open(folder / "template.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        sections = {name: (folder / name).read_text(encoding="utf-8").strip() for name in TEMPLATE_SECTIONS}
+    except (OSError, json.JSONDecodeError):
+        return None
+    template = NicheTemplate(niche, folder, sections, meta.get("created", 0))
+    return template if template.fresh else None
+
+
+def save(niche, written):
+    """Record a freshly generated template (its section files are already in folder_for(niche))."""
+    folder = folder_for(niche)
+    sections = {name: Path(path).read_text(encoding="utf-8").strip() for name, path in written.items()}
+    template = NicheTemplate(niche, folder, sections, time.time())
+    if not template.fresh:
+        return None  # stream dropped a section; don't cache a partial template
+    with open(folder / "template.json", "w", encoding="utf-8") as f:
+        json.dump({"niche": niche, "created": template.created, "tokens": template.tokens}, f, indent=2)
+    return template
+
+
+def merge(template, folder, written, product=None):
+    """Put the niche text in front of the offer's additions for each shared section."""
+    for name in TEMPLATE_SECTIONS:
+        path = Path(folder) / name
+        addition = path.read_text(encoding="utf-8").strip() if name in written and path.exists() else ""
+        text = template.sections[name].replace("[PRODUCT]", product or "[PRODUCT]")
+        if addition:
+            text += "\n\n--- For this offer ---\n" + addition
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        os.replace(tmp_path, path)
+        written[name] = str(path)
+
+
+def bundle_defaults(template):
+    """CTA and hashtags for HustleAgent's marketing bundle, taken from a niche template."""
+    hashtags = list(dict.fromkeys(re.findall(r"#\w+", template.sections.get("hashtag_sets.txt", ""))))[:8]
+    cta = None
+    for line in template.sections.get("cta_templates.txt", "").splitlines():
+        line = _LIST_MARKER.sub("", line).strip().strip('"')
+        if len(line) > 10 and not line.endswith(":"):
+            cta = line
+            break
+    return {"CTA": cta, "hashtags": hashtags} if cta and hashtags else None
+
+
+class TemplateStats:
+    """Per-run counts, with token usage as the API reported it for each stream."""
+
+    def __init__(self):
+        self.generated = []  # niches whose template was built (or attempted) this run
+        self.reused = set()  # niches served from cache
+        self.templated_offers = 0
+        self.full_offers = 0
+        self.seconds = {"templated": 0.0, "full": 0.0}
+        # kind -> [streams that reported usage, prompt tokens, completion tokens]
+        self.usage = {"templated": [0, 0, 0], "full": [0, 0, 0], "template": [0, 0, 0]}
+
+    def _add_usage(self, kind, usage):
+        if usage is None:
+            return  # replayed from a cassette, or the stream died before its usage chunk
+        entry = self.usage[kind]
+        entry[0] += 1
+        entry[1] += getattr(usage, "prompt_tokens", 0) or 0
+        entry[2] += getattr(usage, "completion_tokens", 0) or 0
+
+    def offer_done(self, template, usage, seconds):
+        kind = "full" if template is None else "templated"
+        if template is None:
+            self.full_offers += 1
+        else:
+            self.templated_offers += 1
+        self.seconds[kind] += seconds
+        self._add_usage(kind, usage)
+
+    def template_built(self, niche, template, usage=None):
+        self.generated.append(niche)
+        self._add_usage("template", usage)
+
+    def _average(self, kind):
+        streams, prompt, completion = self.usage[kind]
+        return (prompt / streams, completion / streams) if streams else None
+
+    def report(self):
+        if not (self.templated_offers or self.generated):
+            return
+        line = (f"🧩 Niche templates: {len(self.generated)} built, {len(self.reused)} reused from cache; "
+                f"{self.templated_offers} offer(s) templated, {self.full_offers} in full")
+        averages = []
+        for kind, label in (("templated", "templated offer"), ("full", "full kit"), ("template", "template build")):
+            average = self._average(kind)
+            if average:
+                averages.append(f"{label} {average[1]:,.0f} completion / {average[0]:,.0f} prompt")
+        if averages:
+            line += "; avg tokens per " + ", ".join(averages)
+        templated, full = self._average("templated"), self._average("full")
+        if templated and full:
+            saved = self.usage["templated"][0] * (full[1] - templated[1]) - self.usage["template"][2]
+            line += f"; {saved:,.0f} completion tokens saved against this run's full kits, template builds included"
+        if self.templated_offers and self.full_offers:
+            line += (f"; avg {self.seconds['templated'] / self.templated_offers:.1f}s templated vs "
+                     f"{self.seconds['full'] / self.full_offers:.1f}s full")
+        print(line + ".")
@@ -0,0 +1,305 @@
+import json
+import re
+
+from card_extractor import KNOWN_LABELS, normalize_label, parse_date, parse_money, parse_number, parse_percent
+
+# Canonical offer record. Every scraped, captured or model-extracted offer is
+# normalized once, at scrape time: keys go through the alias table (so
+# "product_name", "Name", "EPC" or a card label all land on one field), numeric
+# fields are parsed to floats ("$111.14" -> 111.14 + currency, "30.00%" -> 30.0),
+# dates to ISO strings. Anything that isn't a known field is kept in `extra`.
+#
+# Offers are __slots__ records, but also answer the dict-style reads the rest of
+# the pipeline does (offer.get("name") resolves to the title), so dedup, the
+# ranker and the builder work on either form. JSONL stores to_dict(); the
+# columnar form lists each field once with a value per offer.
+
+# field -> value type (card_extractor's types, plus url)
+FIELDS = {
+    "title": "text",
+    "vendor": "text",
+    "description": "text",
+    "category": "text",
+    "product_id": "text",
+    "price": "money",
+    "currency": "text",
+    "commission": "percent",
+    "earnings_per_cart_visitor": "money",
+    "net_earnings_per_sale": "money",
+    "average_earnings_per_conversion": "money",
+    "initial_earnings_per_conversion": "money",
+    "cart_conversion": "percent",
+    "cancellation_rate": "percent",
+    "refund_rate": "percent",
+    "gravity": "number",
+    "online_since": "date",
+    "payment_methods": "text",
+    "url": "url",
+    "sales_page_url": "url",
+    "affiliate_support_url": "url",
+    "promotion_link": "url",
+    "score": "number",
+}
+FIELD_NAMES = tuple(FIELDS)
+
+# Normalized key -> field, for names the marketplaces' APIs and the model come up with
+ALIASES = {
+    "name": "title", "product_name": "title", "productname": "title", "product_title": "title",
+    "product": "title", "offer_name": "title", "offer_title": "title", "product_title_name": "title",
+    "vendor_name": "vendor", "vendorname": "vendor", "seller": "vendor", "merchant": "vendor",
+    "product_description": "description", "summary": "description",
+    "id": "product_id", "productid": "product_id",
+    "product_price": "price", "price_usd": "price", "cost": "price",
+    "epc": "earnings_per_cart_visitor", "earnings_per_visitor": "earnings_per_cart_visitor",
+    "earnings_per_click": "earnings_per_cart_visitor",
+    "net_earnings": "net_earnings_per_sale", "earnings_per_sale": "net_earnings_per_sale",
+    "commission_rate": "commission", "commission_percent": "commission", "commission_percentage": "commission",
+    "affiliate_commission": "commission",
+    "conversion_rate": "cart_conversion", "cart_conversion_rate": "cart_conversion",
+    "earnings_per_conversion": "average_earnings_per_conversion",
+    "avg_earnings_per_conversion": "average_earnings_per_conversion",
+    "average_earning_per_conversion": "average_earnings_per_conversion",
+    "initial_earning_per_conversion": "initial_earnings_per_conversion",
+    "first_earnings_per_conversion": "initial_earnings_per_conversion",
+    "cancel_rate": "cancellation_rate", "cancellations": "cancellation_rate",
+    "created_at": "online_since", "launch_date": "online_since",
+    "link": "url", "product_url": "url", "product_link": "url",
+    "sales_page": "sales_page_url", "salespage_url": "sales_page_url", "sales_url": "sales_page_url",
+    "sales_page_link": "sales_page_url",
+    "affiliate_support_page": "affiliate_support_url", "affiliate_support_page_url": "affiliate_support_url",
+    "promo_link": "promotion_link", "promolink": "promotion_link", "affiliate_link": "promotion_link",
+    "affiliate_url": "promotion_link", "promotion_url": "promotion_link", "hoplink": "promotion_link",
+}
+
+# Last resort for model-invented keys: first matching pattern wins
+ALIAS_RULES = [
+    (re.compile(r"commission"), "commission"),
+    (re.compile(r"(^|_)epc($|_)|earnings.*visitor"), "earnings_per_cart_visitor"),
+    (re.compile(r"net_earnings|earnings_per_sale"), "net_earnings_per_sale"),
+    (re.compile(r"cancel"), "cancellation_rate"),
+    (re.compile(r"refund"), "refund_rate"),
+    (re.compile(r"initial.*earnings?_per_conversion"), "initial_earnings_per_conversion"),
+    (re.compile(r"earnings?_per_conversion"), "average_earnings_per_conversion"),
+    (re.compile(r"^(cart_)?conversion(_rate)?(_pct|_percent(age)?)?$"), "cart_conversion"),
+    (re.compile(r"sales_?page"), "sales_page_url"),
+    (re.compile(r"promo|affiliate_link|hoplink"), "promotion_link"),
+    (re.compile(r"^(product|offer)_.*(title|name)$"), "title"),
+    (re.compile(r"(^|_)price($|_)"), "price"),
+]
+
+MISSING = {"", "n/a", "na", "none", "null", "-", "—"}
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_field_cache = {}
+
+
+def _normalize_key(key):
+    return _NON_WORD.sub("_", str(key).lower()).strip("_")
+
+
+def _label_aliases():
+    aliases = {}
+    for label, (field, _) in KNOWN_LABELS.items():
+        if field in FIELDS:
+            aliases[_normalize_key(label)] = field
+    return aliases
+
+
+ALIASES.update({k: v for k, v in _label_aliases().items() if k not in ALIASES})
+
+
+def canonical_field(key):
+    """The Offer field a raw key maps to, or None if it's not one of ours."""
+    if key in _field_cache:
+        return _field_cache[key]
+    normalized = _normalize_key(normalize_label(str(key)))
+    field = normalized if normalized in FIELDS else ALIASES.get(normalized)
+    if field is None:
+        for pattern, candidate in ALIAS_RULES:
+            if pattern.search(normalized):
+                field = candidate
+                break
+    _field_cache[key] = field
+    return field
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, str) and value.strip().lower() in MISSING)
+
+
+def parse_value(value, value_type):
+    """(typed value, currency or None); typed value is None if it can't be parsed."""
+    if isinstance(value, bool):
+        return None, None
+    if isinstance(value, (int, float)):
+        return (str(value) if value_type in ("text", "url") else float(value)), None
+    if not isinstance(value, str):
+        return None, None
+    text = value.strip()
+    if value_type == "text":
+        return text, None
+    if value_type == "url":
+        # Loose alias rules also catch prose like "promotional_angle"; only links land here
+        return (text if text.startswith(("http://", "https://", "/")) else None), None
+    if value_type == "money":
+        parsed = parse_money(text)
+        if parsed:
+            return parsed
+        return parse_number(text), None
+    if value_type == "percent":
+        parsed = parse_percent(text)
+        return (parsed if parsed is not None else parse_number(text.rstrip("%"))), None
+    if value_type == "date":
+        return parse_date(text), None
+    return parse_number(text), None
+
+
+class Offer:
+    __slots__ = FIELD_NAMES + ("extra",)
+
+    def __init__(self, **fields):
+        for name in FIELD_NAMES:
+            setattr(self, name, fields.pop(name, None))
+        self.extra = fields.pop("extra", None) or {}
+        self.extra.update(fields)
+
+    @classmethod
+    def from_dict(cls, raw):
+        """Normalize one raw record (scraped, captured or model-extracted). Offers pass through."""
+        if isinstance(raw, cls):
+            return raw
+        offer = cls()
+        extra = offer.extra
+        for key, value in raw.items():
+            if _is_missing(value):
+                continue
+            field = canonical_field(key)
+            if field is None or getattr(offer, field) is not None:
+                # Unknown key, or a second spelling of a field we already have
+                if key not in FIELDS:
+                    extra.setdefault(key, value)
+                continue
+            typed, currency = parse_value(value, FIELDS[field])
+            if typed is None or typed == "":
+                extra.setdefault(key, value)  # keep what we couldn't parse
+                continue
+            setattr(offer, field, typed)
+            if currency and offer.currency is None:
+                offer.currency = currency
+        return offer
+
+    @property
+    def label(self):
+        """Human-readable name for logs and folder names."""
+        return self.title or self.product_id or self.url or "untitled offer"
+
+    def to_dict(self):
+        record = {name: getattr(self, name) for name in FIELD_NAMES if getattr(self, name) is not None}
+        for key, value in self.extra.items():
+            record.setdefault(key, value)
+        return record
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+
+    def copy(self):
+        return Offer(**{name: getattr(self, name) for name in FIELD_NAMES}, extra=dict(self.extra))
+
+    def prompt_fields(self):
+        """'Field Name: value' lines for prompts, numbers formatted back with their units."""
+        lines = []
+        for key, value in self.to_dict().items():
+            if key in ("score", "currency") or isinstance(value, (dict, list)):
+                continue
+            kind = FIELDS.get(key)
+            if kind == "money":
+                value = f"{value:,.2f} {self.currency or ''}".strip()
+            elif kind == "percent":
+                value = f"{value:g}%"
+            elif isinstance(value, float):
+                value = f"{value:g}"
+            value = str(value).strip()
+            if value:
+                lines.append(f"{key.replace('_', ' ').title()}: {value}")
+        return "\n".join(lines)
+
+    # — dict-style access, so code written against raw dicts keeps working —
+
+    def _resolve(self, key):
+        if key in FIELDS:
+            return key
+        return None if key in self.extra else canonical_field(key)
+
+    def get(self, key, default=None):
+        field = self._resolve(key)
+        if field is not None:
+            value = getattr(self, field)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _ABSENT)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key, _ABSENT) is not _ABSENT
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __repr__(self):
+        return f"Offer({self.to_dict()!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Offer) and self.to_dict() == other.to_dict()
+
+
+_ABSENT = object()
+
+
+def normalize_record(raw):
+    """A raw record as its canonical dict (what the offers JSONL stores)."""
+    return Offer.from_dict(raw).to_dict()
+
+
+def to_columns(offers):
+    """Columnar form: each field's values in one list (None where missing), extras per offer."""
+    offers = [Offer.from_dict(offer) for offer in offers]
+    columns = {}
+    for name in FIELD_NAMES:
+        column = [getattr(offer, name) for offer in offers]
+        if any(value is not None for value in column):
+            columns[name] = column
+    return {"count": len(offers), "columns": columns, "extra": [offer.extra or None for offer in offers]}
+
+
+def from_columns(data):
+    columns = data["columns"]
+    extras = data.get("extra") or [None] * data["count"]
+    return [
+        Offer(**{name: values[i] for name, values in columns.items()}, extra=dict(extras[i] or {}))
+        for i in range(data["count"])
+    ]
+
+
+def write_columns(path, offers):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_columns(offers), f, ensure_ascii=False, default=str)
+
+
+def read_columns(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return from_columns(json.load(f))
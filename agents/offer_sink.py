@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from pathlib import Path
+
+# Append-only JSONL output for scraped offers. Each record is written (and
+# flushed to the OS) as soon as its card is processed, so memory stays flat on
+# long catalogs and a crash keeps everything emitted so far. fsync is batched:
+# every `fsync_every` records or `fsync_interval` seconds, whichever comes first.
+
+OFFERS_DIR = Path("output/offers")
+
+
+def offers_path_for(target_url):
+    from urllib.parse import urlparse
+
+    host = (urlparse(target_url).hostname or "site").replace("www.", "")
+    return OFFERS_DIR / f"{host}.jsonl"
+
+
+class JsonlSink:
+    def __init__(self, path, append=False, fsync_every=50, fsync_interval=2.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, record):
+        if hasattr(record, "to_dict"):  # an Offer
+            record = record.to_dict()
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path):
+    """Yield records from a JSONL file, skipping a torn last line left by a crash."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def truncate_jsonl(path, count):
+    """
+    Keep only the first `count` records of a JSONL file (e.g. to roll output back
+    to a checkpoint before appending to it again). Returns the records kept.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+    kept = 0
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if kept >= count or not line.endswith(b"\n"):
+                break
+            kept += 1
+            offset += len(line)
+    with open(path, "r+b") as f:
+        f.truncate(offset)
+        os.fsync(f.fileno())
+    return kept
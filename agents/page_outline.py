@@ -0,0 +1,228 @@
+import os
+import re
+
+# Compact, line-oriented page outline for selector prompts, as an alternative
+# to clean_html (which strips id/class/name — the very hooks the prompt asks
+# the model to prefer). One line per meaningful node, indented under its
+# landmark/container:
+#
+#   - form "Sign in" [e4] action=/login
+#     - textbox "Email" [e5] type=email name=email id=login-email
+#     - button "Log in" [e7] type=submit
+#
+# Roles and accessible names follow ARIA (explicit role, else the tag's implicit
+# role; aria-label/labelledby, <label>, placeholder, alt, title, text). Each ref
+# maps to a CSS selector built in-page from stable attributes (id, name,
+# data-testid, href, aria-label; nth-of-type path as a last resort), so the
+# model answers with a ref and we get back a selector that keeps working after
+# the snapshot — unlike Playwright's aria_snapshot refs, which only resolve
+# against the snapshot they came from. Long runs of look-alike siblings (product
+# cards, table rows) are outlined three times, then summarised with their
+# shared selector.
+#
+#   HUSTLE_PAGE_REPR=outline makes the researcher's selector lookups use it.
+
+ENABLED = os.getenv("HUSTLE_PAGE_REPR", "html") == "outline"
+MAX_NODES = 400
+MAX_TEXT = 80
+REPEAT_SHOWN = 3
+MIN_REPEAT = 6  # sibling runs shorter than this are outlined in full
+
+OUTLINE_JS = """
+([maxNodes, maxText, repeatShown, minRepeat]) => {
+    const IMPLICIT = {
+        BUTTON: 'button', SELECT: 'combobox', TEXTAREA: 'textbox', NAV: 'navigation', MAIN: 'main',
+        HEADER: 'banner', FOOTER: 'contentinfo', FORM: 'form', DIALOG: 'dialog', UL: 'list', OL: 'list',
+        LI: 'listitem', TABLE: 'table', TR: 'row', TH: 'columnheader', TD: 'cell', IFRAME: 'iframe',
+        SUMMARY: 'button', ARTICLE: 'article', ASIDE: 'complementary', OPTION: 'option', P: 'paragraph',
+        H1: 'heading', H2: 'heading', H3: 'heading', H4: 'heading', H5: 'heading', H6: 'heading',
+    };
+    const INPUT_ROLES = { checkbox: 'checkbox', radio: 'radio', submit: 'button', button: 'button', reset: 'button',
+        image: 'button', search: 'searchbox', range: 'slider', number: 'spinbutton' };
+    // Roles whose accessible name comes from their text content
+    const NAME_FROM_TEXT = new Set(['link', 'button', 'heading', 'option', 'tab', 'menuitem', 'cell', 'columnheader',
+        'listitem', 'paragraph', 'checkbox', 'radio']);
+    const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'SVG', 'svg', 'META', 'LINK', 'HEAD']);
+    const UNSTABLE = /\\d{4,}|[0-9a-f]{8,}|^(ember|react|mui|radix|headlessui|:r)|__|^[a-z]{1,2}\\d+$/i;
+
+    const clip = (s) => {
+        s = (s || '').replace(/\\s+/g, ' ').trim();
+        return s.length > maxText ? s.slice(0, maxText - 1) + '…' : s;
+    };
+    const esc = (s) => CSS.escape(s);
+    const unique = (sel) => { try { return document.querySelectorAll(sel).length === 1; } catch (e) { return false; } };
+    const stableId = (el) => el.id && !UNSTABLE.test(el.id) ? el.id : null;
+    const stableClasses = (el) => Array.from(el.classList).filter((c) => !UNSTABLE.test(c) && c.length < 40);
+
+    const roleOf = (el) => {
+        const explicit = el.getAttribute('role');
+        if (explicit) return explicit.split(' ')[0];
+        if (el.tagName === 'A') return el.hasAttribute('href') ? 'link' : null;
+        if (el.tagName === 'IMG') return el.getAttribute('alt') ? 'img' : null;
+        if (el.tagName === 'INPUT') return INPUT_ROLES[(el.type || 'text').toLowerCase()] || 'textbox';
+        if (el.tagName === 'SECTION') return el.getAttribute('aria-label') || el.getAttribute('aria-labelledby') ? 'region' : null;
+        return IMPLICIT[el.tagName] || null;
+    };
+    const nameOf = (el, role) => {
+        const label = el.getAttribute('aria-label');
+        if (label) return clip(label);
+        const by = el.getAttribute('aria-labelledby');
+        if (by) {
+            const text = by.split(/\\s+/).map((id) => document.getElementById(id)).filter(Boolean).map((n) => n.innerText).join(' ');
+            if (text.trim()) return clip(text);
+        }
+        if (el.labels && el.labels.length) return clip(el.labels[0].innerText);
+        if (['INPUT', 'TEXTAREA', 'SELECT'].includes(el.tagName)) {
+            if (['submit', 'button', 'reset'].includes(el.type)) return clip(el.value);
+            return clip(el.getAttribute('placeholder') || el.getAttribute('title') || '');
+        }
+        if (el.tagName === 'IMG') return clip(el.getAttribute('alt'));
+        if (NAME_FROM_TEXT.has(role)) return clip(el.innerText || el.getAttribute('title') || (el.querySelector('img[alt]') || {}).alt);
+        return clip(el.getAttribute('title') || '');
+    };
+
+    const selectorFor = (el) => {
+        const tag = el.tagName.toLowerCase();
+        const id = stableId(el);
+        if (id && unique('#' + esc(id))) return '#' + esc(id);
+        for (const attr of ['data-testid', 'name', 'aria-label', 'href', 'placeholder']) {
+            const value = el.getAttribute(attr);
+            if (!value || value.length > 120) continue;
+            const sel = `${tag}[${attr}="${value.replace(/"/g, '\\\\"')}"]`;
+            if (unique(sel)) return sel;
+        }
+        const classes = stableClasses(el);
+        if (classes.length && unique(tag + '.' + classes.map(esc).join('.'))) return tag + '.' + classes.map(esc).join('.');
+        // nth-of-type path up to the nearest uniquely addressable ancestor
+        const parent = el.parentElement;
+        if (!parent || parent === document.documentElement) return tag;
+        const index = Array.from(parent.children).filter((c) => c.tagName === el.tagName).indexOf(el) + 1;
+        const parentSel = parent === document.body ? 'body' : selectorFor(parent);
+        return `${parentSel} > ${tag}:nth-of-type(${index})`;
+    };
+    // Selector shared by a run of look-alike siblings (e.g. every product card)
+    const groupSelector = (el) => {
+        const classes = stableClasses(el);
+        return el.tagName.toLowerCase() + (classes.length ? '.' + classes.map(esc).join('.') : '');
+    };
+    const signature = (el) => el.tagName + '.' + stableClasses(el).sort().join('.');
+
+    const lines = [];
+    const refs = {};
+    let count = 0;
+    let truncated = false;
+
+    const attrsOf = (el) => {
+        const parts = [];
+        const type = el.getAttribute('type');
+        if (type && el.tagName === 'INPUT') parts.push(`type=${type}`);
+        for (const attr of ['name', 'data-testid', 'action']) {
+            const value = el.getAttribute(attr);
+            if (value) parts.push(`${attr}=${clip(value)}`);
+        }
+        const href = el.getAttribute('href');
+        if (href && !href.startsWith('javascript:')) {
+            let shown = href;
+            try { const url = new URL(href, location.href); if (url.origin === location.origin) shown = url.pathname + url.search; } catch (e) {}
+            parts.push(`href=${clip(shown)}`);
+        }
+        const id = stableId(el);
+        if (id) parts.push(`id=${id}`);
+        return parts.join(' ');
+    };
+    const emit = (depth, role, name, el, extra) => {
+        if (count >= maxNodes) { truncated = true; return false; }
+        const ref = 'e' + (++count);
+        refs[ref] = extra && extra.selector ? extra.selector : selectorFor(el);
+        const attrs = (extra && extra.attrs) || attrsOf(el);
+        lines.push(`${'  '.repeat(depth)}- ${role}${name ? ` "${name.replace(/"/g, "'")}"` : ''} [${ref}]${attrs ? ' ' + attrs : ''}`);
+        return true;
+    };
+    const ownText = (el) => clip(Array.from(el.childNodes).filter((n) => n.nodeType === 3).map((n) => n.textContent).join(' '));
+
+    const walk = (el, depth, quiet) => {
+        if (SKIP.has(el.tagName) || count >= maxNodes) return;
+        const style = getComputedStyle(el);
+        if (style.display === 'none' || el.hidden || el.getAttribute('aria-hidden') === 'true') return;
+        if (el.tagName === 'INPUT' && el.type === 'hidden') return;
+        const visible = style.visibility !== 'hidden';
+
+        let role = visible ? roleOf(el) : null;
+        let childDepth = depth;
+        let childQuiet = quiet;
+        if (role && role !== 'presentation' && role !== 'none') {
+            const name = nameOf(el, role);
+            if (!(quiet && NAME_FROM_TEXT.has(role) && role !== 'link' && role !== 'button')) {
+                if (emit(depth, role, name, el)) childDepth = depth + 1;
+            }
+            // Text of named leaf-ish roles is already on their line
+            if (NAME_FROM_TEXT.has(role) && name) childQuiet = true;
+        } else if (visible && !quiet) {
+            const text = ownText(el);
+            const id = stableId(el);
+            if (id && el.children.length) {
+                if (emit(depth, 'group', text, el)) childDepth = depth + 1;
+            } else if (text.length > 1) {
+                emit(depth, 'text', text, el);
+            }
+        }
+
+        // Collapse long runs of look-alike composite siblings (cards, rows — not nav links)
+        // to a few examples plus their shared selector
+        const totals = {};
+        for (const child of el.children) {
+            if (child.querySelectorAll('*').length >= 3) totals[signature(child)] = (totals[signature(child)] || 0) + 1;
+        }
+        const seen = {};
+        for (const child of el.children) {
+            const key = signature(child);
+            if ((totals[key] || 0) >= minRepeat && child.querySelectorAll('*').length >= 3) {
+                seen[key] = (seen[key] || 0) + 1;
+                if (seen[key] === repeatShown + 1) {
+                    emit(childDepth, 'repeated', `${totals[key] - repeatShown} more like the above`, child,
+                        { selector: groupSelector(child), attrs: `selector=${groupSelector(child)} count=${totals[key]}` });
+                }
+                if (seen[key] > repeatShown) continue;
+            }
+            walk(child, childDepth, childQuiet);
+        }
+    };
+    walk(document.body, 0, false);
+    return { title: document.title, url: location.href, lines, refs, truncated };
+}
+"""
+
+_REF = re.compile(r"\[?(e\d+)\]?")
+
+
+class PageOutline:
+    def __init__(self, data):
+        self.title = data["title"]
+        self.url = data["url"]
+        self.lines = data["lines"]
+        self.refs = data["refs"]
+        self.truncated = data["truncated"]
+
+    @property
+    def text(self):
+        header = f'Page "{self.title}" ({self.url})'
+        footer = "\n… (outline truncated)" if self.truncated else ""
+        return header + "\n" + "\n".join(self.lines) + footer
+
+    def selector_for(self, answer):
+        """Map the model's answer (a ref such as e12, or a literal selector) to a CSS selector."""
+        if not answer:
+            return None
+        answer = answer.strip().strip('"').strip("'").strip("`")
+        match = _REF.fullmatch(answer)
+        if match:
+            return self.refs.get(match.group(1))
+        if answer.lower() == "null":
+            return None
+        return answer if answer.startswith((".", "#")) or "[" in answer else None
+
+
+async def outline_page(scope, max_nodes=MAX_NODES):
+    """Outline a page or frame (anything with .evaluate)."""
+    data = await scope.evaluate(OUTLINE_JS, [max_nodes, MAX_TEXT, REPEAT_SHOWN, MIN_REPEAT])
+    return PageOutline(data)
@@ -0,0 +1,475 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urldefrag, urljoin, urlparse, parse_qsl, urlencode, urlunparse
+
+# Detects how a catalog paginates once per site, then moves through pages with
+# no LLM calls. Strategies, in order of preference:
+#
+#   url_param      ?page=N / ?p=N or /page/N — pages can be opened directly (and in parallel)
+#   numbered       numbered page links we can click by their number
+#   next_button    a "Next" control we click until it disappears or is disabled
+#   infinite_scroll  more cards load as we scroll to the bottom
+#   none           single page
+#
+# The last page is only taken as final from a "Page X of N" total or a disabled
+# Next; the highest visible page number may just be the edge of a windowed pager
+# ("1 2 3 4 5 Next"), so otherwise we keep going while pages are linked, Next is
+# enabled, or a scroll loads something new. Never from a failed GPT lookup.
+
+STRATEGY_CACHE_PATH = Path("memory/pagination.json")
+PAGE_PARAMS = ("page", "p", "pg", "pagenum", "page_number", "offset", "start")
+SETTLE_MS = 800
+SCROLL_WAIT_MS = 1200
+# Catalog pages loaded ahead in background tabs while the current one is processed (0 = off)
+PREFETCH_DEPTH = int(os.getenv("HUSTLE_PREFETCH_DEPTH", "1"))
+
+DETECT_JS = """
+(params) => {
+    const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const disabled = (el) => el.disabled || el.getAttribute('aria-disabled') === 'true'
+        || /\\bdisabled\\b/.test(el.className || '') || /\\bdisabled\\b/.test((el.parentElement && el.parentElement.className) || '');
+    const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+    const here = new URL(location.href);
+
+    // Next control
+    let next = null;
+    const relNext = document.querySelector('a[rel~="next"]');
+    if (relNext && visible(relNext)) {
+        next = { selector: 'a[rel~="next"]', disabled: disabled(relNext), href: relNext.href || null };
+    } else {
+        const nextWords = /^(next|next page|weiter|suivant|siguiente|›|»|>|→|chevron_right|navigate_next|keyboard_arrow_right)$/i;
+        for (const el of document.querySelectorAll('a, button, [role="button"]')) {
+            if (!visible(el)) continue;
+            const label = norm(el.getAttribute('aria-label')) || norm(el.innerText) || norm(el.getAttribute('title'));
+            if (!nextWords.test(label)) continue;
+            const tag = el.tagName.toLowerCase();
+            const aria = el.getAttribute('aria-label');
+            const selector = aria ? `${tag}[aria-label="${aria.replace(/"/g, '\\\\"')}"]` : `${tag}:has-text("${label.replace(/"/g, '\\\\"')}")`;
+            next = { selector, disabled: disabled(el), href: el.href || null };
+            break;
+        }
+    }
+
+    // Numbered links, with a selector for the pagination block they sit in
+    const containerOf = (el) => el.closest('[class*="pagin"], [class*="pager"], [role="navigation"], nav') || el.closest('ul, ol');
+    const selectorOf = (el) => {
+        const tag = el.tagName.toLowerCase();
+        if (el.id) return `#${CSS.escape(el.id)}`;
+        const cls = [...el.classList].find((c) => /pagin|pager/i.test(c));
+        if (cls) return `${tag}.${CSS.escape(cls)}`;
+        const aria = el.getAttribute('aria-label');
+        if (aria) return `${tag}[aria-label="${aria.replace(/"/g, '\\\\"')}"]`;
+        // Nothing that sets it apart (a bare ul or nav matches every list/menu): pin it by position
+        const path = [];
+        let node = el;
+        for (; node && node !== document.body; node = node.parentElement) {
+            if (node.id) { path.unshift(`#${CSS.escape(node.id)}`); break; }
+            const same = [...node.parentElement.children].filter((c) => c.tagName === node.tagName);
+            path.unshift(`${node.tagName.toLowerCase()}:nth-of-type(${same.indexOf(node) + 1})`);
+        }
+        if (node === document.body) path.unshift('body');
+        return path.join(' > ');
+    };
+    const numbered = [];
+    for (const a of document.querySelectorAll('a, button')) {
+        const text = norm(a.innerText);
+        if (!/^\\d{1,4}$/.test(text) || !visible(a)) continue;
+        const container = containerOf(a);
+        if (!container) continue;
+        numbered.push({ n: parseInt(text, 10), href: a.href || null, container: selectorOf(container), current: a.getAttribute('aria-current') === 'page' || /\\b(active|current)\\b/.test(a.className || '') });
+    }
+
+    // "Page 3 of 12" style totals
+    let total = null;
+    const ofMatch = norm(document.body.innerText).match(/\\bpage\\s+\\d+\\s+(?:of|\\/)\\s+(\\d+)\\b/i);
+    if (ofMatch) total = parseInt(ofMatch[1], 10);
+
+    // Which query parameter / path segment carries the page number?
+    let param = null;
+    const hrefs = numbered.map((x) => x.href).concat(next && next.href ? [next.href] : []).filter(Boolean);
+    for (const href of hrefs) {
+        let url;
+        try { url = new URL(href, location.href); } catch (e) { continue; }
+        if (url.origin !== here.origin) continue;
+        for (const name of params) {
+            if (url.searchParams.has(name) && /^\\d+$/.test(url.searchParams.get(name))) { param = { kind: 'query', name }; break; }
+        }
+        if (!param && /\\/page\\/\\d+\\/?$/.test(url.pathname)) param = { kind: 'path', name: 'page' };
+        if (param) break;
+    }
+
+    return {
+        url: location.href,
+        next,
+        numbered,
+        total,
+        param,
+        scrollable: document.documentElement.scrollHeight > window.innerHeight * 1.5,
+    };
+}
+"""
+
+
+def _with_page_param(url, param, number):
+    parts = urlparse(url)
+    if param["kind"] == "path":
+        path = parts.path.rstrip("/")
+        if "/page/" in path:
+            path = path.rsplit("/page/", 1)[0]
+        return urlunparse(parts._replace(path=f"{path}/page/{number}/"))
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query[param["name"]] = str(number)
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def _current_page_number(url, param):
+    parts = urlparse(url)
+    if param["kind"] == "path":
+        tail = parts.path.rstrip("/").rsplit("/page/", 1)
+        return int(tail[1]) if len(tail) == 2 and tail[1].isdigit() else 1
+    value = dict(parse_qsl(parts.query)).get(param["name"])
+    return int(value) if value and value.isdigit() else 1
+
+
+def _navigable(href, current):
+    """`href` without its fragment, or None if it doesn't lead off the current page (#, javascript:)."""
+    url = urldefrag(urljoin(current, href.strip())).url
+    if urlparse(url).scheme not in ("http", "https"):
+        return None
+    return url if url != urldefrag(current).url else None
+
+
+def choose_strategy(info):
+    """
+    Turn a DETECT_JS snapshot into a strategy dict. "last" is set only from a
+    "Page X of N" total; a disabled Next is handled by Paginator.observe.
+    """
+    numbers = [item["n"] for item in info.get("numbered", [])]
+    last = info.get("total")
+    param = info.get("param")
+
+    if param and param["name"] not in ("offset", "start"):
+        return {"type": "url_param", "param": param, "last": last}
+    if numbers:
+        return {"type": "numbered", "last": last, "next": info.get("next")}
+    if info.get("next"):
+        return {"type": "next_button", "selector": info["next"]["selector"], "last": last}
+    if info.get("scrollable"):
+        return {"type": "infinite_scroll"}
+    return {"type": "none"}
+
+
+def _load_cache():
+    if STRATEGY_CACHE_PATH.exists():
+        try:
+            with open(STRATEGY_CACHE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def _save_cache(cache):
+    STRATEGY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(STRATEGY_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+
+
+class Paginator:
+    def __init__(self, strategy, start_url):
+        self.strategy = strategy
+        self.start_url = start_url
+        self.page_number = 1
+        if strategy["type"] == "url_param":
+            self.page_number = _current_page_number(start_url, strategy["param"])
+        self.item_selector = None
+        self.linked = set()  # page numbers linked from the pages seen so far
+        self.more = True  # whether the last page observed still had an enabled Next
+
+    @classmethod
+    async def detect(cls, page, item_selector=None):
+        """Detect the strategy for this site (cached per host), once."""
+        host = urlparse(page.url).hostname or ""
+        cache = _load_cache()
+        info = await page.evaluate(DETECT_JS, list(PAGE_PARAMS))
+        strategy = choose_strategy(info)
+
+        cached = cache.get(host)
+        if strategy["type"] == "none" and cached and cached["type"] != "none":
+            # Page layout hid the controls this time — trust what we learned before
+            strategy = {**cached, "last": None}
+        elif strategy["type"] != "none":
+            cache[host] = {k: v for k, v in strategy.items() if k != "last"}
+            _save_cache(cache)
+
+        paginator = cls(strategy, page.url)
+        paginator.item_selector = item_selector
+        paginator.observe_info(info)
+        print(f"📑 Pagination strategy: {strategy['type']}" + (f" (last page {paginator.last_page})" if paginator.last_page else ""))
+        return paginator
+
+    def observe_info(self, info, number=None):
+        """Record what a DETECT_JS snapshot of page `number` (default: the current one) links to."""
+        number = self.page_number if number is None else number
+        self.linked.update(item["n"] for item in info.get("numbered", []))
+        nxt = info.get("next")
+        self.more = nxt is None or not nxt["disabled"]
+        if info.get("total"):
+            self.strategy["last"] = max(info["total"], number)
+        elif nxt is not None and nxt["disabled"]:
+            self.strategy["last"] = number  # Next is disabled: this is the final page
+
+    async def observe(self, page, number):
+        """observe_info for a catalog page open in another tab, e.g. the furthest one fetched in parallel."""
+        self.observe_info(await page.evaluate(DETECT_JS, list(PAGE_PARAMS)), number)
+
+    @property
+    def url_addressable(self):
+        return self.strategy["type"] == "url_param"
+
+    @property
+    def last_page(self):
+        return self.strategy.get("last")
+
+    def remaining_urls(self):
+        """
+        Page URLs after the current one that are known to exist: up to the last
+        page when that is final, else the unbroken run of linked page numbers (a
+        stray "2024" elsewhere on the page doesn't extend it).
+        """
+        if not self.url_addressable:
+            return []
+        end = self.page_number
+        if self.last_page:
+            end = self.last_page
+        else:
+            while end + 1 in self.linked:
+                end += 1
+        return [
+            _with_page_param(self.start_url, self.strategy["param"], n)
+            for n in range(self.page_number + 1, end + 1)
+        ]
+
+    def next_url(self):
+        if not self.url_addressable:
+            return None
+        if self.last_page and self.page_number >= self.last_page:
+            return None
+        return _with_page_param(self.start_url, self.strategy["param"], self.page_number + 1)
+
+    async def upcoming_urls(self, page, depth=1):
+        """
+        URLs of the next `depth` pages, where they can be known without clicking:
+        computed for url_param, read from the numbered/Next links otherwise.
+        """
+        kind = self.strategy["type"]
+        if depth <= 0 or kind in ("none", "infinite_scroll"):
+            return []
+        numbers = range(self.page_number + 1, self.page_number + depth + 1)
+        if kind == "url_param":
+            return [
+                _with_page_param(self.start_url, self.strategy["param"], n)
+                for n in numbers if not self.last_page or n <= self.last_page
+            ]
+
+        info = await page.evaluate(DETECT_JS, list(PAGE_PARAMS))
+        hrefs = {}
+        for item in info.get("numbered", []):
+            url = _navigable(item["href"], page.url) if item.get("href") else None
+            if url:
+                hrefs[item["n"]] = url
+        nxt = info.get("next")
+        if nxt and nxt.get("href") and not nxt["disabled"]:
+            url = _navigable(nxt["href"], page.url)
+            if url:
+                hrefs.setdefault(self.page_number + 1, url)
+        urls = []
+        for n in numbers:
+            # Stop at the first gap: later pages are only reachable through it (or by a JS click)
+            if n not in hrefs:
+                break
+            urls.append(hrefs[n])
+        return urls
+
+    async def advance(self, page):
+        """Move `page` to the next catalog page. Returns False on the last page."""
+        kind = self.strategy["type"]
+        if kind == "none":
+            return False
+
+        if kind == "url_param":
+            url = self.next_url()
+            if not url:
+                return False
+            response = await page.goto(url)
+            if response is not None and response.status >= 400:
+                return False
+            await page.wait_for_load_state("networkidle")
+            self.page_number += 1
+            if not await self.has_content(page):
+                return False
+            self.observe_info(await page.evaluate(DETECT_JS, list(PAGE_PARAMS)))
+            return True
+
+        if kind == "infinite_scroll":
+            height = await page.evaluate("() => document.documentElement.scrollHeight")
+            await page.evaluate("() => window.scrollTo(0, document.documentElement.scrollHeight)")
+            await page.wait_for_timeout(SCROLL_WAIT_MS)
+            grown = await page.evaluate("() => document.documentElement.scrollHeight")
+            if grown <= height:
+                return False
+            self.page_number += 1
+            return True
+
+        info = await page.evaluate(DETECT_JS, list(PAGE_PARAMS))
+        self.observe_info(info)
+        if self.last_page and self.page_number >= self.last_page:
+            return False
+
+        target = None
+        if kind == "numbered":
+            wanted = self.page_number + 1
+            link = next((item for item in info.get("numbered", []) if item["n"] == wanted), None)
+            if link is not None:
+                # Only inside the pagination block: a bare "2" also matches quantities, ratings, cart badges
+                target = page.locator(link["container"]).locator(f'a:text-is("{wanted}"), button:text-is("{wanted}")')
+            elif info.get("next") and not info["next"]["disabled"]:
+                target = page.locator(info["next"]["selector"])
+        else:
+            nxt = info.get("next")
+            if nxt and not nxt["disabled"]:
+                target = page.locator(nxt["selector"])
+
+        if target is None:
+            return False
+
+        before = await page.evaluate("() => document.body.innerText.length + ':' + location.href")
+        try:
+            await target.first.click()
+        except Exception as e:
+            print(f"⚠️ Pagination click failed: {e}")
+            return False
+        await page.wait_for_load_state("networkidle")
+        await page.wait_for_timeout(SETTLE_MS)
+        after = await page.evaluate("() => document.body.innerText.length + ':' + location.href")
+        if after == before:
+            return False
+        self.page_number += 1
+        return True
+
+    async def has_content(self, page):
+        """Whether `page` shows any catalog items. Past-the-end URLs usually render an empty list rather than a 404."""
+        if self.item_selector:
+            return await page.evaluate("(sel) => document.querySelectorAll(sel).length > 0", self.item_selector)
+        text_length = await page.evaluate("() => document.body.innerText.trim().length")
+        return text_length > 0
+
+
+async def map_pages_parallel(context, urls, handler, concurrency=3, on_page=None):
+    """
+    Open each URL in its own tab (at most `concurrency` at once) and run
+    `await handler(page, url)` on it. `on_page(page)` runs before navigation,
+    e.g. to attach listeners. Returns handler results in URL order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(url):
+        async with semaphore:
+            page = await context.new_page()
+            if on_page is not None:
+                on_page(page)
+            try:
+                await page.goto(url)
+                await page.wait_for_load_state("networkidle")
+                return await handler(page, url)
+            finally:
+                await page.close()
+
+    return await asyncio.gather(*(run(url) for url in urls))
+
+
+class PagePrefetcher:
+    """
+    Loads catalog pages in background tabs of `context` ahead of need, at most
+    `depth` at a time. take(url) hands over the ready tab; close() cancels and
+    closes anything still pending (e.g. when pagination ends early).
+    """
+
+    def __init__(self, context, depth=PREFETCH_DEPTH, on_page=None):
+        self.context = context
+        self.depth = depth
+        self.on_page = on_page
+        self._pending = {}  # url -> task resolving to a loaded page
+
+    async def _load(self, url):
+        page = await self.context.new_page()
+        if self.on_page is not None:
+            self.on_page(page)
+        try:
+            await page.goto(url)
+            await page.wait_for_load_state("networkidle")
+        except BaseException:
+            await page.close()
+            raise
+        return page
+
+    def prefetch(self, urls):
+        for url in urls:
+            if len(self._pending) >= self.depth:
+                break
+            if url not in self._pending:
+                self._pending[url] = asyncio.ensure_future(self._load(url))
+
+    async def take(self, url):
+        """The prefetched tab for `url` (waiting for it to finish loading), or None."""
+        task = self._pending.pop(url, None)
+        if task is None:
+            return None
+        try:
+            return await task
+        except Exception as e:
+            print(f"⚠️ Prefetch of {url} failed: {e}")
+            return None
+
+    async def close(self):
+        pending, self._pending = list(self._pending.values()), {}
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            try:
+                page = await task
+            except BaseException:
+                continue
+            await page.close()
+
+
+class PageTimer:
+    """Per-page wall time, split by how the page was reached."""
+
+    def __init__(self):
+        self.processing = []
+        self.waits = {"prefetched": [], "direct": []}
+        self._mark = time.perf_counter()
+
+    def reached(self, how):
+        now = time.perf_counter()
+        self.waits[how].append(now - self._mark)
+        self._mark = now
+
+    def processed(self):
+        now = time.perf_counter()
+        self.processing.append(now - self._mark)
+        self._mark = now
+
+    def report(self):
+        def avg(values):
+            return sum(values) / len(values) if values else 0.0
+
+        parts = [f"{len(self.processing)} pages, avg {avg(self.processing):.2f}s processing"]
+        for how, waits in self.waits.items():
+            if waits:
+                parts.append(f"{how} next page ready in avg {avg(waits):.2f}s ({len(waits)})")
+        print("⏱️ " + "; ".join(parts))
@@ -0,0 +1,192 @@
+import os
+import re
+from datetime import date
+
+import numpy as np
+
+from card_extractor import parse_money, parse_percent, parse_date
+from offer_sink import iter_jsonl
+
+# Ranks scraped offers so only the promising ones are sent to GPT-4 enrichment.
+# Every metric is parsed once into a column of a (offers x metrics) matrix, then
+# normalization, weighting and filtering happen as whole-array operations.
+
+METRICS = [
+    "price",
+    "commission",
+    "earnings_per_cart_visitor",
+    "cart_conversion",
+    "cancellation_rate",
+    "age_days",
+]
+
+# Positive weights reward a metric, negative ones penalize it. Metrics are
+# min-max normalized across the catalog first, so weights are comparable.
+DEFAULT_WEIGHTS = {
+    "earnings_per_cart_visitor": 0.35,
+    "commission": 0.20,
+    "cart_conversion": 0.20,
+    "cancellation_rate": -0.20,
+    "price": 0.0,
+    "age_days": 0.05,
+}
+
+# metric -> (operator, bound). Offers with a missing value pass the filter.
+DEFAULT_FILTERS = {
+    "cancellation_rate": ("<=", 15.0),
+}
+
+DEFAULT_TOP_K = int(os.getenv("HUSTLE_TOP_K", "10"))
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _to_float(value, kind):
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value)
+    if kind == "money":
+        parsed = parse_money(text)
+        return parsed[0] if parsed else np.nan
+    if kind == "percent":
+        parsed = parse_percent(text)
+        return parsed if parsed is not None else np.nan
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return np.nan
+
+
+def _age_days(value, today):
+    if not value:
+        return np.nan
+    # Offers store ISO dates since they're normalized at scrape time; older records may not
+    iso = value if isinstance(value, str) and _ISO_DATE.match(value) else parse_date(str(value))
+    if not iso:
+        return np.nan
+    return float((today - date.fromisoformat(iso)).days)
+
+
+def _metric_row(offer, today):
+    return (
+        _to_float(offer.get("price"), "money"),
+        _to_float(offer.get("commission"), "percent"),
+        _to_float(offer.get("earnings_per_cart_visitor"), "money"),
+        _to_float(offer.get("cart_conversion"), "percent"),
+        _to_float(offer.get("cancellation_rate"), "percent"),
+        _age_days(offer.get("online_since"), today),
+    )
+
+
+def metric_matrix(offers, today=None):
+    """Parse the numeric metrics of every offer into a float matrix (NaN = missing)."""
+    today = today or date.today()
+    matrix = np.full((len(offers), len(METRICS)), np.nan)
+    for row, offer in enumerate(offers):
+        matrix[row] = _metric_row(offer, today)
+    return matrix
+
+
+def score_matrix(matrix, weights=None):
+    """Weighted sum of min-max normalized metrics; missing values score as the column mean."""
+    weights = weights or DEFAULT_WEIGHTS
+    weight_vector = np.array([weights.get(metric, 0.0) for metric in METRICS])
+
+    if matrix.shape[0] == 0:
+        return np.zeros(0)
+
+    with np.errstate(all="ignore"):
+        col_min = np.min(np.where(np.isnan(matrix), np.inf, matrix), axis=0)
+        col_max = np.max(np.where(np.isnan(matrix), -np.inf, matrix), axis=0)
+        span = col_max - col_min
+        normalized = (matrix - col_min) / np.where(span > 0, span, 1.0)
+
+    # Columns with no data at all contribute nothing; otherwise impute the column mean
+    present = np.isfinite(normalized)
+    sums = np.where(present, normalized, 0.0).sum(axis=0)
+    counts = present.sum(axis=0)
+    col_mean = np.divide(sums, counts, out=np.zeros(len(METRICS)), where=counts > 0)
+    normalized = np.where(present, normalized, col_mean)
+
+    return normalized @ weight_vector
+
+
+def filter_mask(matrix, filters=None):
+    filters = DEFAULT_FILTERS if filters is None else filters
+    mask = np.ones(matrix.shape[0], dtype=bool)
+    for metric, (op, bound) in filters.items():
+        column = matrix[:, METRICS.index(metric)]
+        with np.errstate(invalid="ignore"):
+            mask &= np.isnan(column) | _OPERATORS[op](column, bound)
+    return mask
+
+
+def _select(scores, mask, top_k, threshold):
+    if threshold is not None:
+        mask = mask & (scores >= threshold)
+    candidates = np.flatnonzero(mask)
+    # Stable sort keeps scrape order among equal scores
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    if top_k is not None:
+        order = order[:top_k]
+    return mask, order
+
+
+def rank_offers(offers, weights=None, filters=None, top_k=None, threshold=None, today=None):
+    """
+    Score the whole catalog in one vectorized pass and return the offers worth
+    enriching, best first, each with a "score" key. `top_k` caps the count,
+    `threshold` drops anything scoring below it; with neither, DEFAULT_TOP_K applies.
+    """
+    if not offers:
+        return []
+    if top_k is None and threshold is None:
+        top_k = DEFAULT_TOP_K
+
+    matrix = metric_matrix(offers, today)
+    scores = score_matrix(matrix, weights)
+    mask, order = _select(scores, filter_mask(matrix, filters), top_k, threshold)
+
+    print(f"🏆 Ranked {len(offers)} offers: {int(mask.sum())} passed filters, keeping {len(order)}.")
+    ranked = []
+    for i in order:
+        offer = offers[i].copy()  # dict or Offer
+        offer["score"] = round(float(scores[i]), 4)
+        ranked.append(offer)
+    return ranked
+
+
+def rank_jsonl(path, weights=None, filters=None, top_k=None, threshold=None, today=None):
+    """
+    Same as rank_offers, but for a streamed offers file: only the metric matrix
+    is held in memory on the first pass, and the selected records are read back
+    on a second pass.
+    """
+    if top_k is None and threshold is None:
+        top_k = DEFAULT_TOP_K
+    today = today or date.today()
+
+    rows = [_metric_row(offer, today) for offer in iter_jsonl(path)]
+    if not rows:
+        return []
+    matrix = np.array(rows, dtype=float)
+    scores = score_matrix(matrix, weights)
+    mask, order = _select(scores, filter_mask(matrix, filters), top_k, threshold)
+
+    print(f"🏆 Ranked {len(rows)} offers: {int(mask.sum())} passed filters, keeping {len(order)}.")
+    rank_of = {int(i): position for position, i in enumerate(order)}
+    ranked = [None] * len(order)
+    for i, offer in enumerate(iter_jsonl(path)):
+        if i in rank_of:
+            offer["score"] = round(float(scores[i]), 4)
+            ranked[rank_of[i]] = offer
+    return ranked
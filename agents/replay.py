@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Record/replay support so the researcher can run against local fixtures
+# instead of the live site and the live model.
+#
+#   HUSTLE_RECORD_DIR=fixtures/researcher python agents/researcher.py   # capture a run
+#   HUSTLE_REPLAY_DIR=fixtures/researcher python agents/researcher.py   # replay it offline
+#
+# Network traffic goes to/from a HAR file, model responses to/from a JSONL cassette
+# keyed by a hash of the prompt.
+
+HAR_FILE = "site.har"
+CASSETTE_FILE = "llm_cassette.jsonl"
+
+_cassette = None
+
+
+def record_dir():
+    value = os.getenv("HUSTLE_RECORD_DIR")
+    return Path(value) if value else None
+
+
+def replay_dir():
+    value = os.getenv("HUSTLE_REPLAY_DIR")
+    return Path(value) if value else None
+
+
+def is_replaying():
+    return replay_dir() is not None
+
+
+def prompt_key(prompt, model=None):
+    # Whitespace differences in the triple-quoted prompts shouldn't miss the cassette
+    normalized = " ".join(prompt.split())
+    if model:
+        normalized = f"{model}\n{normalized}"
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def context_options():
+    """Extra kwargs for browser.new_context() when recording."""
+    folder = record_dir()
+    if not folder:
+        return {}
+    folder.mkdir(parents=True, exist_ok=True)
+    return {"record_har_path": str(folder / HAR_FILE), "record_har_content": "embed"}
+
+
+async def attach(context):
+    """Serve every request from the recorded HAR when replaying; unknown URLs are aborted."""
+    folder = replay_dir()
+    if folder:
+        await context.route_from_har(str(folder / HAR_FILE), not_found="abort")
+
+
+def _load_cassette():
+    global _cassette
+    if _cassette is None:
+        _cassette = {}
+        folder = replay_dir()
+        path = folder / CASSETTE_FILE if folder else None
+        if path and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    _cassette[entry["key"]] = entry["response"]
+    return _cassette
+
+
+def lookup(prompt, model=None):
+    """Return (hit, response) for a replayed model call."""
+    cassette = _load_cassette()
+    key = prompt_key(prompt, model)
+    if key in cassette:
+        return True, cassette[key]
+    return False, None
+
+
+def record(prompt, response, model=None):
+    folder = record_dir()
+    if not folder or response is None:
+        return
+    folder.mkdir(parents=True, exist_ok=True)
+    with open(folder / CASSETTE_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": prompt_key(prompt, model), "response": response}, ensure_ascii=False) + "\n")
@@ -1,10 +1,26 @@
+import asyncio
 import os
-from dotenv import load_dotenv
-from playwright.async_api import async_playwright
+import re
+import sys
 from enricher import enrich_offers
-from ai_locator import get_selector, analyze_site, get_affiliate_fields, get_selectors_from_strategy, html_looks_valid
-
-load_dotenv()
+from ai_locator import get_selector, get_selector_in_delta, get_selector_in_outline, analyze_site, get_affiliate_fields, get_listing_fields, get_item_selectors, get_selectors_from_strategy, html_looks_valid, ask_for
+from card_extractor import extract_cards, parse_card_text
+from bulk_extract import extract_rows
+from offer_sink import JsonlSink, offers_path_for, truncate_jsonl
+from offer import normalize_record
+from checkpoint import Checkpoint
+from pagination import Paginator, PagePrefetcher, PageTimer, PREFETCH_DEPTH, map_pages_parallel
+import consent as consent_handling
+from consent import ConsentGuard
+import network_capture
+from network_capture import ResponseCapture
+from model_router import get_router
+import replay
+import settings
+from selector_healer import SelectorHealer
+from dom_delta import DomDelta
+import page_outline
+import debug_artifacts
 
 # 🔗 Target site (set dynamically)
 TARGET_URL = "https://www.digistore24.com/"
@@ -13,17 +29,30 @@ TARGET_URL = "https://www.digistore24.com/"
 has_login: bool
 site_type: str
 
-# 🔐 Credentials (from .env)
-DIGISTORE_EMAIL = os.getenv("DIGISTORE_EMAIL")
-DIGISTORE_PASSWORD = os.getenv("DIGISTORE_PASSWORD")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# 🔐 Credentials (from .env), checked when a run starts rather than at import
+REQUIRED_ENV = ("DIGISTORE_EMAIL", "DIGISTORE_PASSWORD", "OPENAI_API_KEY")
+
 
-if not all([DIGISTORE_EMAIL, DIGISTORE_PASSWORD, OPENAI_API_KEY]):
-    raise EnvironmentError("Missing required environment variables in .env")
+# Helper: Resolve a selector through the local healer, asking GPT only when it can't.
+# With a `delta` (what the last click changed) GPT sees only that, then the full page if it isn't there;
+# the full page goes out as an accessibility outline when HUSTLE_PAGE_REPR=outline.
+async def locate(scope, key, description, html=None, healer=None, delta=None):
+    async def ask_gpt():
+        if delta is not None:
+            selector = await get_selector_in_delta(delta, description)
+            if selector:
+                return selector
+        if page_outline.ENABLED:
+            return await get_selector_in_outline(await page_outline.outline_page(scope), description)
+        return await get_selector(html if html is not None else await scope.content(), description)
+
+    if healer is None:
+        return await ask_gpt()
+    return await healer.locate(scope, key, fallback=ask_gpt)
 
 
 # Helper: Fill login form dynamically
-async def login_if_needed(page, html):
+async def login_if_needed(page, html, healer=None, deltas=None):
     # Step 1: Analyze whether login is needed
     analysis = await analyze_site(html)
 
@@ -34,38 +63,46 @@ async def login_if_needed(page, html):
     print("🔐 Login required. Attempting login...")
 
     # Step 2: Try clicking login link/button if present
-    login_link_selector = await get_selector(html, "Login link or button in the top navigation")
+    login_link_selector = await locate(page, "login:link", "Login link or button in the top navigation", html, healer)
+    deltas = deltas or DomDelta()
+    delta = None
     if login_link_selector:
         try:
+            # Record what the click changes, so the form lookups below prompt with the modal, not the page
+            await deltas.arm(page)
             await page.click(login_link_selector)
             await page.wait_for_timeout(1500)  # allow modal or redirect to load
+            delta = await deltas.collect(page)
             html = await page.content()  # refresh HTML after login UI is visible
         except Exception as e:
             print(f"⚠️ Failed to click login link: {e}")
 
     # Step 3: Detect iframe if applicable
-    iframe_selector = await get_selector(html, "Iframe containing the login form (if any)")
+    if delta is not None and not delta.counts.get("iframes"):
+        iframe_selector = None  # the snapshot counted no iframes on the page at all
+    else:
+        iframe_selector = await locate(page, "login:iframe", "Iframe containing the login form (if any)", html, healer, delta)
     if iframe_selector:
         try:
             frame_element = await page.query_selector(iframe_selector)
             frame = await frame_element.content_frame()
-            email_selector = await get_selector(await frame.content(), "Email input field for login")
-            password_selector = await get_selector(await frame.content(), "Password input field for login")
-            submit_selector = await get_selector(await frame.content(), "Login button to submit the form")
-            await frame.fill(email_selector, DIGISTORE_EMAIL)
-            await frame.fill(password_selector, DIGISTORE_PASSWORD)
+            email_selector = await locate(frame, "login:email", "Email input field for login", healer=healer)
+            password_selector = await locate(frame, "login:password", "Password input field for login", healer=healer)
+            submit_selector = await locate(frame, "login:submit", "Login button to submit the form", healer=healer)
+            await frame.fill(email_selector, settings.get("DIGISTORE_EMAIL"))
+            await frame.fill(password_selector, settings.get("DIGISTORE_PASSWORD"))
             await frame.click(submit_selector)
         except Exception as e:
             print(f"⚠️ Failed to login inside iframe: {e}")
             return
     else:
         # Step 4: Direct login form on page
-        email_selector = await get_selector(html, "Email input field for login")
-        password_selector = await get_selector(html, "Password input field for login")
-        submit_selector = await get_selector(html, "Login button to submit the form")
+        email_selector = await locate(page, "login:email", "Email input field for login", html, healer, delta)
+        password_selector = await locate(page, "login:password", "Password input field for login", html, healer, delta)
+        submit_selector = await locate(page, "login:submit", "Login button to submit the form", html, healer, delta)
         try:
-            await page.fill(email_selector, DIGISTORE_EMAIL)
-            await page.fill(password_selector, DIGISTORE_PASSWORD)
+            await page.fill(email_selector, settings.get("DIGISTORE_EMAIL"))
+            await page.fill(password_selector, settings.get("DIGISTORE_PASSWORD"))
             await page.click(submit_selector)
         except Exception as e:
             print(f"⚠️ Failed to login on main page: {e}")
@@ -76,138 +113,335 @@ async def login_if_needed(page, html):
     print("✅ Logged in successfully.")
 
 # Helper: Navigate to marketplace or main scrape zone using pre-processed site_info
-async def navigate_to_target_area(page, site_info):
+async def navigate_to_target_area(page, site_info, consent=None):
     catalog_url = site_info.get("catalog_url")
     if not catalog_url:
         print("🛑 No catalog_url found in site_info.")
         return None
 
     print(f"🛒 Navigating to catalog: {catalog_url}")
+    if consent is not None:
+        await consent.add_cookies(page.context, catalog_url)
     await page.goto(catalog_url)
     await page.wait_for_load_state("networkidle")
     await page.wait_for_timeout(1000)
+    if consent is not None and not await consent.settle(page):
+        await dismiss_cookie_popup_if_present(page)
 
     return site_info
 
-async def scrape(page, site_info, selectors):
+async def scrape(page, site_info, selectors, sink=None, capture=None, checkpoint=None):
     site_type = site_info.get("site_type", "unknown")
 
     if site_type == "affiliate":
-        return await scrape_affiliate_cards(page, site_info, selectors)
-    else:
-        return await scrape_general_site(page, selectors)
+        return await scrape_affiliate_cards(page, site_info, selectors, sink=sink, capture=capture, checkpoint=checkpoint)
 
-async def scrape_affiliate_cards(page, site_info, selectors):
-    offers = []
+    offers = [normalize_record(offer) for offer in await scrape_general_site(page, selectors)]
+    if sink is None:
+        return offers
+    for offer in offers:
+        sink.write(offer)
+    return []
 
-    # Handle dropdown to increase items per page
-    if site_info.get("has_page_size_dropdown"):
-        try:
-            await page.click(site_info["page_size_dropdown_selector"])
-            await page.click(site_info["max_items_option_selector"])
-            await page.wait_for_timeout(2000)
-            print("✅ Maximized items per page.")
-        except:
-            print("⚠️ Pagination optimization failed.")
-
-    page_number = 1
-    while True:
-        print(f"📄 Scraping page {page_number}...")
+# Cards with fewer parsed fields than this are handed to the GPT extraction path
+MIN_EXTRACTED_FIELDS = 4
 
-        content_selector = selectors.get("product_card_selector")
-        if not content_selector:
-            print("⚠️ No product_card_selector returned.")
-            break
+async def _dispose(*handles):
+    for handle in handles:
+        if handle is not None:
+            try:
+                await handle.dispose()
+            except Exception:
+                pass
 
-        content_elements = await page.query_selector_all(content_selector)
-        print(f"🔍 Found {len(content_elements)} product cards.")
+async def process_card(page, element, item_data, site_info):
+    """Fill in one card's fields and promotion link. Every handle it opens is released before returning."""
+    handles = []
+    try:
+        # Optional: Handle detail view expansion if needed
+        if site_info.get("product_detail_selector"):
+            try:
+                detail = await element.query_selector(site_info["product_detail_selector"])
+                handles.append(detail)
+                if detail:
+                    await detail.click()
+                    await page.wait_for_timeout(1000)
+                    if len(item_data) < MIN_EXTRACTED_FIELDS:
+                        # Expanded view may expose the label/value table — reparse before using GPT
+                        expanded, _ = parse_card_text(await element.inner_text())
+                        item_data = {**expanded, **item_data}
+            except:
+                print("⚠️ Could not expand detail view.")
 
-        for element in content_elements:
+        # AI-based field extraction, only for cards the label parser couldn't read
+        if len(item_data) < MIN_EXTRACTED_FIELDS:
             el_html = await element.inner_html()
-            item_data = {}
-
-            # Optional: Handle detail view expansion if needed
-            if site_info.get("product_detail_selector"):
-                try:
-                    detail = await element.query_selector(site_info["product_detail_selector"])
-                    if detail:
-                        await detail.click()
-                        await page.wait_for_timeout(1000)
-                except:
-                    print("⚠️ Could not expand detail view.")
-
-            # AI-based field extraction
             field_list = await get_affiliate_fields(el_html)
             for field in field_list:
                 sel = await get_selector(el_html, field)
                 if sel:
                     el = await element.query_selector(sel)
+                    handles.append(el)
                     if el:
                         text = await el.inner_text() if "link" not in field.lower() else await el.get_attribute("href")
                         item_data[field.lower().replace(" ", "_")] = text.strip() if text else ""
+            del el_html
 
-            # Handle promotion link
-            promo_link = ""
-            if site_info.get("promote_button_selector") and site_info.get("promotion_link_selector"):
-                try:
-                    btn = await element.query_selector(site_info["promote_button_selector"])
-                    if btn:
-                        await btn.click()
-                        await page.wait_for_timeout(2000)
-                        link_el = await page.query_selector(site_info["promotion_link_selector"])
-                        if link_el:
-                            promo_link = await link_el.get_attribute("value")
-                except:
-                    print("⚠️ Failed to extract promotion link.")
-            item_data["promotion_link"] = promo_link
-            offers.append(item_data)
-
-        # 🔄 Check for "Next" page
-        next_selector = await get_selector(await page.content(), "Next page button")
-        if next_selector:
+        # Handle promotion link (already known if the marketplace API handed it to us)
+        promo_link = item_data.get("promotion_link") or ""
+        if not promo_link and site_info.get("promote_button_selector") and site_info.get("promotion_link_selector"):
             try:
-                print("➡️ Found pagination button. Moving to next page...")
-                await page.click(next_selector)
-                await page.wait_for_timeout(2000)
-                page_number += 1
-            except Exception as e:
-                print(f"⚠️ Pagination failed: {e}")
-                break
+                btn = await element.query_selector(site_info["promote_button_selector"])
+                handles.append(btn)
+                if btn:
+                    await btn.click()
+                    await page.wait_for_timeout(2000)
+                    link_el = await page.query_selector(site_info["promotion_link_selector"])
+                    handles.append(link_el)
+                    if link_el:
+                        promo_link = await link_el.get_attribute("value")
+            except:
+                print("⚠️ Failed to extract promotion link.")
+        item_data["promotion_link"] = promo_link
+        return item_data
+    finally:
+        await _dispose(element, *handles)
+
+# Catalog pages opened side by side when pages are URL-addressable
+PARALLEL_PAGES = 3
+
+async def scrape_catalog_page(page, site_info, content_selector, sink=None, offers=None, skip=0, capture=None,
+                              checkpoint=None, page_number=1):
+    """Process the cards currently on `page` (after the first `skip`). Returns how many cards were seen."""
+    def emit(item_data):
+        # Parsed into the canonical typed record once, here; everything downstream reads that
+        item_data = normalize_record(item_data)
+        if sink is not None:
+            sink.write(item_data)
         else:
-            print("🛑 No more pages detected.")
-            break
+            offers.append(item_data)
+        if checkpoint is not None:
+            checkpoint.card_written(page_number)
+
+    content_elements = await page.query_selector_all(content_selector)
+    print(f"🔍 Found {len(content_elements)} product cards.")
+
+    # Deterministic label/value pass over every card on the page (GPT only for unseen labels)
+    try:
+        extracted = await extract_cards(page, content_selector, ask=ask_for("structured", "card_labels"))
+    except Exception as e:
+        print(f"⚠️ In-page card extraction failed, falling back to GPT: {e}")
+        extracted = []
+
+    if capture is not None:
+        await capture.settle()
+
+    await _dispose(*content_elements[:skip])
+    for index in range(skip, len(content_elements)):
+        # Drop our references as we go so each card can be collected once it's written
+        element, content_elements[index] = content_elements[index], None
+        item_data = {}
+        if index < len(extracted):
+            item_data, extracted[index] = extracted[index], None
+
+        # Prefer the marketplace's own JSON for this card when we captured it
+        captured = capture.match(item_data) if capture is not None else None
+        if captured:
+            item_data = {**item_data, **captured}
+
+        emit(await process_card(page, element, item_data, site_info))
+
+    if not content_elements and capture is not None:
+        # Card selector found nothing, but the API gave us the listing anyway
+        unclaimed = capture.unclaimed()
+        if unclaimed:
+            print(f"📡 Using {len(unclaimed)} captured API offers (no DOM cards matched).")
+            for record in unclaimed:
+                emit(dict(record))
+            capture.claim_all()
+
+    return len(content_elements)
+
+async def _restore_position(page, paginator, checkpoint):
+    """Line the paginator up with the checkpointed page the resumed run reopened."""
+    target = checkpoint["page_number"] or 1
+    kind = paginator.strategy["type"]
+    if target <= paginator.page_number or kind in ("url_param", "infinite_scroll", "none"):
+        return
+    if page.url != checkpoint["catalog_url"]:
+        paginator.page_number = target  # the page URL itself encodes the position
+        return
+    # Script-driven pagination: click forward without scraping anything
+    print(f"⏩ Fast-forwarding to page {target}...")
+    while paginator.page_number < target and await paginator.advance(page):
+        pass
+
+async def scrape_affiliate_cards(page, site_info, selectors, sink=None, capture=None, checkpoint=None):
+    """
+    Scrape every catalog page. With a `sink` (see offer_sink.JsonlSink) each card is
+    written out as soon as it's processed and nothing is accumulated in memory.
+    With a `checkpoint`, pages and cards it already records are skipped.
+    """
+    offers = []
+
+    # Handle dropdown to increase items per page
+    if site_info.get("has_page_size_dropdown"):
+        try:
+            await page.click(site_info["page_size_dropdown_selector"])
+            await page.click(site_info["max_items_option_selector"])
+            await page.wait_for_timeout(2000)
+            print("✅ Maximized items per page.")
+        except:
+            print("⚠️ Pagination optimization failed.")
 
+    content_selector = selectors.get("product_card_selector")
+    if not content_selector:
+        print("⚠️ No product_card_selector returned.")
+        return offers
+
+    # Work out how this catalog paginates once, up front — no per-page GPT lookups
+    paginator = await Paginator.detect(page, item_selector=content_selector)
+    if checkpoint is not None:
+        await _restore_position(page, paginator, checkpoint)
+
+    def done_on(number):
+        return checkpoint.cards_done(number) if checkpoint is not None else 0
+
+    async def scrape_page(catalog_page, number, skip=None):
+        seen = await scrape_catalog_page(
+            catalog_page, site_info, content_selector, sink, offers, capture=capture,
+            skip=done_on(number) if skip is None else skip, checkpoint=checkpoint, page_number=number,
+        )
+        if checkpoint is not None:
+            checkpoint.page_finished(number)
+        return seen
+
+    remaining = paginator.remaining_urls()
+    if remaining:
+        first = paginator.page_number
+        if checkpoint is None or not checkpoint.is_finished(first):
+            print(f"📄 Scraping page {first}...")
+            await scrape_page(page, first)
+
+        # In batches: a windowed pager ("1 2 3 4 5 Next") only links a few pages
+        # ahead, so the furthest page of each batch is checked for links further on
+        while remaining:
+            numbers = {url: n for n, url in enumerate(remaining, paginator.page_number + 1)}
+            furthest = paginator.page_number + len(remaining)
+            todo = [url for url in remaining
+                    if checkpoint is None or not checkpoint.is_finished(numbers[url]) or numbers[url] == furthest]
+            print(f"⚡ Fetching {len(todo)} more pages (up to {furthest}) directly, {PARALLEL_PAGES} at a time...")
+
+            async def handle(catalog_page, url, numbers=numbers, furthest=furthest):
+                number = numbers[url]
+                if not await paginator.has_content(catalog_page):
+                    print(f"🛑 {url} has no catalog items.")
+                    return False
+                if number == furthest:
+                    await paginator.observe(catalog_page, number)
+                if checkpoint is None or not checkpoint.is_finished(number):
+                    print(f"📄 Scraping {url}...")
+                    await scrape_page(catalog_page, number)
+                return True
+
+            results = await map_pages_parallel(
+                page.context, todo, handle, concurrency=PARALLEL_PAGES,
+                on_page=capture.attach if capture is not None else None,
+            )
+            paginator.page_number = furthest
+            if not all(results):
+                return offers  # ran past the end
+            remaining = paginator.remaining_urls()
+
+        finished = paginator.last_page and paginator.page_number >= paginator.last_page
+        if finished or not paginator.more:
+            return offers
+        # Still a Next but no more numbered links: carry on one page at a time from the furthest page
+        if not await paginator.advance(page):
+            return offers
+        if checkpoint is not None:
+            checkpoint.page_reached(paginator.page_number, page.url)
+
+    # Serial pagination: the next page(s) load in background tabs while this one is processed
+    prefetcher = PagePrefetcher(page.context, PREFETCH_DEPTH, on_page=capture.attach if capture is not None else None)
+    timer = PageTimer()
+    current = page
+    seen = 0
+    infinite = paginator.strategy["type"] == "infinite_scroll"
+    # Infinite scroll restarts from the top of the feed; skip every card already written
+    resumed_cards = checkpoint["offers_written"] if checkpoint is not None and infinite else 0
+    try:
+        while True:
+            upcoming = await paginator.upcoming_urls(current, PREFETCH_DEPTH)
+            prefetcher.prefetch(upcoming)
+            print(f"📄 Scraping page {paginator.page_number}...")
+            # Infinite scroll keeps earlier cards in the DOM; skip the ones already written
+            skip = max(seen, resumed_cards) if infinite else None
+            seen = await scrape_page(current, paginator.page_number, skip=skip)
+            timer.processed()
+
+            ready = await prefetcher.take(upcoming[0]) if upcoming else None
+            if ready is not None and await paginator.has_content(ready):
+                if current is not page:
+                    await current.close()
+                current = ready
+                paginator.page_number += 1
+                timer.reached("prefetched")
+                if checkpoint is not None:
+                    checkpoint.page_reached(paginator.page_number, current.url)
+                continue
+            if ready is not None:
+                await ready.close()
+                break  # prefetched past the end
+            if not await paginator.advance(current):
+                break
+            timer.reached("direct")
+            if checkpoint is not None:
+                checkpoint.page_reached(paginator.page_number, current.url)
+    finally:
+        await prefetcher.close()
+        if current is not page:
+            await current.close()
+
+    timer.report()
+    print("🛑 No more pages detected.")
     return offers
 
+ITEM_SELECTOR_KEY = re.compile(r"card|item|row|article|entry|post|listing|result")
+
 async def scrape_general_site(page, selectors):
     html = await page.content()
-    field_list = await get_selectors_from_strategy(html)
-
-    result = {}
 
-    for field in field_list:
-        sel = await get_selector(html, field)
-        if sel:
-            try:
-                el = await page.query_selector(sel)
-                if el:
-                    # Extract href if it's a link-related field
-                    if "link" in field.lower():
-                        text = await el.get_attribute("href")
-                    else:
-                        text = await el.inner_text()
-                    if text:
-                        result[field.lower().replace(" ", "_")] = text.strip()
-                    else:
-                        print(f"⚠️ No text found for field '{field}' using selector '{sel}'")
-                else:
-                    print(f"⚠️ Element not found for selector: {sel} → field: {field}")
-            except Exception as e:
-                print(f"❌ Error while querying selector {sel}: {e}")
-        else:
+    # Repeating unit: reuse one from the strategy selectors, otherwise ask. Not through
+    # the healer: a healed selector pins one element, and these must match every item.
+    item_selector = next(
+        (sel for key, sel in selectors.items() if sel and ITEM_SELECTOR_KEY.search(key) and "pagination" not in key),
+        None,
+    )
+    if not item_selector:
+        item_selector = await locate(page, "item", "Repeating container element for each listed item (card, row, article)", html)
+
+    item_html = html
+    if item_selector:
+        try:
+            item_html = await page.eval_on_selector(item_selector, "(el) => el.outerHTML")
+        except Exception:
+            print(f"⚠️ Item selector matched nothing: {item_selector} — extracting page-level fields only.")
+            item_selector = None
+
+    field_list = await get_listing_fields(item_html)
+    if not field_list:
+        return []
+
+    # Every field's selector relative to the item, in one call, so it matches in each item
+    field_selectors = await get_item_selectors(item_html, field_list)
+    for field, sel in field_selectors.items():
+        if not sel:
             print(f"⚠️ No selector returned for field: {field}")
 
-    return [result] if result else []
+    rows = await extract_rows(page, item_selector, field_selectors)
+    print(f"📋 Extracted {len(rows)} item(s) × {sum(1 for s in field_selectors.values() if s)} field(s) in one pass.")
+    return rows
 
 async def dismiss_cookie_popup_if_present(page):
     """
@@ -265,84 +499,237 @@ async def dismiss_cookie_popup_if_present(page):
 
 MAX_HTML_ATTEMPTS = 3
 # Main dynamic researcher agent
-async def researcher():
+async def researcher(resume=False):
+    from playwright.async_api import async_playwright
+
+    settings.require(*REQUIRED_ENV)
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
+        browser = await p.chromium.launch(headless=replay.is_replaying())
+        context = await browser.new_context(**replay.context_options())
+        await replay.attach(context)
+        try:
+            await run_research(context, resume=resume)
+        finally:
+            # Closing the context explicitly flushes the HAR when recording fixtures
+            await context.close()
+            await browser.close()
+
 
-        print(f"🌐 Visiting {TARGET_URL}...")
-        await page.goto(TARGET_URL)
-        await page.wait_for_load_state("networkidle")
-        await page.wait_for_timeout(1000)
+async def open_catalog(page, target_url, consent=None, healer=None):
+    """
+    Steps 1–5 of a fresh run: cookie dialog, site analysis, login, navigation to
+    the catalog and selector strategy. Returns (site_analysis, site_info, selectors,
+    capture), or None if there is nothing to scrape.
+    """
+    print(f"🌐 Visiting {target_url}...")
+    await page.goto(target_url)
+    await page.wait_for_load_state("networkidle")
+    await page.wait_for_timeout(1000)
 
-        # Step 1: Handle cookie popup
+    # Step 1: Handle cookie popup
+    if consent is None or not await consent.settle(page):
         await dismiss_cookie_popup_if_present(page)
 
-        html = None
-        for attempt in range(MAX_HTML_ATTEMPTS):
-            await page.wait_for_timeout(1500 + attempt * 500)
-            html = await page.content()
+    html = None
+    for attempt in range(MAX_HTML_ATTEMPTS):
+        await page.wait_for_timeout(1500 + attempt * 500)
+        html = await page.content()
 
-            if await html_looks_valid(html):
-                print(f"✅ Valid HTML detected on attempt {attempt+1}")
-                break
-            else:
-                print(f"⚠️ Attempt {attempt+1}: HTML still looks invalid... retrying...")
+        if await html_looks_valid(html):
+            print(f"✅ Valid HTML detected on attempt {attempt+1}")
+            break
+        else:
+            print(f"⚠️ Attempt {attempt+1}: HTML still looks invalid... retrying...")
 
-        if not html or not await html_looks_valid(html):
-            print("❌ Failed to retrieve valid HTML after multiple attempts.")
-            await browser.close()
-            return
+    if not html or not await html_looks_valid(html):
+        print("❌ Failed to retrieve valid HTML after multiple attempts.")
+        return None
 
-        # 👇 Continue site analysis with clean HTML
-        site_analysis = await analyze_site(html)
+    # 👇 Continue site analysis with clean HTML
+    site_analysis = await analyze_site(html)
 
-        await page.wait_for_timeout(1000)  # small buffer
+    await page.wait_for_timeout(1000)  # small buffer
 
-        # Step 2: Analyze the site structure
-        html = await page.content()
-        site_analysis = await analyze_site(html)
-        print("🧠 Site Analysis:", site_analysis)
-
-        has_login = site_analysis.get("has_login", False)
-        site_type = site_analysis.get("site_type", "unknown")
-
-        # Step 3: Login if required
-        if has_login:
-            print("🔐 Site requires login. Attempting login...")
-            await login_if_needed(page, html)
-            await page.wait_for_timeout(1500)
-            html = await page.content()  # Refresh HTML after login
-        else:
-            print("✅ No login required.")
+    # Step 2: Analyze the site structure
+    html = await page.content()
+    site_analysis = await analyze_site(html)
+    print("🧠 Site Analysis:", site_analysis)
+
+    has_login = site_analysis.get("has_login", False)
+    site_type = site_analysis.get("site_type", "unknown")
+
+    # Step 3: Login if required
+    if has_login:
+        print("🔐 Site requires login. Attempting login...")
+        deltas = DomDelta()
+        await login_if_needed(page, html, healer=healer, deltas=deltas)
+        deltas.report()
+        if healer is not None:
+            healer.save()
+        await page.wait_for_timeout(1500)
+        html = await page.content()  # Refresh HTML after login
+    else:
+        print("✅ No login required.")
 
-        # Step 4: Navigate to marketplace/content area
-        site_info = await navigate_to_target_area(page, site_analysis)
-        if not site_info:
-            print("🛑 Exiting: No scrapeable content detected.")
-            await browser.close()
-            return
+    # Opt-in: harvest the marketplace's XHR/JSON responses from here on
+    capture = ResponseCapture().attach(page) if network_capture.ENABLED else None
 
-        # Step 5: Get selectors after reaching main content
-        html = await page.content()
-        selectors = await get_selectors_from_strategy(html, site_type)
-        if not selectors:
-            print("🛑 Exiting: No selectors returned by GPT.")
-            await browser.close()
-            return
+    # Step 4: Navigate to marketplace/content area
+    site_info = await navigate_to_target_area(page, site_analysis, consent=consent)
+    if not site_info:
+        print("🛑 Exiting: No scrapeable content detected.")
+        return None
+
+    # Step 5: Get selectors after reaching main content
+    html = await page.content()
+    selectors = await get_selectors_from_strategy(html, site_type)
+    if not selectors:
+        print("🛑 Exiting: No selectors returned by GPT.")
+        return None
+    return site_analysis, site_info, selectors, capture
+
+
+async def reopen_catalog(page, checkpoint, consent=None):
+    """
+    Resume: restore the saved session and go straight back to the checkpointed
+    catalog page. Returns False if the session no longer gets us there.
+    """
+    if not await checkpoint.restore_session(page.context):
+        return False
+    url = checkpoint["page_url"] or checkpoint["catalog_url"]
+    print(f"♻️ Resuming {checkpoint['target_url']} at page {checkpoint['page_number']} ({checkpoint['offers_written']} offers already written)...")
+    if consent is not None:
+        await consent.add_cookies(page.context, url)
+    await page.goto(url)
+    await page.wait_for_load_state("networkidle")
+    await page.wait_for_timeout(1000)
+    if consent is not None and not await consent.settle(page):
+        await dismiss_cookie_popup_if_present(page)
+
+    if not await _reaches_catalog(page, checkpoint["site_info"], checkpoint["selectors"]):
+        print("⚠️ Checkpointed session no longer reaches the catalog; starting over.")
+        return False
+    return True
+
+
+async def revisit_catalog(page, site, consent=None):
+    """
+    A later run on a target whose catalog an earlier run found (the daemon keeps
+    `site` between cycles): go straight to the catalog with the carried-over session,
+    skipping site analysis, login and the selector strategy. Returns False if the
+    session or the layout no longer gets us there.
+    """
+    url = site["catalog_url"]
+    print(f"♻️ Reusing the last run's site analysis; going straight to {url}...")
+    if consent is not None:
+        await consent.add_cookies(page.context, url)
+    await page.goto(url)
+    await page.wait_for_load_state("networkidle")
+    await page.wait_for_timeout(1000)
+    if consent is not None and not await consent.settle(page):
+        await dismiss_cookie_popup_if_present(page)
+
+    if not await _reaches_catalog(page, site["site_info"], site["selectors"]):
+        print("⚠️ Session no longer reaches the catalog (logged out or layout changed); starting from the landing page.")
+        return False
+    return True
 
-        # Step 6: Scrape content based on site type
-        offers = await scrape(page, site_info, selectors)
 
-        # Step 7: Enrich the scraped offers
-        enriched = enrich_offers(offers)
-        print("✅ Enriched Offers:")
-        for offer in enriched:
-            print(offer)
+async def _reaches_catalog(page, site_info, selectors):
+    card_selector = selectors.get("product_card_selector")
+    if site_info.get("site_type") == "affiliate" and card_selector:
+        return await page.evaluate("(sel) => document.querySelectorAll(sel).length > 0", card_selector)
+    return True
 
-        await browser.close()
+
+async def run_research(context, target_url=TARGET_URL, resume=False, site=None):
+    """
+    One research run: catalog → offers JSONL → ranked, enriched offers. `site` is an
+    optional dict a caller keeps between runs on the same target: when it holds an
+    earlier run's layout it is tried first (see revisit_catalog), and a fresh run
+    fills it in.
+    """
+    # Consent banners are suppressed before render; clicking them away is the fallback
+    consent = await ConsentGuard().install(context, target_url) if consent_handling.ENABLED else None
+    page = await context.new_page()
+
+    # Fingerprints of located elements, so broken selectors are repaired locally next time
+    healer = SelectorHealer()
+    offers_path = offers_path_for(target_url)
+
+    checkpoint = Checkpoint.load(target_url) if resume else None
+    if resume and checkpoint is None:
+        print("ℹ️ No checkpoint to resume from; starting a fresh run.")
+    capture = None
+    if checkpoint is not None and checkpoint.stage == "scraping":
+        capture = ResponseCapture().attach(page) if network_capture.ENABLED else None
+        if not await reopen_catalog(page, checkpoint, consent=consent):
+            checkpoint.clear()
+            checkpoint = None
+            await page.close()
+            page = await context.new_page()
+
+    if checkpoint is None and site:
+        capture = ResponseCapture().attach(page) if network_capture.ENABLED else None
+        if await revisit_catalog(page, site, consent=consent):
+            checkpoint = Checkpoint(target_url)
+            await checkpoint.start_scraping(context, site["site_analysis"], site["site_info"], site["selectors"], page.url)
+            truncate_jsonl(offers_path, 0)
+        else:
+            site.clear()
+            await page.close()
+            page = await context.new_page()
+
+    if checkpoint is None:
+        opened = await open_catalog(page, target_url, consent=consent, healer=healer)
+        if opened is None:
+            return
+        site_analysis, site_info, selectors, capture = opened
+        checkpoint = Checkpoint(target_url)
+        await checkpoint.start_scraping(context, site_analysis, site_info, selectors, page.url)
+        if site is not None:
+            site.update(site_analysis=site_analysis, site_info=site_info, selectors=selectors, catalog_url=page.url)
+        # Anything left from an earlier, abandoned run is superseded
+        truncate_jsonl(offers_path, 0)
+
+    # Step 6: Scrape content based on site type, streaming each offer to disk
+    if checkpoint.stage == "scraping":
+        kept = truncate_jsonl(offers_path, checkpoint["offers_written"])
+        if kept < checkpoint["offers_written"]:
+            print(f"⚠️ Offers file holds {kept} of {checkpoint['offers_written']} checkpointed offers; resuming from {kept}.")
+            checkpoint.rewind(kept)
+        with JsonlSink(offers_path, append=True) as sink:
+            checkpoint.sink = sink
+            await scrape(page, checkpoint["site_info"], checkpoint["selectors"], sink=sink, capture=capture,
+                         checkpoint=checkpoint)
+        checkpoint.sink = None
+        checkpoint.finish_scraping()
+        print(f"💾 Wrote {sink.count} offers to {offers_path}" + (f" ({kept} kept from the interrupted run)" if kept else ""))
+    else:
+        print(f"♻️ Catalog already scraped to {offers_path}; going straight to ranking.")
+    if capture is not None:
+        print(f"📡 Network capture: {capture.responses} API responses, {capture.matched} cards matched without DOM clicks.")
+    healer.report()
+    get_router().report()
+    get_router().scheduler.report()
+    get_router().save()
+    healer.save()
+    if consent is not None:
+        consent.report()
+    debug_artifacts.get_writer().report()
+
+    # Step 7: Rank the catalog and enrich only the top offers
+    from ranker import rank_jsonl  # numpy is only needed once scraping is done
+
+    offers = rank_jsonl(offers_path)
+    enriched = await enrich_offers(offers)
+    print("✅ Enriched Offers:")
+    for offer in enriched:
+        print(offer)
+    checkpoint.clear()
+    return enriched
 
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(researcher())
+    # --resume: continue from the last checkpoint of an interrupted run
+    asyncio.run(researcher(resume="--resume" in sys.argv[1:]))
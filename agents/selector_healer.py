@@ -0,0 +1,288 @@
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Local selector repair. Every element we locate successfully gets a fingerprint
+# (tag, text, key attributes, ancestor path, nearby label text) stored per site.
+# When its selector stops matching on a later run — a renamed class, a
+# reshuffled form — the element is re-found with one in-page scan plus fuzzy
+# scoring, and GPT is only asked when no candidate scores above the threshold.
+#
+#   healer = SelectorHealer()
+#   sel = await healer.locate(page, "login:email", fallback=lambda: get_selector(html, "Email input"))
+#   healer.report()
+
+FINGERPRINTS_PATH = Path("memory/selector_fingerprints.json")
+HEAL_THRESHOLD = float(os.getenv("HUSTLE_HEAL_THRESHOLD", "0.72"))
+# Best candidate must beat the runner-up by this much, or the match is ambiguous
+HEAL_MARGIN = 0.05
+MAX_CANDIDATES = 2000
+
+# Score weights per fingerprint part (parts missing on both sides are skipped)
+WEIGHTS = {
+    "tag": 0.10,
+    "text": 0.25,
+    "attrs": 0.30,
+    "labels": 0.15,
+    "ancestors": 0.20,
+}
+
+FINGERPRINT_ATTRS = ["id", "name", "type", "class", "role", "aria-label", "placeholder", "title", "alt", "href", "data-testid", "data-test", "data-qa"]
+
+# Shared in-page helpers: fingerprint an element and build a stable selector for it
+_PAGE_HELPERS = """
+const ATTRS = %(attrs)s;
+const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim().slice(0, 200);
+const esc = (s) => (window.CSS && CSS.escape) ? CSS.escape(s) : s.replace(/([^a-zA-Z0-9_-])/g, '\\\\$1');
+const fingerprint = (el) => {
+    const attrs = {};
+    for (const name of ATTRS) {
+        let value = el.getAttribute(name);
+        if (value == null || value === '') continue;
+        if (name === 'href') { try { value = new URL(value, location.href).pathname; } catch (e) {} }
+        attrs[name] = value.slice(0, 200);
+    }
+    const labels = [];
+    if (el.id) {
+        const label = document.querySelector(`label[for="${el.id.replace(/"/g, '\\\\"')}"]`);
+        if (label) labels.push(norm(label.innerText));
+    }
+    const wrapping = el.closest('label');
+    if (wrapping) labels.push(norm(wrapping.innerText));
+    const labelledby = el.getAttribute('aria-labelledby');
+    if (labelledby) {
+        for (const id of labelledby.split(/\\s+/)) {
+            const ref = document.getElementById(id);
+            if (ref) labels.push(norm(ref.innerText));
+        }
+    }
+    let prev = el.previousElementSibling;
+    if (prev && norm(prev.innerText)) labels.push(norm(prev.innerText).slice(0, 80));
+    const ancestors = [];
+    for (let node = el.parentElement; node && node !== document.body && ancestors.length < 6; node = node.parentElement) {
+        ancestors.push(node.tagName.toLowerCase() + (node.id ? '#' + node.id : '')
+            + Array.from(node.classList).slice(0, 3).map((c) => '.' + c).join(''));
+    }
+    return {
+        tag: el.tagName.toLowerCase(),
+        text: norm(el.innerText || el.value),
+        attrs,
+        labels: labels.filter(Boolean),
+        ancestors,
+    };
+};
+const unique = (sel) => { try { return document.querySelectorAll(sel).length === 1; } catch (e) { return false; } };
+const selectorFor = (el) => {
+    const tag = el.tagName.toLowerCase();
+    if (el.id && unique('#' + esc(el.id))) return '#' + esc(el.id);
+    for (const name of ['data-testid', 'data-test', 'data-qa', 'name', 'aria-label', 'placeholder']) {
+        const value = el.getAttribute(name);
+        if (!value) continue;
+        const sel = `${tag}[${name}="${value.replace(/"/g, '\\\\"')}"]`;
+        if (unique(sel)) return sel;
+    }
+    const parts = [];
+    for (let node = el; node && node !== document.body; node = node.parentElement) {
+        const nodeTag = node.tagName.toLowerCase();
+        if (node !== el && node.id && unique('#' + esc(node.id))) { parts.unshift('#' + esc(node.id)); break; }
+        const siblings = node.parentElement ? Array.from(node.parentElement.children).filter((s) => s.tagName === node.tagName) : [];
+        parts.unshift(siblings.length > 1 ? `${nodeTag}:nth-of-type(${siblings.indexOf(node) + 1})` : nodeTag);
+    }
+    return parts.join(' > ');
+};
+""" % {"attrs": json.dumps(FINGERPRINT_ATTRS)}
+
+FINGERPRINT_JS = "(sel) => {" + _PAGE_HELPERS + """
+    const el = document.querySelector(sel);
+    return el ? fingerprint(el) : null;
+}"""
+
+# One pass over every element that could be the one we lost
+CANDIDATES_JS = "([tags, limit]) => {" + _PAGE_HELPERS + """
+    const out = [];
+    for (const el of document.querySelectorAll(tags.join(','))) {
+        if (!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) continue;
+        const fp = fingerprint(el);
+        fp.selector = selectorFor(el);
+        out.push(fp);
+        if (out.length >= limit) break;
+    }
+    return out;
+}"""
+
+# Elements that can stand in for each other after a redesign
+_TAG_GROUPS = [
+    {"input", "textarea", "select"},
+    {"a", "button", "input", "[role=button]"},
+]
+
+
+def _candidate_tags(tag):
+    for group in _TAG_GROUPS:
+        if tag in group:
+            return sorted(group)
+    return [tag]
+
+
+def _similarity(a, b):
+    from rapidfuzz import fuzz
+
+    return fuzz.token_set_ratio(a, b) / 100.0
+
+
+def _attrs_similarity(old, new):
+    keys = set(old) | set(new)
+    if not keys:
+        return None
+    total = 0.0
+    for key in keys:
+        if key in old and key in new:
+            total += _similarity(old[key], new[key])
+    return total / len(keys)
+
+
+def _labels_similarity(old, new):
+    if not old and not new:
+        return None
+    if not old or not new:
+        return 0.0
+    return max(_similarity(a, b) for a in old for b in new)
+
+
+def _ancestors_similarity(old, new):
+    # Tree distance: edit distance over the ancestor chains, node by node
+    from rapidfuzz.distance import Levenshtein
+
+    if not old and not new:
+        return None
+    return Levenshtein.normalized_similarity(old, new)
+
+
+def score_candidate(fingerprint, candidate):
+    """Weighted similarity in [0, 1] between a stored fingerprint and a live candidate."""
+    parts = {
+        "tag": 1.0 if fingerprint["tag"] == candidate["tag"] else 0.0,
+        "text": _similarity(fingerprint["text"], candidate["text"]) if fingerprint["text"] or candidate["text"] else None,
+        "attrs": _attrs_similarity(fingerprint["attrs"], candidate["attrs"]),
+        "labels": _labels_similarity(fingerprint["labels"], candidate["labels"]),
+        "ancestors": _ancestors_similarity(fingerprint["ancestors"], candidate["ancestors"]),
+    }
+    weight = sum(WEIGHTS[k] for k, v in parts.items() if v is not None)
+    if not weight:
+        return 0.0
+    return sum(WEIGHTS[k] * v for k, v in parts.items() if v is not None) / weight
+
+
+def best_match(fingerprint, candidates):
+    """Return (candidate, score, runner_up_score) for the highest-scoring candidate."""
+    scored = sorted(((score_candidate(fingerprint, c), i) for i, c in enumerate(candidates)), reverse=True)
+    if not scored:
+        return None, 0.0, 0.0
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+    return candidates[scored[0][1]], scored[0][0], runner_up
+
+
+class SelectorHealer:
+    def __init__(self, path=FINGERPRINTS_PATH, threshold=HEAL_THRESHOLD):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.store = self._load()
+        self.stats = {"hits": 0, "healed": 0, "escalated": 0, "new": 0, "failed": 0}  # this run
+        self._saved = dict.fromkeys(self.stats, 0)  # part of self.stats already folded into the store
+
+    def _load(self):
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                print(f"⚠️ Ignoring unreadable fingerprint store {self.path}")
+        return {"sites": {}, "stats": {}}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        totals = self.store.setdefault("stats", {})
+        for key, value in self.stats.items():
+            totals[key] = totals.get(key, 0) + value - self._saved[key]
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.store, f, indent=2)
+        os.replace(tmp, self.path)
+        self._saved = dict(self.stats)
+
+    @staticmethod
+    def _site(page):
+        return (urlparse(page.url).hostname or "").replace("www.", "")
+
+    def _entries(self, page):
+        return self.store["sites"].setdefault(self._site(page), {})
+
+    async def _matches(self, page, selector):
+        try:
+            return await page.query_selector(selector) is not None
+        except Exception:
+            return False  # invalid selector syntax counts as broken
+
+    async def remember(self, page, key, selector):
+        """Fingerprint the element `selector` finds now, for healing it later."""
+        fingerprint = await page.evaluate(FINGERPRINT_JS, selector)
+        if fingerprint:
+            self._entries(page)[key] = {"selector": selector, "fingerprint": fingerprint}
+        return fingerprint
+
+    async def heal(self, page, key):
+        """Re-find a stored element whose selector broke. Returns (selector, score) or (None, score)."""
+        entry = self._entries(page).get(key)
+        if not entry:
+            return None, 0.0
+        fingerprint = entry["fingerprint"]
+        candidates = await page.evaluate(CANDIDATES_JS, [_candidate_tags(fingerprint["tag"]), MAX_CANDIDATES])
+        candidate, score, runner_up = best_match(fingerprint, candidates)
+        if candidate is None or score < self.threshold or score - runner_up < HEAL_MARGIN:
+            return None, score
+        selector = candidate.pop("selector")
+        self._entries(page)[key] = {"selector": selector, "fingerprint": candidate}
+        return selector, score
+
+    async def locate(self, page, key, selector=None, fallback=None):
+        """
+        Resolve a working selector for `key` on this page: the given selector,
+        then the one stored from a previous run, then a local repair, and only
+        then `await fallback()` (e.g. a GPT lookup). Returns None if all fail.
+        """
+        stored = self._entries(page).get(key, {}).get("selector")
+        for candidate in dict.fromkeys(s for s in (selector, stored) if s):
+            if await self._matches(page, candidate):
+                self.stats["hits"] += 1
+                await self.remember(page, key, candidate)
+                return candidate
+
+        if stored:
+            healed, score = await self.heal(page, key)
+            if healed:
+                print(f"🩹 Healed selector for '{key}': {stored} → {healed} (score {score:.2f})")
+                self.stats["healed"] += 1
+                return healed
+            print(f"⚠️ Could not heal selector for '{key}' locally (best score {score:.2f})")
+
+        if fallback is not None:
+            # First sighting of this element isn't a repair failure
+            self.stats["escalated" if stored else "new"] += 1
+            fresh = await fallback()
+            if fresh and await self._matches(page, fresh):
+                await self.remember(page, key, fresh)
+                return fresh
+
+        self.stats["failed"] += 1
+        return None
+
+    def report(self):
+        """Print this run's counts; save() can be called any number of times before or after."""
+        attempts = self.stats["healed"] + self.stats["escalated"]
+        rate = f"{100 * self.stats['healed'] / attempts:.0f}%" if attempts else "n/a"
+        print(
+            f"🩹 Selectors: {self.stats['hits']} still valid, {self.stats['healed']} healed locally, "
+            f"{self.stats['escalated']} broken and sent to GPT, {self.stats['new']} new lookups, "
+            f"{self.stats['failed']} unresolved (local repair rate {rate})"
+        )
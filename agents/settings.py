@@ -0,0 +1,47 @@
+import os
+
+# Environment and API clients, resolved on first use rather than at import.
+# Importing an agents module must stay cheap and side-effect free: no .env
+# parsing, no client construction, no directories created, no credential
+# checks. Entry points call require() for what they actually need.
+
+_env_loaded = False
+_clients = {}
+
+
+def load_env():
+    """Load .env into os.environ (once). python-dotenv is optional."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def get(name, default=None):
+    load_env()
+    return os.getenv(name, default)
+
+
+def missing(*names):
+    return [name for name in names if not get(name)]
+
+
+def require(*names):
+    """Raise EnvironmentError naming any of `names` that aren't set."""
+    absent = missing(*names)
+    if absent:
+        raise EnvironmentError(f"Missing required environment variables in .env: {', '.join(absent)}")
+
+
+def async_openai():
+    """Shared AsyncOpenAI client, built on first call."""
+    if "async_openai" not in _clients:
+        from openai import AsyncOpenAI
+
+        _clients["async_openai"] = AsyncOpenAI(api_key=get("OPENAI_API_KEY"))
+    return _clients["async_openai"]
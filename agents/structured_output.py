@@ -0,0 +1,231 @@
+import ast
+import json
+import re
+
+# Shapes used to validate model output. A schema is one of:
+#   - a Python type (str, bool, int, float, dict, list) — value must be an instance
+#   - a tuple of types — value must match any of them
+#   - a single-item list, e.g. [str] — value must be a list whose items match the inner schema
+#   - a dict of key -> schema — value must be an object containing (at least) those keys
+#   - None — anything goes
+
+
+class StructuredOutputError(ValueError):
+    """Raised when model output cannot be repaired into valid JSON matching its schema."""
+
+    def __init__(self, message, raw=None):
+        super().__init__(message)
+        self.raw = raw
+
+
+_FENCE_RE = re.compile(r"```(?:[a-zA-Z0-9_-]+)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _strip_fences(text):
+    match = _FENCE_RE.search(text)
+    if match:
+        return match.group(1).strip()
+    # Unterminated fence (model got cut off or forgot the closing backticks)
+    if text.lstrip().startswith("```"):
+        body = text.lstrip()[3:]
+        return body.split("\n", 1)[-1] if "\n" in body else body
+    return text
+
+
+def _extract_span(text):
+    """Return the outermost balanced {...} or [...] span, skipping leading/trailing prose."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    start = min(starts)
+
+    closers = []
+    in_string = None
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == in_string:
+                in_string = None
+            continue
+        if ch in ('"', "'"):
+            in_string = ch
+        elif ch == "{":
+            closers.append("}")
+        elif ch == "[":
+            closers.append("]")
+        elif ch in "}]" and closers:
+            closers.pop()
+            if not closers:
+                return text[start:i + 1]
+
+    # Truncated output — close whatever is still open
+    tail = in_string or ""
+    return text[start:] + tail + "".join(reversed(closers))
+
+
+def _candidates(raw):
+    text = raw.strip().translate(_SMART_QUOTES)
+    text = _strip_fences(text)
+    text = _extract_span(text)
+    yield text
+
+    no_trailing = _TRAILING_COMMA_RE.sub(r"\1", text)
+    yield no_trailing
+
+
+_JS_LITERALS = {"true": "True", "false": "False", "null": "None"}
+
+
+def _pythonize_literals(text):
+    """Swap bare true/false/null for Python spellings, leaving string contents alone."""
+    out = []
+    i = 0
+    in_string = None
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 2
+                continue
+            if ch == in_string:
+                in_string = None
+        elif ch in ('"', "'"):
+            in_string = ch
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < len(text) and text[j].isalnum():
+                j += 1
+            word = text[i:j]
+            out.append(_JS_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    # Single quotes / Python-style literals (True, False, None)
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+    else:
+        if isinstance(value, (dict, list)):
+            return json.loads(json.dumps(value))
+
+    # JS-style literals inside single-quoted objects
+    try:
+        value = ast.literal_eval(_pythonize_literals(text))
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise json.JSONDecodeError("unrepairable model output", text, 0)
+    if not isinstance(value, (dict, list)):
+        raise json.JSONDecodeError("model output is not an object or array", text, 0)
+    return json.loads(json.dumps(value))
+
+
+def repair_json(raw):
+    """
+    Parse JSON out of raw model output, repairing the usual problems:
+    ```json fences, leading/trailing prose, trailing commas, single quotes and
+    Python/JS literal spellings. Raises StructuredOutputError if nothing parses.
+    """
+    if raw is None:
+        raise StructuredOutputError("model returned no output", raw)
+    if not isinstance(raw, str):
+        return raw
+
+    last_error = None
+    for candidate in _candidates(raw):
+        try:
+            return _loads(candidate)
+        except json.JSONDecodeError as e:
+            last_error = e
+    raise StructuredOutputError(f"could not repair model output: {last_error}", raw)
+
+
+def _check(value, schema, path):
+    if schema is None:
+        return
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise StructuredOutputError(f"{path}: expected object, got {type(value).__name__}")
+        for key, sub_schema in schema.items():
+            if key not in value:
+                raise StructuredOutputError(f"{path}: missing key '{key}'")
+            _check(value[key], sub_schema, f"{path}.{key}")
+        return
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            raise StructuredOutputError(f"{path}: expected array, got {type(value).__name__}")
+        item_schema = schema[0] if schema else None
+        for i, item in enumerate(value):
+            _check(item, item_schema, f"{path}[{i}]")
+        return
+    types = schema if isinstance(schema, tuple) else (schema,)
+    expected = " or ".join(t.__name__ for t in types)
+    # bool is an int subclass — don't let True satisfy an int/float field
+    if isinstance(value, bool) and bool not in types:
+        raise StructuredOutputError(f"{path}: expected {expected}, got bool")
+    if not isinstance(value, types):
+        raise StructuredOutputError(f"{path}: expected {expected}, got {type(value).__name__}")
+
+
+def validate(value, schema):
+    """Check a parsed value against a schema (see module header). Raises StructuredOutputError."""
+    _check(value, schema, "$")
+    return value
+
+
+def parse_structured(raw, schema=None):
+    """Repair + validate in one step."""
+    value = repair_json(raw)
+    try:
+        return validate(value, schema)
+    except StructuredOutputError as e:
+        e.raw = raw
+        raise
+
+
+def is_valid(raw, schema=None):
+    """True if `raw` repairs into a value matching `schema`."""
+    try:
+        parse_structured(raw, schema)
+    except StructuredOutputError:
+        return False
+    return True
+
+
+async def query_structured(ask, prompt, schema=None, max_retries=2, default=None):
+    """
+    Ask the model via `ask(prompt)` (an async callable returning text or None) and
+    return the repaired, validated value. The model is only re-asked when the
+    response cannot be repaired locally, and at most `max_retries` extra times.
+    An `ask` marked `escalates` (ai_locator.ask_for) already retried on larger
+    models inside the router, so it gets a single attempt here.
+    Returns `default` if every attempt fails.
+    """
+    attempts = 1 if getattr(ask, "escalates", False) else 1 + max_retries
+    for attempt in range(1, attempts + 1):
+        raw = await ask(prompt)
+        try:
+            return parse_structured(raw, schema)
+        except StructuredOutputError as e:
+            print(f"⚠️ Structured output rejected (attempt {attempt}/{attempts}): {e}\nRaw response: {raw}")
+    return default
@@ -3,7 +3,7 @@ const fs = require('fs');
 const path = require('path');
 const { getBrowser } = require('./browserlessClient');
 const config = require('./puppeteer.config');
-const { attemptLogin } = require('./utils');
+const { attemptLogin, preventConsentBanners } = require('./utils');
 
 async function scrapeDigistore() {
   const browser = await getBrowser();
@@ -14,6 +14,9 @@ async function scrapeDigistore() {
   const marketplaceUrl = 'https://www.digistore24-app.com/app/en/vendor/account/marketplace/all';
 
   try {
+    await preventConsentBanners(page, loginUrl);
+    await preventConsentBanners(page, marketplaceUrl);
+
     console.log("🔐 Navigating to login page...");
     await page.goto(loginUrl, config.defaultPageOptions);
 
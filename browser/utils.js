@@ -1,15 +1,39 @@
+const fs = require('fs');
+const path = require('path');
+
 const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
 
+// Consent-banner registry and init script shared with agents/consent.py
+const { cmps: CONSENT_CMPS } = require('../agents/consent_registry.json');
+const CONSENT_INIT = fs.readFileSync(path.join(__dirname, '..', 'agents', 'consent_init.js'), 'utf8').trim();
+
+// Call before the first goto: pre-accepts known CMPs and auto-dismisses the rest
+async function preventConsentBanners(page, url) {
+  const labels = new URL(url).hostname.split('.');
+  const domain = labels.length >= 2 ? '.' + labels.slice(-2).join('.') : labels.join('.');
+  const now = new Date().toISOString();
+  const cookies = CONSENT_CMPS.flatMap(cmp => cmp.cookies.map(c => ({
+    name: c.name, value: c.value.replace('{now}', now), domain, path: '/',
+  })));
+  if (cookies.length) await page.setCookie(...cookies);
+  await page.evaluateOnNewDocument(`(${CONSENT_INIT})(${JSON.stringify(CONSENT_CMPS)});`);
+}
+
+// Fallback for banners the init script didn't get to
 async function handleCookies(page) {
   try {
     console.log("🍪 Checking for cookie popup...");
-    const cookieBtn = await page.$('button#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll');
-    if (cookieBtn) {
-      await cookieBtn.click();
-      console.log("✅ Cookie consent accepted.");
-    } else {
-      console.log("ℹ️ No cookie popup detected.");
+    for (const cmp of CONSENT_CMPS) {
+      for (const selector of cmp.accept) {
+        const cookieBtn = await page.$(selector);
+        if (cookieBtn) {
+          await cookieBtn.click();
+          console.log(`✅ ${cmp.name} cookie consent accepted.`);
+          return;
+        }
+      }
     }
+    console.log("ℹ️ No cookie popup detected.");
   } catch (err) {
     console.warn("❌ Error handling cookie popup:", err.message);
   }
@@ -60,4 +84,4 @@ async function attemptLogin(page, loginUrl, email, password, maxRetries = 3) {
     }
   }
 }
-module.exports = { delay, handleCookies, attemptLogin };
+module.exports = { delay, handleCookies, preventConsentBanners, attemptLogin };
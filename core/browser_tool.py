@@ -1,90 +1,136 @@
-from playwright.sync_api import sync_playwright
-import time
-import json
-
-class BrowserTool:
-    def __init__(self, headless=True, devtools=False):
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=headless, devtools=devtools)
-        self.page = self.browser.new_page()
-
-    def close(self):
-        self.browser.close()
-        self.playwright.stop()
-
-    def goto(self, url):
+import asyncio
+import inspect
+import os
+import tempfile
+from playwright.async_api import async_playwright
+# agents/ modules by their bare names — see agents/__init__.py
+import debug_artifacts
+from llm_scheduler import estimate_tokens, get_scheduler
+from structured_output import repair_json, StructuredOutputError
+
+# AsyncBrowserTool works on a page (or context) handed to it, so vision-assisted
+# clicks can run on the researcher's shared browser and event loop, alongside
+# scraping on other pages. BrowserTool is the old blocking interface on top of it:
+# it launches its own browser and drives the async tool on a private loop.
+
+DESCRIBE_JS = """
+(els) => els.map((el, i) => {
+    const r = el.getBoundingClientRect();
+    return {
+        index: i,
+        text: (el.innerText || '').trim(),
+        aria: el.getAttribute('aria-label'),
+        alt: el.getAttribute('alt'),
+        title: el.getAttribute('title'),
+        value: el.getAttribute('value'),
+        box: r.width || r.height ? { x: r.x, y: r.y, width: r.width, height: r.height } : null,
+    };
+})
+"""
+
+CANDIDATE_SELECTOR = 'button, a, select, option, div, span, label, input'
+
+
+class AsyncBrowserTool:
+    def __init__(self, page=None, context=None):
+        if page is None and context is None:
+            raise ValueError("AsyncBrowserTool needs a page or a context")
+        self.page = page
+        self.context = context or page.context
+        self._owned = None  # (playwright, browser) when we launched them ourselves
+
+    @classmethod
+    async def launch(cls, headless=True, devtools=False):
+        """Standalone tool with its own Playwright driver and browser (closed by close())."""
+        playwright = await async_playwright().start()
+        browser = await playwright.chromium.launch(headless=headless, devtools=devtools)
+        tool = cls(page=await browser.new_page())
+        tool._owned = (playwright, browser)
+        return tool
+
+    async def ensure_page(self):
+        if self.page is None or self.page.is_closed():
+            self.page = await self.context.new_page()
+        return self.page
+
+    async def close(self):
+        if self._owned:
+            playwright, browser = self._owned
+            await browser.close()
+            await playwright.stop()
+            self._owned = None
+
+    async def goto(self, url):
         print(f"[🌐] Navigating to: {url}")
-        self.page.goto(url)
+        page = await self.ensure_page()
+        await page.goto(url)
 
-    def wait_for_selector(self, selector, timeout=10000):
+    async def wait_for_selector(self, selector, timeout=10000):
         print(f"[⏳] Waiting for selector: {selector}")
-        return self.page.wait_for_selector(selector, timeout=timeout)
+        page = await self.ensure_page()
+        return await page.wait_for_selector(selector, timeout=timeout)
 
-    def click(self, selector):
+    async def click(self, selector):
         print(f"[🖱️] Clicking: {selector}")
+        page = await self.ensure_page()
         try:
-            el = self.page.locator(selector).first
-            el.wait_for(state="visible", timeout=10000)
-            el.click()
+            el = page.locator(selector).first
+            await el.wait_for(state="visible", timeout=10000)
+            await el.click()
             print("[✅] Clicked element successfully.")
         except Exception as e:
             print(f"[❌] Click failed for selector '{selector}': {e}")
             raise
 
-    def click_by_text(self, text):
+    async def click_by_text(self, text):
         print(f"[🖱️] Clicking by text: {text}")
+        page = await self.ensure_page()
         try:
-            self.page.get_by_text(text).click(timeout=10000)
+            await page.get_by_text(text).click(timeout=10000)
         except Exception as e:
             raise RuntimeError(f"Failed to click by text: {text}") from e
 
-    def click_by_description(self, description):
+    async def click_by_description(self, description):
         print(f"[🧠] Searching for elements matching description: '{description}'")
-        candidates = self.page.locator('button, a, select, option, div, span, label, input').all()
-        print(f"[📋] Found {len(candidates)} elements")
-        descriptions = []
+        page = await self.ensure_page()
+        locator = page.locator(CANDIDATE_SELECTOR)
+        # One round trip for every candidate's description instead of six per element
+        descriptions = await locator.evaluate_all(DESCRIBE_JS)
+        print(f"[📋] Found {len(descriptions)} elements")
 
-        for i, el in enumerate(candidates):
-            try:
-                box = el.bounding_box()
-                text = el.inner_text().strip()
-                aria = el.get_attribute("aria-label")
-                alt = el.get_attribute("alt")
-                title = el.get_attribute("title")
-                value = el.get_attribute("value")
-
-                descriptions.append({
-                    "index": i,
-                    "text": text,
-                    "aria": aria,
-                    "alt": alt,
-                    "title": title,
-                    "value": value,
-                    "box": box
-                })
-            except:
-                continue
+        debug_artifacts.dump("click_candidates", descriptions, level="trace", meta={"description": description})
 
-        with open("click_candidates_debug.json", "w") as f:
-            json.dump(descriptions, f, indent=2)
-
-        for el in candidates:
+        for el in await locator.all():
             try:
-                el.hover()
-                el.click(timeout=3000)
+                await el.hover()
+                await el.click(timeout=3000)
                 print("[✅] Fuzzy click by description succeeded.")
                 return
-            except:
+            except Exception:
                 continue
 
         raise RuntimeError(f"Failed to click any element matching description: '{description}'")
 
-    def locate_and_click(self, agent, question, retry=True):
-        print(f"[🤖] Asking agent to visually locate: {question}")
-        screenshot = "temp_click.png"
-        self.page.screenshot(path=screenshot, full_page=True)
+    async def _ask_vision(self, agent, screenshot, question):
+        # A page is waiting on this, so it queues as interactive ahead of bulk generation
+        await get_scheduler().acquire("interactive", estimate_tokens(question, "vision", images=1))
+        # HustleAgent is blocking; run it off the loop so other pages keep scraping
+        locate = agent.locate_from_vision
+        if inspect.iscoroutinefunction(locate):
+            return await locate(screenshot, question)
+        return await asyncio.to_thread(locate, screenshot, question)
 
-        result = agent.locate_from_vision(screenshot, question)
+    async def locate_and_click(self, agent, question, retry=True):
+        print(f"[🤖] Asking agent to visually locate: {question}")
+        page = await self.ensure_page()
+        # Per-call file: several tools may be screenshotting at once
+        fd, screenshot = tempfile.mkstemp(prefix="click_", suffix=".png")
+        os.close(fd)
+        try:
+            await page.screenshot(path=screenshot, full_page=True)
+            result = await self._ask_vision(agent, screenshot, question)
+        finally:
+            os.remove(screenshot)
         print("[❓] Raw GPT vision output:", str(result)[:500])
 
         if not result:
@@ -92,18 +138,9 @@ class BrowserTool:
 
         if isinstance(result, str):
             try:
-                result = json.loads(result)
-            except json.JSONDecodeError:
-                print("[⚠️] GPT response was not valid JSON.")
-                start = result.find("{")
-                end = result.rfind("}") + 1
-                if start >= 0 and end > start:
-                    try:
-                        result = json.loads(result[start:end])
-                    except Exception as e:
-                        raise RuntimeError("Failed to parse JSON from GPT response.") from e
-                else:
-                    raise RuntimeError("No valid JSON structure found in GPT response.")
+                result = repair_json(result)
+            except StructuredOutputError as e:
+                raise RuntimeError("Failed to parse JSON from GPT response.") from e
 
         if not isinstance(result, dict):
             raise RuntimeError(f"Vision agent returned non-dict result: {result}")
@@ -116,20 +153,59 @@ class BrowserTool:
 
         try:
             if typ == "selector":
-                self.click(value)
+                await self.click(value)
             elif typ == "text":
-                self.click_by_text(value)
+                await self.click_by_text(value)
             elif typ == "description":
-                self.click_by_description(value)
+                await self.click_by_description(value)
             else:
                 raise RuntimeError(f"Unsupported click type: {typ}")
         except Exception as e:
             print(f"[❌] Failed to click with method '{typ}': {e}")
             if retry:
                 print("[🔁] Retrying with rephrased question...")
-                return self.locate_and_click(agent, f"(Retry) {question}", retry=False)
+                return await self.locate_and_click(agent, f"(Retry) {question}", retry=False)
             else:
-                self.page.screenshot(path="failed_click_debug.png")
-                with open("last_bad_gpt_click.json", "w") as f:
-                    f.write(json.dumps({"question": question, "result": result}, indent=2))
+                meta = {"question": question, "url": page.url}
+                await debug_artifacts.screenshot(page, "failed_click", meta=meta)
+                debug_artifacts.dump("bad_gpt_click", {"question": question, "result": result}, level="error", meta=meta)
                 raise
+
+
+class BrowserTool:
+    """Blocking facade over AsyncBrowserTool, driven on a private event loop."""
+
+    def __init__(self, headless=True, devtools=False):
+        self._loop = asyncio.new_event_loop()
+        self._tool = self._run(AsyncBrowserTool.launch(headless=headless, devtools=devtools))
+
+    def _run(self, coro):
+        return self._loop.run_until_complete(coro)
+
+    @property
+    def page(self):
+        return self._tool.page
+
+    def close(self):
+        try:
+            self._run(self._tool.close())
+        finally:
+            self._loop.close()
+
+    def goto(self, url):
+        self._run(self._tool.goto(url))
+
+    def wait_for_selector(self, selector, timeout=10000):
+        return self._run(self._tool.wait_for_selector(selector, timeout=timeout))
+
+    def click(self, selector):
+        self._run(self._tool.click(selector))
+
+    def click_by_text(self, text):
+        self._run(self._tool.click_by_text(text))
+
+    def click_by_description(self, description):
+        self._run(self._tool.click_by_description(description))
+
+    def locate_and_click(self, agent, question, retry=True):
+        return self._run(self._tool.locate_and_click(agent, question, retry=retry))
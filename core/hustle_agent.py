@@ -1,15 +1,19 @@
 import os
 import json
 import base64
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
+# agents/ modules by their bare names — see agents/__init__.py
+from settings import get as get_setting
+from model_router import model_for
+from structured_output import repair_json, StructuredOutputError
 
 class HustleAgent:
-    def __init__(self, model="gpt-4o", client=None):
-        self.model = model
-        self.client = client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model=None, client=None):
+        self.model = model or model_for("structured")
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=get_setting("OPENAI_API_KEY"))
+        self.client = client
 
     def _encode_image(self, image_path):
         with open(image_path, "rb") as f:
@@ -41,8 +45,8 @@ class HustleAgent:
 
         if expect_json:
             try:
-                return json.loads(content)
-            except json.JSONDecodeError:
+                return repair_json(content)
+            except StructuredOutputError:
                 print("[⚠️] GPT response was not valid JSON.")
                 return {"type": "text", "value": content}
 
@@ -52,7 +56,7 @@ class HustleAgent:
         prompt = f"""
         Enrich this affiliate offer for marketing:
 
-        Name: {offer.get("name")}
+        Name: {offer.get("title") or offer.get("name")}
         Description: {offer.get("description")}
 
         Return JSON with:
@@ -97,11 +101,20 @@ class HustleAgent:
         return result
 
     
-    def create_marketing_bundle(self, offer):
+    def create_marketing_bundle(self, offer, defaults=None):
+        """`defaults` (CTA and hashtags from a niche template) are merged in instead of generated."""
+        wanted = """
+        - short_hook: 5-10 word punchy version of the hook
+        - ad_caption: Instagram/TikTok caption format (max 300 characters)
+        - script_idea: A TikTok or Reels video script outline for this offer"""
+        if not defaults:
+            wanted += """
+        - CTA: A strong, urgent call to action
+        - hashtags: 5-8 hashtags for this offer type/platform"""
         prompt = f"""
         Given this affiliate offer:
 
-        Name: {offer.get("name")}
+        Name: {offer.get("title") or offer.get("name")}
         Description: {offer.get("description")}
         Hook: {offer.get("hook")}
         Platform: {offer.get("platform")}
@@ -109,12 +122,12 @@ class HustleAgent:
         ROI: {offer.get("roi")}
         Difficulty: {offer.get("difficulty")}
 
-        Generate a marketing bundle in JSON format:
-        - short_hook: 5-10 word punchy version of the hook
-        - ad_caption: Instagram/TikTok caption format (max 300 characters)
-        - script_idea: A TikTok or Reels video script outline for this offer
-        - CTA: A strong, urgent call to action
-        - hashtags: 5-8 hashtags for this offer type/platform
+        Generate a marketing bundle in JSON format:{wanted}
         """
-        return self.ask(prompt, expect_json=True)
+        bundle = self.ask(prompt, expect_json=True)
+        if defaults and isinstance(bundle, dict) and "short_hook" in bundle:
+            name = offer.get("title") or offer.get("name") or "this"
+            bundle.setdefault("CTA", defaults["CTA"].replace("[PRODUCT]", name))
+            bundle.setdefault("hashtags", defaults["hashtags"])
+        return bundle
 
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import time
+
+# Checks the label/value card parser against the fixture corpus and reports cards/sec.
+#   python scripts/bench_card_extractor.py [iterations]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+from card_extractor import parse_card_text, KNOWN_LABELS
+
+CORPUS_PATH = os.path.join(ROOT, "fixtures", "cards", "digistore_cards.json")
+
+
+def check_corpus(corpus):
+    failures = 0
+    for i, card in enumerate(corpus):
+        record, unknown = parse_card_text(card["text"], KNOWN_LABELS)
+        for field, expected in card["expected"].items():
+            if record.get(field) != expected:
+                failures += 1
+                print(f"[❌] card #{i} {field}: expected {expected!r}, got {record.get(field)!r}")
+        if sorted(unknown) != sorted(card.get("unknown", [])):
+            failures += 1
+            print(f"[❌] card #{i} unknown labels: expected {card.get('unknown', [])}, got {sorted(unknown)}")
+    return failures
+
+
+def benchmark(corpus, iterations):
+    texts = [card["text"] for card in corpus]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            parse_card_text(text, KNOWN_LABELS)
+    elapsed = time.perf_counter() - started
+    return len(texts) * iterations / elapsed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    failures = check_corpus(corpus)
+    print(f"[📋] {len(corpus)} fixture cards, {failures} mismatch(es)")
+
+    rate = benchmark(corpus, iterations)
+    print(f"[⚡] {rate:,.0f} cards/sec (no LLM calls)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+import time
+
+# Replays a research run's interactive selector lookups while a batch of content
+# kits streams in the background, on a compressed rate-limit window, once with
+# plain FIFO admission and once with the priority scheduler, and prints the
+# queue wait per priority class.
+#
+#   python scripts/bench_llm_scheduler.py [content_kits]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+from llm_scheduler import LLMScheduler  # noqa: E402
+from model_router import ModelRouter, StubClient, TIER_MODELS  # noqa: E402
+
+WINDOW_S = 2.0   # stands in for the 60s API window
+TPM = 20000      # per window
+RPM = 40
+LATENCIES = {TIER_MODELS["small"]: 0.04, TIER_MODELS["medium"]: 0.15, TIER_MODELS["large"]: 0.6}
+
+
+def respond(model, prompt):
+    return "#login-email" if prompt.startswith("get_selector") else "A summary. " * 400
+
+
+async def scrape(router, lookups=30):
+    # A page visit every ~100ms, each needing a selector before it can continue
+    for i in range(lookups):
+        await router.complete(f"get_selector: field {i}", task="selector", route="get_selector")
+        await asyncio.sleep(0.1)
+
+
+async def enrich(router, kits):
+    async def kit(i):
+        async for _ in router.stream(f"content_kit: offer {i} " + "details " * 1500, task="creative", route="content_kit"):
+            pass
+    await asyncio.gather(*(kit(i) for i in range(kits)))
+
+
+async def run(scheduler, kits):
+    router = ModelRouter(StubClient(respond, LATENCIES), scheduler=scheduler)
+    started = time.perf_counter()
+    await asyncio.gather(enrich(router, kits), scrape(router))
+    return time.perf_counter() - started
+
+
+async def main():
+    kits = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    for name, scheduler in (
+        ("fifo", LLMScheduler(rpm=RPM, tpm=TPM, bulk_share=1.0, window_s=WINDOW_S, prioritize=False)),
+        ("priority", LLMScheduler(rpm=RPM, tpm=TPM, window_s=WINDOW_S)),
+    ):
+        elapsed = await run(scheduler, kits)
+        print(f"\n[{name}] {elapsed:.2f}s for {kits} content kits + 30 selector lookups")
+        scheduler.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import os
+import sys
+import time
+
+# Runs a typical research-run mix of LLM calls through the model router against
+# StubClient (no API key or network), once with everything pinned to the large
+# tier as before and once with task routing, and prints per-route telemetry.
+#
+#   python scripts/bench_model_router.py [small_failure_rate]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+from model_router import ModelRouter, StubClient, TASK_TIERS, TIER_MODELS  # noqa: E402
+from structured_output import is_valid  # noqa: E402
+
+# Simulated per-call latency by model (seconds)
+LATENCIES = {TIER_MODELS["small"]: 0.04, TIER_MODELS["medium"]: 0.15, TIER_MODELS["large"]: 0.6}
+
+# (route, task, schema, count) — roughly one catalog run
+WORKLOAD = [
+    ("html_looks_valid", "classification", {"valid": bool}, 6),
+    ("analyze_site", "classification", {"has_login": bool, "site_type": str}, 4),
+    ("get_selector", "selector", None, 24),
+    ("affiliate_fields", "structured", [str], 6),
+    ("card_labels", "structured", None, 4),
+    ("content_kit", "creative", None, 2),
+]
+
+ANSWERS = {
+    "html_looks_valid": '{"valid": true}',
+    "analyze_site": '{"has_login": true, "site_type": "affiliate"}',
+    "get_selector": "#login-email",
+    "affiliate_fields": '["title", "price", "commission"]',
+    "card_labels": '{"refund window": {"field": "refund_days", "type": "number"}}',
+    "content_kit": "product_summary.txt\n" + "A summary. " * 200,
+}
+
+
+def make_responder(small_failure_rate):
+    def respond(model, prompt):
+        route = prompt.split(":", 1)[0]
+        answer = ANSWERS[route]
+        # The small model sometimes wraps its answer in prose we can't parse
+        bucket = int(hashlib.sha1(prompt.encode()).hexdigest(), 16) % 100
+        if model == TIER_MODELS["small"] and bucket < small_failure_rate * 100:
+            return "Sure! Here is what I found on the page."
+        return answer
+    return respond
+
+
+async def run(router):
+    started = time.perf_counter()
+    for route, task, schema, count in WORKLOAD:
+        for i in range(count):
+            prompt = f"{route}: request {i}"
+            if task == "creative":
+                async for _ in router.stream(prompt, task=task, route=route):
+                    pass
+                continue
+            if task == "selector":
+                validate = lambda text: text == "null" or text.startswith((".", "#")) or "[" in text  # noqa: E731
+            else:
+                validate = lambda text, schema=schema: is_valid(text, schema)  # noqa: E731
+            await router.complete(prompt, task=task, route=route, validate=validate)
+    return time.perf_counter() - started
+
+
+async def main():
+    failure_rate = float(sys.argv[1]) if len(sys.argv) > 1 else 0.15
+    responder = make_responder(failure_rate)
+
+    pinned = ModelRouter(StubClient(responder, LATENCIES), task_tiers={task: "large" for task in TASK_TIERS})
+    routed = ModelRouter(StubClient(responder, LATENCIES))
+
+    for name, router in (("pinned", pinned), ("routed", routed)):
+        elapsed = await run(router)
+        print(f"\n[{name}] {elapsed:.2f}s of model latency for {sum(w[3] for w in WORKLOAD)} requests")
+        router.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import time
+
+from playwright.async_api import async_playwright
+
+# Offers/sec for the two ways of getting a complete offer (fields + promo link)
+# off the mock marketplace SPA:
+#   dom      parse each card, then click "Promote now" and read the dialog
+#   capture  listen to the SPA's JSON API responses and match them to the cards
+#
+#   python scripts/bench_network_capture.py [offers]
+#
+# HUSTLE_CHROMIUM_PATH points at a local Chromium if Playwright's isn't installed.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+CARD_SELECTOR = ".product-card"
+
+
+async def scrape_dom(page, base, pages):
+    from card_extractor import extract_cards
+
+    offers = []
+    for n in range(1, pages + 1):
+        await page.goto(f"{base}/marketplace?page={n}")
+        await page.wait_for_selector(CARD_SELECTOR)
+        records = await extract_cards(page, CARD_SELECTOR)
+        cards = await page.query_selector_all(CARD_SELECTOR)
+        for record, card in zip(records, cards):
+            button = await card.query_selector(".promote")
+            await button.click()
+            await page.wait_for_selector("#promo-dialog", state="visible")
+            record["promotion_link"] = await page.input_value("#promo-link")
+            await page.click("#promo-close")
+            await button.dispose()
+            await card.dispose()
+            offers.append(record)
+    return offers
+
+
+async def scrape_capture(page, base, pages):
+    from card_extractor import extract_cards
+    from network_capture import ResponseCapture
+
+    capture = ResponseCapture().attach(page)
+    offers = []
+    for n in range(1, pages + 1):
+        await page.goto(f"{base}/marketplace?page={n}")
+        await page.wait_for_selector(CARD_SELECTOR)
+        await capture.settle()
+        for record in await extract_cards(page, CARD_SELECTOR):
+            captured = capture.match(record)
+            if captured:
+                record.update(captured)
+            offers.append(record)
+    return offers
+
+
+async def main():
+    from mock_marketplace import serve, PER_PAGE
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    pages = -(-count // PER_PAGE)
+    server = serve(0, count)
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    launch = {"headless": True}
+    if os.getenv("HUSTLE_CHROMIUM_PATH"):
+        launch["executable_path"] = os.getenv("HUSTLE_CHROMIUM_PATH")
+
+    try:
+        async with async_playwright() as p:
+            try:
+                browser = await p.chromium.launch(**launch)
+            except Exception as e:
+                # Both paths drive a real page (clicks, dialogs, XHR); there's nothing to compare without one
+                print(f"❌ Could not launch Chromium: {str(e).strip().splitlines()[0]}")
+                print("   Run `playwright install chromium` or set HUSTLE_CHROMIUM_PATH.")
+                return
+            for name, run in (("dom", scrape_dom), ("capture", scrape_capture)):
+                page = await browser.new_page()
+                started = time.perf_counter()
+                offers = await run(page, base, pages)
+                elapsed = time.perf_counter() - started
+                with_link = sum(1 for o in offers if o.get("promotion_link"))
+                print(f"[{name:7}] {len(offers)} offers ({with_link} with promo link) in {elapsed:.2f}s  "
+                      f"{len(offers) / elapsed:.1f} offers/sec")
+                await page.close()
+            await browser.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Compares the old stringly-typed offer dicts with normalized Offer records on a
+# synthetic catalog: memory held per offer, time to build the ranker's metric
+# matrix (string parsing per metric vs floats parsed once at scrape time), and
+# on-disk size as JSONL vs the columnar form.
+#
+#   python scripts/bench_offer_model.py [count]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+from offer import Offer, to_columns  # noqa: E402
+from ranker import metric_matrix  # noqa: E402
+
+
+def raw_offer(i, rng):
+    """A card as the scraper used to emit it: every value a display string."""
+    return {
+        "title": f"Offer {i} — {rng.choice(['Keto', 'Guitar', 'Forex', 'Yoga', 'Dog Training'])} Masterclass",
+        "vendor": f"vendor{i % 300}",
+        "description": "Step-by-step program with bonuses and a 60 day money-back guarantee.",
+        "price": f"${rng.uniform(7, 297):,.2f}",
+        "commission": f"{rng.choice([30, 40, 50, 60, 75]):.2f}%",
+        "earnings_per_cart_visitor": f"${rng.uniform(0.1, 4):.2f}",
+        "net_earnings_per_sale": f"${rng.uniform(5, 150):.2f}",
+        "cart_conversion": f"{rng.uniform(1, 20):.2f}%",
+        "cancellation_rate": f"{rng.uniform(0, 25):.2f}%",
+        "online_since": f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2015, 2024)}",
+        "sales_page_url": f"https://example.com/p/{i}",
+        "promotion_link": f"https://example.com/redir/{i}/AFFILIATE",
+    }
+
+
+def held_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    items = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return items, size
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(7)
+    lines = [json.dumps(raw_offer(i, rng)) for i in range(count)]
+
+    raw, raw_bytes = held_bytes(lambda: [json.loads(line) for line in lines])
+    offers, offer_bytes = held_bytes(lambda: [Offer.from_dict(json.loads(line)) for line in lines])
+    parse_s = timed(lambda: [Offer.from_dict(record) for record in raw], repeat=1)
+
+    raw_matrix_s = timed(lambda: metric_matrix(raw))
+    typed_matrix_s = timed(lambda: metric_matrix(offers))
+
+    jsonl_size = sum(len(line) + 1 for line in lines)
+    typed_jsonl_size = sum(len(offer.to_json()) + 1 for offer in offers)
+    columnar_size = len(json.dumps(to_columns(offers), default=str))
+
+    print(f"📦 {count} offers")
+    print(f"   memory     dicts {raw_bytes / count:,.0f} B/offer → Offer {offer_bytes / count:,.0f} B/offer")
+    print(f"   normalize  {1000 * parse_s:.0f}ms once at scrape time ({1e6 * parse_s / count:.1f}µs/offer)")
+    print(f"   ranking    metric matrix from strings {1000 * raw_matrix_s:.0f}ms → from typed {1000 * typed_matrix_s:.0f}ms")
+    print(f"   storage    JSONL {jsonl_size / 1e6:.2f} MB, typed JSONL {typed_jsonl_size / 1e6:.2f} MB, "
+          f"columnar {columnar_size / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Compares memory growth of collecting offers in a list with the streaming JSONL
+# sink, over a 10k-card catalog. Both modes run the researcher's real
+# scrape_catalog_page/process_card loop, against an in-process fake page (no
+# browser needed): each card handle holds HANDLE_BYTES of markup until it is
+# disposed, so a leaked handle shows up in RSS and in the live-handle count.
+# Model calls are switched off (unknown card labels stay raw).
+# Real Playwright handles pin their DOM node in the browser process instead, so
+# treat the RSS figures as the Python side only; the live-handle peak is the
+# part that carries over.
+#   python scripts/bench_offer_stream.py [cards]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+CORPUS_PATH = os.path.join(ROOT, "fixtures", "cards", "digistore_cards.json")
+SAMPLE_EVERY = 1000
+CARDS_PER_PAGE = 100
+HANDLE_BYTES = 8_000  # rough size of one card's inner_html
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class FakeHandle:
+    live = 0
+    peak = 0
+
+    def __init__(self, text, index):
+        self.text = text
+        self.markup = "<div>" + ("x" * HANDLE_BYTES) + f"{index}</div>"
+        FakeHandle.live += 1
+        FakeHandle.peak = max(FakeHandle.peak, FakeHandle.live)
+
+    async def dispose(self):
+        if self.markup is not None:
+            self.markup = None
+            FakeHandle.live -= 1
+
+    async def inner_text(self):
+        return self.text
+
+    async def inner_html(self):
+        return self.markup
+
+    async def query_selector(self, selector):
+        return None
+
+
+class FakePage:
+    """Just enough of a Playwright page for scrape_catalog_page on one catalog page."""
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    async def evaluate(self, script, *args):
+        return [{"text": text} for text in self.texts]
+
+    async def query_selector_all(self, selector):
+        return [FakeHandle(text, i) for i, text in enumerate(self.texts)]
+
+    async def query_selector(self, selector):
+        return None
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+
+def catalog_pages(count):
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        texts = [card["text"] for card in json.load(f)]
+    cards = [texts[i % len(texts)].replace("\n", f" #{i}\n", 1) for i in range(count)]
+    for start in range(0, count, CARDS_PER_PAGE):
+        yield cards[start:start + CARDS_PER_PAGE]
+
+
+async def run_mode(mode, count):
+    import researcher
+    from offer_sink import JsonlSink
+
+    researcher.ask_for = lambda *args: None  # no label lookups: this measures the loop, not the model
+
+    samples = []
+    offers = []
+    seen = 0
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp, JsonlSink(os.path.join(tmp, "offers.jsonl")) as sink:
+        for texts in catalog_pages(count):
+            await researcher.scrape_catalog_page(FakePage(texts), {}, ".card",
+                                                 sink=sink if mode == "stream" else None, offers=offers)
+            seen += len(texts)
+            if seen % SAMPLE_EVERY == 0:
+                samples.append(round(rss_mb(), 1))
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"mode": mode, "samples": samples, "seconds": round(elapsed, 2),
+                      "peak_handles": FakeHandle.peak, "leaked_handles": FakeHandle.live}))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        asyncio.run(run_mode(sys.argv[2], int(sys.argv[3])))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    for mode in ("list", "stream"):
+        # Separate interpreters so one mode's heap doesn't skew the other
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, str(count)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        samples = result["samples"]
+        growth = samples[-1] - samples[0] if samples else 0
+        print(f"[{mode:6}] {count} cards in {result['seconds']}s  RSS every {SAMPLE_EVERY}: {samples}  "
+              f"growth {growth:+.1f} MB  live handles peak {result['peak_handles']}, leaked {result['leaked_handles']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Compares the two page representations for selector prompts over the fixture
+# pages in fixtures/pages: clean_html (first 7000 chars, as get_selector sends)
+# vs the accessibility outline (page_outline). Always reports prompt size; with
+# OPENAI_API_KEY set it also asks the model for every target in targets.json
+# both ways and reports latency and selector hit rate (the returned selector
+# must match the expected element, or the same set of elements for repeated
+# items).
+#
+#   python scripts/bench_page_outline.py
+#
+# HUSTLE_CHROMIUM_PATH points at a local Chromium if Playwright's isn't installed.
+# The outline is built by the browser; if none can be launched, only the
+# clean_html side is reported (read straight from the static fixture files).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+PAGES_DIR = Path(ROOT) / "fixtures" / "pages"
+
+MATCHES_JS = """
+([got, expected]) => {
+    try {
+        const found = Array.from(document.querySelectorAll(got));
+        const wanted = Array.from(document.querySelectorAll(expected));
+        if (!found.length) return false;
+        if (wanted.length > 1) return found.length === wanted.length && found.every((el) => wanted.includes(el));
+        return found[0] === wanted[0];
+    } catch (e) {
+        return false;
+    }
+}
+"""
+
+
+def approx_tokens(text):
+    return len(text) // 4
+
+
+async def ask_both(page, html, outline, targets):
+    from ai_locator import get_selector, get_selector_in_outline
+
+    results = {"html": [0, 0.0], "outline": [0, 0.0]}
+    for description, expected in targets.items():
+        for name, ask in (("html", lambda: get_selector(html, description)),
+                          ("outline", lambda: get_selector_in_outline(outline, description))):
+            started = time.perf_counter()
+            selector = await ask()
+            results[name][1] += time.perf_counter() - started
+            hit = bool(selector) and await page.evaluate(MATCHES_JS, [selector, expected])
+            results[name][0] += int(hit)
+            print(f"   {name:7} {'✅' if hit else '❌'} {description!r} → {selector}")
+    return results
+
+
+def html_only(targets):
+    """clean_html prompt sizes without a browser (the fixture pages are static)."""
+    from ai_locator import clean_html
+
+    total = 0
+    for name in targets:
+        cleaned = clean_html((PAGES_DIR / name).read_text(encoding="utf-8"))[:7000]
+        total += approx_tokens(cleaned)
+        print(f"📄 {name}: clean_html ~{approx_tokens(cleaned)} tokens, outline n/a")
+    print(f"\n📊 Summary\n   html     ~{total} prompt tokens\n   outline  n/a (needs a browser)")
+
+
+async def main():
+    from playwright.async_api import async_playwright
+    from page_outline import outline_page
+    from ai_locator import clean_html
+    import settings
+
+    settings.load_env()
+    with_model = bool(settings.get("OPENAI_API_KEY"))
+    targets = json.loads((PAGES_DIR / "targets.json").read_text(encoding="utf-8"))
+    launch = {"executable_path": os.environ["HUSTLE_CHROMIUM_PATH"]} if os.getenv("HUSTLE_CHROMIUM_PATH") else {}
+
+    totals = {"html": [0, 0, 0.0], "outline": [0, 0, 0.0]}  # tokens, hits, latency
+    asked = 0
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.launch(**launch)
+        except Exception as e:
+            print(f"⚠️ Could not launch Chromium ({str(e).strip().splitlines()[0]}) — reporting clean_html only.\n")
+            html_only(targets)
+            return
+        page = await browser.new_page()
+        for name, page_targets in targets.items():
+            await page.goto((PAGES_DIR / name).as_uri())
+            html = await page.content()
+            started = time.perf_counter()
+            cleaned = clean_html(html)[:7000]
+            clean_ms = 1000 * (time.perf_counter() - started)
+            started = time.perf_counter()
+            outline = await outline_page(page)
+            outline_ms = 1000 * (time.perf_counter() - started)
+
+            print(f"\n📄 {name}: clean_html ~{approx_tokens(cleaned)} tokens ({clean_ms:.0f}ms), "
+                  f"outline ~{approx_tokens(outline.text)} tokens ({outline_ms:.0f}ms, {len(outline.refs)} refs)")
+            totals["html"][0] += approx_tokens(cleaned)
+            totals["outline"][0] += approx_tokens(outline.text)
+            if with_model:
+                results = await ask_both(page, html, outline, page_targets)
+                asked += len(page_targets)
+                for kind, (hits, latency) in results.items():
+                    totals[kind][1] += hits
+                    totals[kind][2] += latency
+        await browser.close()
+
+    print("\n📊 Summary")
+    for kind, (tokens, hits, latency) in totals.items():
+        line = f"   {kind:8} ~{tokens} prompt tokens"
+        if asked:
+            line += f", {hits}/{asked} selectors hit, avg {latency / asked:.2f}s per lookup"
+        print(line)
+    if not asked:
+        print("   (set OPENAI_API_KEY to also measure latency and hit rate)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+# Dry run: import every agents entry module, check the import-time budget and
+# that nothing heavy or side-effecting happened on import, then report which
+# required settings are missing. Finishes well under a second when healthy.
+#
+#   python scripts/check_config.py
+#
+# Exit code is non-zero if the budget is blown, an import pulled in a heavy
+# dependency or created a directory, or a required setting is missing.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+IMPORT_BUDGET_S = float(os.getenv("HUSTLE_IMPORT_BUDGET", "0.5"))
+MODULES = ["researcher", "crawl_scheduler", "enricher", "ai_locator", "builder"]
+# Must only be imported when actually used
+LAZY_MODULES = ["openai", "bs4", "playwright", "dotenv", "numpy"]
+# Directories modules used to create on import
+WATCHED_DIRS = ["output", "memory/built_content"]
+
+
+def main():
+    os.chdir(ROOT)
+    failures = []
+    existed = {d: os.path.isdir(d) for d in WATCHED_DIRS}
+
+    total = 0.0
+    for name in MODULES:
+        started = time.perf_counter()
+        try:
+            __import__(name)
+        except Exception as e:
+            failures.append(f"import {name} failed: {e!r}")
+            print(f"[❌] import {name}: {e!r}")
+            continue
+        elapsed = time.perf_counter() - started
+        total += elapsed
+        print(f"[📦] import {name:16} {elapsed * 1000:7.1f} ms")
+
+    print(f"[⏱️] Total import time {total * 1000:.1f} ms (budget {IMPORT_BUDGET_S * 1000:.0f} ms)")
+    if total > IMPORT_BUDGET_S:
+        failures.append(f"import time {total:.3f}s over budget {IMPORT_BUDGET_S:.3f}s")
+
+    eager = [name for name in LAZY_MODULES if name in sys.modules]
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+
+    created = [d for d in WATCHED_DIRS if os.path.isdir(d) and not existed[d]]
+    if created:
+        failures.append(f"created on import: {', '.join(created)}")
+
+    import settings
+    from researcher import REQUIRED_ENV
+
+    absent = settings.missing(*REQUIRED_ENV)
+    for name in REQUIRED_ENV:
+        print(f"[{'❌' if name in absent else '✅'}] {name}")
+    if absent:
+        failures.append(f"missing settings: {', '.join(absent)}")
+
+    if failures:
+        for failure in failures:
+            print(f"[❌] {failure}")
+        sys.exit(1)
+    print("[✅] Config OK.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Resident alternative to launch_cycle.py + cron. One process keeps Chromium,
+# the OpenAI clients, the model router/scheduler and every module-level cache
+# warm, and runs research → enrich → build cycles on an interval or when
+# triggered. Each cycle gets a fresh browser context seeded with the previous
+# cycle's storage state, so the login session carries over without init
+# scripts and routes piling up on a long-lived context. The site analysis,
+# selectors and catalog URL carry over too: later cycles go straight to the
+# catalog, and only redo analysis, login and the selector strategy once the
+# session stops reaching it.
+#
+# The browser is relaunched after HUSTLE_DAEMON_RECYCLE_CYCLES cycles, or once
+# this process tree (Python + Playwright driver + Chromium) passes
+# HUSTLE_DAEMON_MAX_RSS_MB. Status and controls on 127.0.0.1:HUSTLE_DAEMON_PORT:
+#
+#   GET  /status    cycles, phase durations, memory, next run, last error (JSON)
+#   GET  /health    200 while the browser is connected, 503 otherwise
+#   POST /trigger   start a cycle now
+#
+#   python scripts/daemon.py [--now]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+import replay  # noqa: E402
+import settings  # noqa: E402
+from checkpoint import Checkpoint  # noqa: E402
+from researcher import run_research, REQUIRED_ENV, TARGET_URL  # noqa: E402
+
+INTERVAL_S = float(os.getenv("HUSTLE_DAEMON_INTERVAL", str(24 * 3600)))
+RECYCLE_CYCLES = int(os.getenv("HUSTLE_DAEMON_RECYCLE_CYCLES", "10"))
+MAX_RSS_MB = float(os.getenv("HUSTLE_DAEMON_MAX_RSS_MB", "2000"))
+PORT = int(os.getenv("HUSTLE_DAEMON_PORT", "8787"))
+HISTORY = 20  # cycles kept in /status
+
+
+def tree_rss_mb(root_pid=None):
+    """Resident memory of this process and all its descendants, from /proc (None where unavailable)."""
+    root_pid = root_pid or os.getpid()
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return None
+    parents = {}
+    rss = {}
+    page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                fields = f.read().rsplit(b")", 1)[1].split()
+            with open(f"/proc/{pid}/statm", "rb") as f:
+                rss[pid] = int(f.read().split()[1]) * page_kb
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(int(fields[1]), []).append(pid)
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(parents.get(pid, []))
+    return total / 1024
+
+
+class Daemon:
+    def __init__(self, target_url=TARGET_URL, interval=INTERVAL_S, recycle_cycles=RECYCLE_CYCLES, max_rss_mb=MAX_RSS_MB):
+        self.target_url = target_url
+        self.interval = interval
+        self.recycle_cycles = recycle_cycles
+        self.max_rss_mb = max_rss_mb
+        self.started = time.time()
+        self.playwright = None
+        self.browser = None
+        self.browser_cycles = 0
+        self.browser_launches = 0
+        self.session = None  # storage state carried from cycle to cycle
+        self.site = {}  # site analysis, selectors and catalog URL from the last fresh run (run_research fills it)
+        self.builder = None
+        self.cycles = 0
+        self.failures = 0
+        self.history = []
+        self.phase = "idle"
+        self.next_run = None
+        self.last_error = None
+        self._trigger = asyncio.Event()
+        self._stop = asyncio.Event()
+
+    # — Warm resources —
+
+    async def ensure_browser(self):
+        rss = tree_rss_mb()
+        if self.browser is not None and (
+            not self.browser.is_connected()
+            or self.browser_cycles >= self.recycle_cycles
+            or (rss is not None and rss > self.max_rss_mb)
+        ):
+            print(f"♻️ Recycling browser after {self.browser_cycles} cycle(s), {rss or 0:.0f} MB resident.")
+            await self.close_browser()
+        if self.browser is None:
+            from playwright.async_api import async_playwright
+
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=replay.is_replaying())
+            self.browser_cycles = 0
+            self.browser_launches += 1
+        return self.browser
+
+    async def close_browser(self):
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+
+    def ensure_builder(self):
+        if self.builder is None:
+            from core.hustle_agent import HustleAgent
+            from builder import BuilderTask
+
+            self.builder = BuilderTask(HustleAgent())
+        return self.builder
+
+    # — Cycles —
+
+    async def run_cycle(self):
+        record = {"started": time.time(), "phases": {}, "ok": False}
+        phase_started = time.perf_counter()
+
+        def mark(phase):
+            nonlocal phase_started
+            now = time.perf_counter()
+            record["phases"][self.phase] = round(now - phase_started, 3)
+            self.phase, phase_started = phase, now
+
+        self.phase = "startup"
+        try:
+            browser = await self.ensure_browser()
+            options = dict(replay.context_options())
+            if self.session:
+                options["storage_state"] = self.session
+            context = await browser.new_context(**options)
+            try:
+                await replay.attach(context)
+                mark("research")
+                # Enrichment runs inside run_research; resume picks up a cycle that died mid-scrape
+                resume = Checkpoint.load(self.target_url) is not None
+                enriched = await run_research(context, self.target_url, resume=resume, site=self.site)
+                record["offers"] = len(enriched or [])
+                self.session = await context.storage_state()
+            finally:
+                await context.close()
+            self.browser_cycles += 1
+            mark("build")
+            await asyncio.to_thread(self.ensure_builder().run)
+            mark("idle")
+            record["ok"] = True
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            record["error"] = self.last_error
+            print(f"❌ Cycle failed in {self.phase}: {self.last_error}")
+            mark("idle")
+            await self.close_browser()  # start clean next time
+        self.cycles += 1
+        record["duration_s"] = round(time.time() - record["started"], 3)
+        self.history = (self.history + [record])[-HISTORY:]
+        print(f"⏱️ Cycle {self.cycles}: {record['duration_s']:.1f}s " + json.dumps(record["phases"]))
+
+    async def run(self, run_now=False):
+        settings.require(*REQUIRED_ENV)
+        # Pay the start-up costs once, before the first cycle is due
+        self.ensure_builder()
+        await self.ensure_browser()
+        print(f"🛰️ Daemon up: every {self.interval / 3600:.1f}h, status on http://127.0.0.1:{PORT}/status")
+        if run_now:
+            self._trigger.set()
+        try:
+            while not self._stop.is_set():
+                self.next_run = time.time() + self.interval
+                try:
+                    await asyncio.wait_for(self._wait_for_trigger(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                if self._stop.is_set():
+                    break
+                self._trigger.clear()
+                self.next_run = None
+                await self.run_cycle()
+        finally:
+            await self.close_browser()
+            if self.playwright is not None:
+                await self.playwright.stop()
+
+    async def _wait_for_trigger(self):
+        stop = asyncio.ensure_future(self._stop.wait())
+        trigger = asyncio.ensure_future(self._trigger.wait())
+        try:
+            await asyncio.wait([stop, trigger], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop.cancel()
+            trigger.cancel()
+
+    def trigger(self):
+        self._trigger.set()
+
+    def stop(self):
+        self._stop.set()
+
+    # — Status —
+
+    def status(self):
+        rss = tree_rss_mb()
+        return {
+            "phase": self.phase,
+            "uptime_s": round(time.time() - self.started),
+            "cycles": self.cycles,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "next_run": self.next_run,
+            "browser": {
+                "connected": bool(self.browser and self.browser.is_connected()),
+                "cycles": self.browser_cycles,
+                "launches": self.browser_launches,
+                "recycle_after": self.recycle_cycles,
+            },
+            "site_cached": bool(self.site),
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "max_rss_mb": self.max_rss_mb,
+            "history": self.history,
+        }
+
+    def healthy(self):
+        # Between cycles there may legitimately be no browser (just recycled, or not launched yet)
+        return self.browser is None and self.phase == "idle" or bool(self.browser and self.browser.is_connected())
+
+
+def serve_status(daemon, loop, port=PORT):
+    """Status endpoint on a background thread; controls hop back onto the daemon's loop."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body):
+            data = json.dumps(body, indent=2, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/status":
+                self._send(200, daemon.status())
+            elif self.path == "/health":
+                ok = daemon.healthy()
+                self._send(200 if ok else 503, {"ok": ok, "phase": daemon.phase})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/trigger":
+                return self._send(404, {"error": "not found"})
+            if daemon.phase != "idle":
+                return self._send(409, {"error": f"cycle already running ({daemon.phase})"})
+            loop.call_soon_threadsafe(daemon.trigger)
+            self._send(202, {"triggered": True})
+
+        def log_message(self, *args):
+            pass  # keep the daemon's own output readable
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def main():
+    daemon = Daemon()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.stop)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+    server = serve_status(daemon, loop)
+    try:
+        await daemon.run(run_now="--now" in sys.argv[1:])
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,25 +5,32 @@ import os
 
 print("[DEBUG] DEV_MODE =", os.getenv("DEV_MODE"))
 
-def run_agent(script_path, label, timeout=300):  # e.g. 5-minute timeout
+RESEARCHER_RESUMES = int(os.getenv("HUSTLE_RESEARCHER_RESUMES", "2"))
+
+def run_agent(script_path, label, timeout=300, args=()):  # e.g. 5-minute timeout
     print(f"\n[+] Running {label}...")
     try:
         result = subprocess.run(
-            [sys.executable, script_path],
+            [sys.executable, script_path, *args],
             capture_output=True,
             text=True,
             timeout=timeout
         )
         if result.returncode != 0:
             print(f"[ERROR] {label} failed:\n{result.stderr}")
-        else:
-            print(f"[{label} Output]\n{result.stdout}")
+            return False
+        print(f"[{label} Output]\n{result.stdout}")
+        return True
     except subprocess.TimeoutExpired:
         print(f"[TIMEOUT] {label} took too long and was terminated.")
+        return False
 
 def main():
     print("=== AI Income System: Daily Launch Cycle ===")
-    run_agent("agents/researcher.py", "Researcher Agent")
+    # The researcher checkpoints as it goes; a crash or timeout picks up from there
+    for attempt in range(1 + RESEARCHER_RESUMES):
+        if run_agent("agents/researcher.py", "Researcher Agent", args=("--resume",) if attempt else ()):
+            break
     time.sleep(1)
 
     run_agent("agents/builder.py", "Builder Agent")
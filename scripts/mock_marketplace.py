@@ -0,0 +1,146 @@
+import http.server
+import json
+import os
+import sys
+import threading
+from urllib.parse import urlparse, parse_qsl
+
+# Local stand-in for the Digistore marketplace SPA, for benchmarks and offline
+# runs. The page shell fetches /api/marketplace/offers?page=N over XHR and
+# renders cards with the same label/value text layout as the real site;
+# "Promote now" opens a dialog holding the promo link after a short delay.
+#
+#   python scripts/mock_marketplace.py [port] [offers]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PATH = os.path.join(ROOT, "fixtures", "cards", "digistore_cards.json")
+PER_PAGE = 20
+PROMO_DELAY_MS = 300
+
+CATEGORIES = ["Supplements - health", "Deliverable", "Downloads", "Personal development"]
+
+SHELL = """<!doctype html>
+<html><head><title>Marketplace</title></head>
+<body>
+<h1>All offers on the affiliate marketplace</h1>
+<div id="cards"></div>
+<nav class="pagination" id="pager"></nav>
+<div id="promo-dialog" style="display:none"><input id="promo-link" readonly><button id="promo-close">Close</button></div>
+<script>
+const params = new URLSearchParams(location.search);
+const page = parseInt(params.get('page') || '1', 10);
+fetch('/api/marketplace/offers?page=' + page).then(r => r.json()).then(data => {
+  const cards = document.getElementById('cards');
+  for (const o of data.offers) {
+    const card = document.createElement('div');
+    card.className = 'product-card';
+    card.dataset.id = o.id;
+    card.innerHTML = `<h3 class="product-title">${o.name}</h3><div>${o.category}</div>
+      <div>$${o.net_earnings.toFixed(2)}</div><div>Net earnings/sale*</div>
+      <button class="promote">Promote now</button>
+      <p>${o.description}</p>
+      <div>Price</div><div>$${o.price.toFixed(2)}</div>
+      <div>Commission</div><div>${o.commission.toFixed(2)}%</div>
+      <div>Earnings/cart visitor*</div><div>$${o.epc.toFixed(2)}</div>
+      <div>Vendor</div><div>${o.vendor}</div>
+      <div>Online since</div><div>${o.online_since}</div>
+      <div>Cart conversion*</div><div>${o.cart_conversion.toFixed(2)}%</div>
+      <div>Cancellation rate*</div><div>${o.cancellation_rate.toFixed(2)}%</div>`;
+    card.querySelector('.promote').addEventListener('click', () => {
+      setTimeout(() => {
+        document.getElementById('promo-link').value = o.promolink;
+        document.getElementById('promo-dialog').style.display = 'block';
+      }, __PROMO_DELAY_MS__);
+    });
+    cards.appendChild(card);
+  }
+  const pager = document.getElementById('pager');
+  for (let n = 1; n <= data.pages; n++) {
+    const a = document.createElement('a');
+    a.href = '/marketplace?page=' + n;
+    a.textContent = String(n);
+    if (n === page) a.setAttribute('aria-current', 'page');
+    pager.appendChild(a);
+  }
+});
+document.getElementById('promo-close').addEventListener('click', () => {
+  document.getElementById('promo-dialog').style.display = 'none';
+});
+</script>
+</body></html>
+"""
+
+
+def build_catalog(count):
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    bases = [card["expected"] for card in corpus if "price" in card["expected"]]
+    offers = []
+    for i in range(count):
+        base = bases[i % len(bases)]
+        offers.append({
+            "id": 1000 + i,
+            "name": f"{base['title']} #{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "description": f"Offer {i} description.",
+            "net_earnings": base.get("net_earnings_per_sale", 20.0),
+            "price": base["price"],
+            "commission": base["commission"],
+            "epc": base.get("earnings_per_cart_visitor", 1.0),
+            "vendor": base.get("vendor", "vendor"),
+            "online_since": "06/28/2022",
+            "cart_conversion": base.get("cart_conversion", 2.0),
+            "cancellation_rate": base.get("cancellation_rate", 5.0),
+            "promolink": f"https://www.digistore24.com/redir/{1000 + i}/myhustleai/",
+        })
+    return offers
+
+
+def make_handler(catalog):
+    pages = max(1, -(-len(catalog) // PER_PAGE))
+    shell = SHELL.replace("__PROMO_DELAY_MS__", str(PROMO_DELAY_MS)).encode("utf-8")
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = dict(parse_qsl(url.query))
+            if url.path == "/api/marketplace/offers":
+                page = max(1, int(query.get("page", "1")))
+                chunk = catalog[(page - 1) * PER_PAGE: page * PER_PAGE]
+                body = json.dumps({"page": page, "pages": pages, "offers": chunk}).encode("utf-8")
+                content_type = "application/json"
+            elif url.path in ("/", "/marketplace"):
+                body = shell
+                content_type = "text/html; charset=utf-8"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=0, offers=200):
+    """Start the mock marketplace on a background thread; returns the server (see .server_port)."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), make_handler(build_catalog(offers)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    server = serve(port, count)
+    print(f"[🛒] Mock marketplace on http://127.0.0.1:{server.server_port}/marketplace ({count} offers)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
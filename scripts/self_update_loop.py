@@ -2,6 +2,14 @@ import subprocess
 import time
 import json
 import os
+import re
+import sys
+import shutil
+import hashlib
+import tempfile
+import threading
+import py_compile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # === CONFIG ===
@@ -11,6 +19,17 @@ BACKUP_PATH = f"{SCRIPT_PATH}.bak"
 ERROR_LOG = "logs/researcher_errors.log"
 LLM_FIX_SCRIPT = "agents/fix_with_llm.py"  # you create this helper for GPT calls
 
+# Recorded HAR + LLM cassette (see agents/replay.py). Record with:
+#   HUSTLE_RECORD_DIR=fixtures/researcher python agents/researcher.py
+FIXTURE_DIR = "fixtures/researcher"
+PATCH_CACHE_DIR = "logs/patch_cache"
+CANDIDATES = 3                 # patches requested from the LLM per failure
+CANDIDATE_TEMPERATURES = [0.2, 0.5, 0.8]
+VALIDATION_TIMEOUT = 20        # seconds per fixture replay
+LIVE_TIMEOUT = 60
+RETRY_DELAY = 5
+MAX_ITERATIONS = 10
+
 os.makedirs("logs", exist_ok=True)
 
 def log_patch(error_text, llm_response):
@@ -24,7 +43,7 @@ def log_patch(error_text, llm_response):
 def run_script_and_capture_output():
     print(f"[INFO] Running {FOCUS_AGENT}...")
     try:
-        result = subprocess.run(["python", SCRIPT_PATH], capture_output=True, text=True, timeout=60)
+        result = subprocess.run([sys.executable, SCRIPT_PATH], capture_output=True, text=True, timeout=LIVE_TIMEOUT)
         return result.stdout, result.stderr
     except subprocess.TimeoutExpired:
         return "", "[TIMEOUT] Script took too long and was terminated."
@@ -44,11 +63,143 @@ def backup_original():
             dst.write(src.read())
         print("[INFO] Backed up original script.")
 
-def send_to_llm_and_get_fix(error_text):
-    print("[INFO] Sending error to LLM for fix...")
-    result = subprocess.run(["python", LLM_FIX_SCRIPT, error_text], capture_output=True, text=True)
+# --- Error signatures & patch cache ---
+
+def normalize_error_signature(error_text):
+    """
+    Reduce an error to the parts that identify *what* broke, so the same failure
+    with different line numbers, timings, addresses or temp paths maps to one key.
+    """
+    text = error_text.lower()
+    text = re.sub(r'file "[^"]*[\\/]', 'file "', text)          # absolute paths -> basename
+    text = re.sub(r"line \d+", "line n", text)
+    text = re.sub(r"0x[0-9a-f]+", "0x", text)
+    text = re.sub(r"\d+(\.\d+)?\s*ms", "n ms", text)
+    text = re.sub(r"\b\d+\b", "n", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+def load_cached_patch(signature):
+    path = os.path.join(PATCH_CACHE_DIR, f"{signature}.py")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    return None
+
+def cache_patch(signature, code):
+    os.makedirs(PATCH_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(PATCH_CACHE_DIR, f"{signature}.py"), "w", encoding="utf-8") as f:
+        f.write(code)
+
+# --- Candidate generation ---
+
+def send_to_llm_and_get_fix(error_text, temperature=0.3):
+    print(f"[INFO] Sending error to LLM for fix (temperature={temperature})...")
+    result = subprocess.run([sys.executable, LLM_FIX_SCRIPT, error_text, str(temperature)], capture_output=True, text=True)
     return result.stdout  # should be the fixed code returned from GPT/Claude
 
+def request_candidates(error_text, count=CANDIDATES):
+    temperatures = (CANDIDATE_TEMPERATURES * count)[:count]
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        patches = list(pool.map(lambda t: send_to_llm_and_get_fix(error_text, t), temperatures))
+    # Drop empty / duplicate / obviously-not-Python responses before spending time on them
+    unique = []
+    for code in patches:
+        if "def" in code and "playwright" in code and code not in unique:
+            unique.append(code)
+    return unique
+
+# --- Fixture validation ---
+
+class ValidationRun:
+    """Live fixture replays of one batch, so the rest can be killed once a candidate passes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.procs = []
+        self.stopped = False
+
+    def start(self, *args, **kwargs):
+        with self.lock:
+            if self.stopped:
+                return None
+            proc = subprocess.Popen(*args, **kwargs)
+            self.procs.append(proc)
+            return proc
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            for proc in self.procs:
+                if proc.poll() is None:
+                    proc.kill()
+
+def validate_candidate(code, timeout=VALIDATION_TIMEOUT, run=None):
+    """
+    Run a candidate researcher.py against the recorded fixtures inside an isolated
+    temp copy of agents/. Returns (ok, detail, seconds). Without recorded fixtures
+    nothing is proven, so the candidate fails.
+    """
+    started = time.perf_counter()
+    if not os.path.isdir(FIXTURE_DIR):
+        return False, f"no fixtures recorded in {FIXTURE_DIR}", time.perf_counter() - started
+    run = run or ValidationRun()
+    with tempfile.TemporaryDirectory(prefix="hustle_patch_") as tmp:
+        shutil.copytree("agents", os.path.join(tmp, "agents"), ignore=shutil.ignore_patterns("__pycache__", "*.bak"))
+        candidate_path = os.path.join(tmp, SCRIPT_PATH)
+        with open(candidate_path, "w", encoding="utf-8") as f:
+            f.write(code)
+
+        try:
+            py_compile.compile(candidate_path, doraise=True)
+        except py_compile.PyCompileError as e:
+            return False, f"compile error: {e.msg.strip()}", time.perf_counter() - started
+
+        env = dict(os.environ)
+        env["HUSTLE_REPLAY_DIR"] = os.path.abspath(FIXTURE_DIR)
+        env.pop("HUSTLE_RECORD_DIR", None)
+        # Replay never talks to the real site or model, but the researcher still checks these
+        env.setdefault("DIGISTORE_EMAIL", "fixture@example.com")
+        env.setdefault("DIGISTORE_PASSWORD", "fixture")
+        env.setdefault("OPENAI_API_KEY", "sk-fixture")
+
+        proc = run.start(
+            [sys.executable, SCRIPT_PATH],
+            cwd=tmp, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        if proc is None:
+            return False, "cancelled (another candidate passed)", time.perf_counter() - started
+        try:
+            _, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return False, "fixture replay timed out", time.perf_counter() - started
+
+    elapsed = time.perf_counter() - started
+    if run.stopped:
+        return False, "cancelled (another candidate passed)", elapsed
+    if proc.returncode != 0 or "Traceback" in stderr:
+        return False, extract_playwright_errors(stderr) or stderr[-500:], elapsed
+    return True, "ok", elapsed
+
+def pick_passing_candidate(candidates):
+    """Validate candidates in parallel; return the first one that passes (or None)."""
+    if not candidates:
+        return None
+    run = ValidationRun()
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        futures = {pool.submit(validate_candidate, code, run=run): i for i, code in enumerate(candidates)}
+        for future in as_completed(futures):
+            i = futures[future]
+            ok, detail, seconds = future.result()
+            print(f"[VALIDATE] Candidate #{i + 1}: {'PASS' if ok else 'FAIL'} in {seconds:.1f}s — {detail[:200]}")
+            if ok:
+                # Kill the replays still running so the pool shuts down now, not at their timeout
+                run.stop()
+                return candidates[i]
+    return None
+
 def write_fixed_script(new_code):
     with open(SCRIPT_PATH, "w") as f:
         f.write(new_code)
@@ -63,28 +214,48 @@ def main():
     print("[LOOP] Starting HustleAI Self-Correction Loop")
     backup_original()
 
-    while True:
+    if not os.path.isdir(FIXTURE_DIR):
+        print(f"[ERROR] No fixtures in {FIXTURE_DIR} — patches can't be validated, so none will be applied.")
+        print("        Record them with: HUSTLE_RECORD_DIR=fixtures/researcher python agents/researcher.py")
+        return
+
+    for iteration in range(1, MAX_ITERATIONS + 1):
         stdout, stderr = run_script_and_capture_output()
         if "Traceback" not in stderr:
             print("[SUCCESS] Script ran without critical error.")
             break
 
         error = extract_playwright_errors(stderr)
-        if error:
-            log_error(error)
-            new_code = send_to_llm_and_get_fix(error)
-            if "def" in new_code and "playwright" in new_code:
-                log_patch(error, new_code)
-                write_fixed_script(new_code)
-            else:
-                print("[WARNING] LLM response suspicious — reverting.")
-                revert_to_backup()
-        else:
+        if not error:
             print("[INFO] No playwright-related errors found.")
             break
 
-        print("[LOOP] Sleeping before next retry...")
-        time.sleep(30)
+        log_error(error)
+        signature = normalize_error_signature(error)
+        print(f"[INFO] Error signature: {signature}")
+
+        patch = None
+        cached = load_cached_patch(signature)
+        if cached:
+            print("[CACHE] Known error signature — validating cached patch (no LLM call).")
+            patch = pick_passing_candidate([cached])
+
+        if patch is None:
+            candidates = request_candidates(error)
+            print(f"[INFO] Validating {len(candidates)} candidate patch(es) against fixtures...")
+            patch = pick_passing_candidate(candidates)
+            if patch is not None:
+                cache_patch(signature, patch)
+
+        if patch is not None:
+            log_patch(error, patch)
+            write_fixed_script(patch)
+        else:
+            print("[WARNING] No candidate passed fixture validation — reverting.")
+            revert_to_backup()
+
+        print(f"[LOOP] Iteration {iteration} done. Sleeping {RETRY_DELAY}s before the next live run...")
+        time.sleep(RETRY_DELAY)
 
 if __name__ == "__main__":
     main()